@@ -1,12 +1,30 @@
-from flask import Flask, render_template, jsonify, request, Response
+from flask import Flask, render_template, jsonify, request, Response, send_file
 import cv2
 import threading
 import time
-from core.detection import CrowdDetector
+from functools import partial
+from core.detection import create_detector_from_config
+from core.batching import InferenceBatcher
+from core.broadcast import FrameBroadcaster
+from core.cache import CachedAnalysis, CachingAnalyzer, ResultCache, config_fingerprint, file_digest
+from core.capture import LatestFrameCapture
+from core.events import EventHub, format_sse
+from core.jobs import JobManager
+from core.uploads import UploadManager, is_streamable
+from core.offline import OfflineAnalyzer
+from core.segments import SegmentedAnalyzer
+from core.overlay import overlay_metadata
+from core.stats import StatsPublisher
+from core.pipeline import Pipeline, Stage
+from core.engine import create_engine_from_config
+from core.workers import InferenceWorkerPool
+from core.roi import RegionOfInterest
 import os
 from config import Config
 import numpy as np
+import shutil
 import tempfile
+from werkzeug.utils import secure_filename
 
 app = Flask(__name__, 
             template_folder=Config.TEMPLATE_DIR,
@@ -14,35 +32,164 @@ app = Flask(__name__,
 
 # Global variables
 detector = None
+batcher = None  # Shared InferenceBatcher when Config.INFERENCE_BATCHING is on
+worker_pool = None  # InferenceWorkerPool when Config.INFERENCE_WORKERS > 0
 camera = None
 camera_lock = threading.Lock()
+camera_reader = None  # LatestFrameCapture draining the camera on its own thread
 detection_thread = None
 stop_detection = False
 current_frame = None
 frame_lock = threading.Lock()
-detection_stats = {
+frame_broadcaster = FrameBroadcaster(quality=Config.STREAM_JPEG_QUALITY)  # Encodes each frame once for all /video_feed clients
+event_hub = EventHub(max_rate=Config.EVENTS_MAX_RATE)  # Pushes stats and incidents to /events subscribers
+overlay_hub = EventHub(max_rate=Config.OVERLAY_MAX_RATE)  # Pushes per-frame boxes, faces and risk to /overlay
+stream_pipelines = {}  # Running Pipeline of each stream
+stream_counters = {}  # FPS and stats refresh bookkeeping of each stream
+stats_publisher = StatsPublisher({
     'people_count': 0,
     'alert_level': 0,
     'fps': 0,
+    'inference': {},
+    'capture': {},
+    'pipeline': {},
+    'broadcast': {},
     'stampede_risk': {
         'score': 0.0,
         'level': 'LOW',
         'factors': {}
     }
-}
+})  # Immutable snapshots of the detection statistics served by /stats
 
 # Video processing variables
 video_capture = None
 video_processing = False
 video_filename = None
+replaced_videos = []  # Earlier /upload_video files, deleted once no job reads them
+replaced_videos_lock = threading.Lock()
+
+# Model tier used by each stream ("camera" and "video")
+stream_model_tiers = dict(Config.STREAM_MODEL_TIERS)
+
+# Region of interest of each stream (streams without one use the whole frame)
+stream_rois = {stream: RegionOfInterest(polygons) for stream, polygons in Config.STREAM_ROIS.items() if polygons}
+
+def job_max_fps():
+    """Analysis jobs are limited to JOB_LIVE_MAX_FPS while a camera or video plays live"""
+    live = (camera_reader is not None and not stop_detection) or video_processing
+    return Config.JOB_LIVE_MAX_FPS if live else None
+
+def create_analyzer(job, model_tier, sample_every, segments, source_complete=None):
+    """Analyzer that runs a job's video through the detector"""
+    if segments > 1 and source_complete is None:
+        # Each segment process loads its own model; detections are persisted here
+        return SegmentedAnalyzer(partial(create_detector_from_config, Config, ':memory:', model_tier),
+                                 job.video_path, job.output_path, segments=segments,
+                                 warmup_frames=Config.SEGMENT_WARMUP_FRAMES, sample_every=sample_every,
+                                 model_tier=model_tier, roi=stream_rois.get('video'),
+                                 cv_threads=Config.WORKER_CV_THREADS, detector=detector)
+    
+    # Worker processes or the batcher take the frames when enabled; no stream_id,
+    # so queued offline frames are never superseded
+    runner = worker_pool or batcher
+    return OfflineAnalyzer(detector, job.video_path, job.output_path, sample_every=sample_every,
+                           stream_id=f"job-{job.id}", model_tier=model_tier, roi=stream_rois.get('video'),
+                           infer=runner.infer if runner is not None else None,
+                           infer_workers=Config.OFFLINE_INFER_WORKERS, queue_size=Config.OFFLINE_QUEUE_SIZE,
+                           max_fps=job_max_fps, source_complete=source_complete,
+                           idle_timeout=Config.UPLOAD_IDLE_TIMEOUT)
+
+def create_analysis(job):
+    """Analyzer of a queued video analysis job
+    
+    Job parameters: sample_every analyses only every Nth frame; segments
+    splits the video across that many processes (0 = one process). A video
+    analysed before with the same model and settings is replayed from the
+    result cache. A job of an upload still in progress analyses the part
+    received so far and follows the file as it grows.
+    """
+    if detector is None:
+        raise RuntimeError("Detector not initialized")
+    sample_every = int(job.params.get('sample_every', Config.OFFLINE_SAMPLE_EVERY))
+    segments = int(job.params.get('segments', Config.SEGMENT_PROCESSES))
+    model_tier = stream_model_tiers.get('video')
+    upload = uploads.get(job.params['upload_id']) if 'upload_id' in job.params else None
+    if upload is not None and not upload.is_complete():
+        def upload_complete():
+            if uploads.get(upload.id) is None:
+                raise RuntimeError("The upload expired before it completed")
+            return upload.is_complete()
+        return create_analyzer(job, model_tier, sample_every, 1, source_complete=upload_complete)
+    if analysis_cache is None:
+        return create_analyzer(job, model_tier, sample_every, segments)
+    
+    fingerprint = config_fingerprint(Config, model_tier, Config.STREAM_ROIS.get('video'),
+                                     sample_every=sample_every, segments=segments,
+                                     warmup=Config.SEGMENT_WARMUP_FRAMES if segments > 1 else None)
+    # Uploads were hashed while they arrived
+    digest = upload.sha256() if upload is not None else file_digest(job.video_path)
+    key = ResultCache.key(digest, fingerprint)
+    status = analysis_cache.get(key)
+    if status is not None:
+        return CachedAnalysis(analysis_cache, key, status, job.output_path)
+    return CachingAnalyzer(create_analyzer(job, model_tier, sample_every, segments), analysis_cache, key)
+
+analysis_cache = (ResultCache(Config.ANALYSIS_CACHE_DIR, Config.ANALYSIS_CACHE_MAX_BYTES)
+                  if Config.ANALYSIS_CACHE_MAX_BYTES else None)  # Results of analysed videos by content hash
+analysis_jobs = JobManager(create_analysis, Config.JOBS_DIR, workers=Config.JOB_WORKERS,
+                           max_queued=Config.JOB_MAX_QUEUED,
+                           history_size=Config.JOB_HISTORY)  # Queued and finished video analysis jobs
+uploads = UploadManager(Config.UPLOADS_DIR, Config.UPLOAD_MAX_BYTES, chunk_size=Config.UPLOAD_CHUNK_SIZE,
+                        expiry=Config.UPLOAD_EXPIRY)  # Chunked uploads in progress
+upload_jobs_lock = threading.Lock()
+
+def publish_placeholder():
+    """Show a placeholder on /video_feed until the first processed frame"""
+    placeholder = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(placeholder, "Waiting for camera feed...", (50, 240), 
+              cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    frame_broadcaster.publish(placeholder)
+
+publish_placeholder()
 
 def initialize_detector():
     """Initialize the crowd detector"""
-    global detector
+    global detector, batcher, worker_pool
     try:
         print("Initializing detector...")
-        detector = CrowdDetector(Config.DATABASE_FILE)
+        detector = create_detector_from_config(Config)
         print("✓ Detector initialized successfully")
+        
+        # Load the tiers streams are configured to use side by side
+        for stream, tier in stream_model_tiers.items():
+            try:
+                detector.load_model_tier(tier)
+            except Exception as e:
+                print(f"Warning: Could not load model tier '{tier}' for {stream}: {e}")
+                stream_model_tiers[stream] = detector.model_tier
+        
+        # Inference in worker processes, outside the GIL of the stream threads
+        if Config.INFERENCE_WORKERS > 0:
+            try:
+                worker_pool = InferenceWorkerPool(partial(create_engine_from_config, Config),
+                                                  workers=Config.INFERENCE_WORKERS,
+                                                  cv_threads=Config.WORKER_CV_THREADS,
+                                                  max_frame_bytes=Config.WORKER_MAX_FRAME_BYTES,
+                                                  task_timeout=Config.WORKER_TASK_TIMEOUT,
+                                                  fallback=detector._infer_people)
+                worker_pool.start()
+                print(f"✓ Started {Config.INFERENCE_WORKERS} inference worker processes")
+            except Exception as e:
+                print(f"Warning: Could not start inference workers, running in-process: {e}")
+                worker_pool = None
+        
+        # Streams share batched forward passes through one batcher thread
+        elif Config.INFERENCE_BATCHING:
+            batcher = InferenceBatcher(detector.infer_people_batch,
+                                       max_batch_size=Config.BATCH_MAX_SIZE,
+                                       max_wait=Config.BATCH_MAX_WAIT)
+            batcher.start()
+            print(f"✓ Inference batching enabled (up to {Config.BATCH_MAX_SIZE} frames)")
         return True
     except Exception as e:
         print(f"✗ Error initializing detector: {e}")
@@ -51,190 +198,235 @@ def initialize_detector():
         detector = None
         return False
 
-def detect_crowd_continuously():
-    """Continuously detect crowd in a separate thread"""
-    global camera, current_frame, detection_stats, stop_detection, detector
+def stream_infer():
+    """Inference callable for detect_crowd: the worker pool or shared batcher if enabled, else None
+
+    No stream_id is passed: the batcher would cancel a stream's earlier
+    frame still in flight, but with several infer workers that frame is
+    already planned and must get its result.
+    """
+    runner = worker_pool or batcher
+    if runner is None:
+        return None
+    return runner.infer
+
+def inference_stats(stream):
+    """Inference counters of a stream, plus batch statistics when batching"""
+    stats = detector.get_inference_stats(stream)
+    if batcher is not None:
+        stats['batching'] = batcher.get_stats()
+    if worker_pool is not None:
+        stats['workers'] = worker_pool.get_stats()
+    return stats
+
+def update_detection_stats(stream, people_count, risk_data, captured=None):
+    """Publish the latest result of a stream as a new stats snapshot (at most every 100ms)"""
+    counters = stream_counters.setdefault(stream, {'frames': 0, 'start': time.time(), 'last_update': 0.0, 'fps': 0})
+    
+    # FPS over every processed frame, refreshed every 10 frames
+    counters['frames'] += 1
+    if counters['frames'] % 10 == 0:
+        elapsed_time = time.time() - counters['start']
+        if elapsed_time > 0:  # Avoid division by zero
+            counters['fps'] = round(counters['frames'] / elapsed_time, 2)
+        counters['frames'] = 0
+        counters['start'] = time.time()
+    
+    # Update detection stats more frequently for real-time updates
+    current_time = time.time()
+    if current_time - counters['last_update'] < 0.1:  # Update every 100ms for real-time feel
+        return
+    counters['last_update'] = current_time
+    
+    # Collect the changed fields; they are published together as one snapshot
+    changes = {
+        'fps': counters['fps'],
+        'people_count': people_count,
+        'stampede_risk': risk_data,
+        'inference': inference_stats(stream),
+        'broadcast': frame_broadcaster.get_stats(),
+    }
+    
+    pipeline = stream_pipelines.get(stream)
+    if pipeline is not None:
+        changes['pipeline'] = pipeline.get_stats()
+    
+    # Capture to result latency and frames skipped to keep up
+    if captured is not None and camera_reader is not None:
+        capture_stats = camera_reader.get_stats()
+        capture_stats['latency_ms'] = round((time.time() - captured.timestamp) * 1000, 1)
+        changes['capture'] = capture_stats
     
-    frame_count = 0
-    start_time = time.time()
-    last_stats_update = time.time()
+    # Calculate alert level based on people count and stampede risk
+    risk_level = risk_data.get('level', 'LOW')
+    if risk_level == 'HIGH':
+        changes['alert_level'] = 4  # Stampede Risk
+    elif risk_level == 'MEDIUM':
+        changes['alert_level'] = 3  # High Risk
+    elif people_count <= Config.ALERT_THRESHOLDS["CAUTION"]:
+        changes['alert_level'] = 0  # Normal
+    elif people_count <= Config.ALERT_THRESHOLDS["WARNING"]:
+        changes['alert_level'] = 1  # Caution
+    elif people_count <= Config.ALERT_THRESHOLDS["CRITICAL"]:
+        changes['alert_level'] = 2  # Warning
+    else:
+        changes['alert_level'] = 3  # Critical
+    
+    snapshot = stats_publisher.update(changes)
+    
+    # Dashboards subscribed to /events receive the keys that changed
+    event_hub.publish_state('stats', snapshot.data)
+
+def publish_incidents(records):
+    """Push newly written stampede incidents to /events, in the /stampede_incidents row format"""
+    for table, values in records:
+        if table == 'stampede_incidents':
+            timestamp, risk_level, people_count, risk_score, factors = values
+            event_hub.publish_event('incident', [str(timestamp), risk_level, people_count, risk_score, factors])
+
+def build_stream_pipeline(stream, source, policy):
+    """Pipeline configuration running detect_crowd's steps for one stream.
+    
+    decode (the source) -> preprocess (motion gate / keyframe plan) ->
+    infer -> postprocess (tracking, faces, movement, risk) -> persist
+    (database, stats) -> encode (JPEG for /video_feed). Items are dicts
+    holding the frame and what each stage adds to it. policy only applies
+    to the preprocess queue: once a frame is planned the stream state has
+    moved on, so later stages block rather than drop it (and with it its
+    database rows, incidents and stats).
+    """
     error_logged = False
     
-    while not stop_detection:
-        try:
-            with camera_lock:
-                if camera is None or not camera.isOpened():
-                    time.sleep(0.005)  # Very short sleep for better responsiveness
-                    continue
-                
-                ret, frame = camera.read()
-                if not ret:
-                    time.sleep(0.005)  # Very short sleep
-                    continue
-            
-            # ALWAYS store the raw frame as fallback
-            if frame is not None:
-                with frame_lock:
-                    current_frame = frame
-            
-            if detector is not None:
+    def detection_step(step):
+        """Skip a step without a detector or after a failed step; the raw frame is still shown"""
+        def run(item):
+            nonlocal error_logged
+            if detector is None:
+                if not error_logged:
+                    print(f"Warning: Detector not initialized ({stream})")
+                    error_logged = True
+            elif 'error' not in item:
                 try:
-                    processed_frame, people_count, detections, risk_data = detector.detect_crowd(frame)
-                    error_logged = False  # Reset error flag on success
-                    
-                    # Update detection stats more frequently for real-time updates
-                    current_time = time.time()
-                    if current_time - last_stats_update >= 0.1:  # Update every 100ms for real-time feel
-                        # Update detection stats
-                        detection_stats['people_count'] = people_count
-                        
-                        # Update stampede risk data
-                        detection_stats['stampede_risk'] = risk_data
-                        
-                        # Calculate alert level based on people count and stampede risk
-                        # Fix: Use risk_data['level'] instead of risk_data['risk_level']
-                        risk_level = risk_data.get('level', 'LOW')
-                        if risk_level == 'HIGH':
-                            detection_stats['alert_level'] = 4  # Stampede Risk
-                        elif risk_level == 'MEDIUM':
-                            detection_stats['alert_level'] = 3  # High Risk
-                        elif people_count <= Config.ALERT_THRESHOLDS["CAUTION"]:
-                            detection_stats['alert_level'] = 0  # Normal
-                        elif people_count <= Config.ALERT_THRESHOLDS["WARNING"]:
-                            detection_stats['alert_level'] = 1  # Caution
-                        elif people_count <= Config.ALERT_THRESHOLDS["CRITICAL"]:
-                            detection_stats['alert_level'] = 2  # Warning
-                        else:
-                            detection_stats['alert_level'] = 3  # Critical
-                        
-                        # Calculate FPS more frequently for better accuracy
-                        frame_count += 1
-                        if frame_count % 10 == 0:  # Update FPS every 10 frames
-                            elapsed_time = time.time() - start_time
-                            if elapsed_time > 0:  # Avoid division by zero
-                                detection_stats['fps'] = round(frame_count / elapsed_time, 2)
-                            frame_count = 0
-                            start_time = time.time()
-                        
-                        last_stats_update = current_time
-                    
-                    # Store the processed frame
-                    with frame_lock:
-                        current_frame = processed_frame
-                        
+                    step(item)
                 except Exception as e:
+                    item['error'] = e
                     if not error_logged:
-                        print(f"Error in detection: {e}")
+                        print(f"Error in {stream} detection: {e}")
                         import traceback
                         traceback.print_exc()
                         error_logged = True
-                    # Frame is already stored as fallback above
-            else:
-                # Detector not initialized - frame already stored as fallback
-                if not error_logged:
-                    print("Warning: Detector not initialized")
-                    error_logged = True
-        
-        except Exception as e:
-            print(f"Unexpected error in detect_crowd_continuously: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Very short sleep for maximum performance
-        time.sleep(0.001)
+            return item
+        return run
+    
+    @detection_step
+    def preprocess(item):
+        item['model_tier'] = stream_model_tiers.get(stream)
+        item['roi'] = stream_rois.get(stream)
+        item['plan'] = detector.plan_frame(item['frame'], stream_id=stream)
+    
+    @detection_step
+    def infer(item):
+        if item['plan']['keyframe']:
+            run = stream_infer() or detector._infer_people
+            with detector.timings.bind(stream):
+                item['people'] = run(item['frame'], item['model_tier'], item['roi'] or detector.roi)
+    
+    @detection_step
+    def postprocess(item):
+        item['result'], item['records'] = detector.finish_frame(
+            item['frame'], item['plan'], item.get('people'), item['roi'], stream_id=stream)
+    
+    @detection_step
+    def persist(item):
+        nonlocal error_logged
+        detector.persist(item['records'], stream)
+        publish_incidents(item['records'])
+        _, people_count, _, risk_data = item['result']
+        update_detection_stats(stream, people_count, risk_data, item.get('captured'))
+        error_logged = False  # Reset error flag on success
+    
+    def encode(item):
+        global current_frame
+        processed_frame = item['result'][0] if 'result' in item else item['frame']
+        with frame_lock:
+            current_frame = processed_frame
+        broadcast = frame_broadcaster.publish(processed_frame)
+        if broadcast is not None:
+            # Boxes are drawn by the browser; the video itself stays encode-once
+            overlay_hub.publish_state('overlay', overlay_metadata(
+                broadcast.seq, processed_frame.shape, item.get('result'), stream))
+        return None
+    
+    return Pipeline(source, [
+        Stage('preprocess', preprocess, queue_size=Config.PIPELINE_QUEUE_SIZE, policy=policy),
+        Stage('infer', infer, workers=Config.PIPELINE_INFER_WORKERS,
+              queue_size=Config.PIPELINE_QUEUE_SIZE, policy='block'),
+        Stage('postprocess', postprocess, queue_size=Config.PIPELINE_QUEUE_SIZE, policy='block'),
+        Stage('persist', persist, queue_size=Config.PIPELINE_QUEUE_SIZE, policy='block'),
+        Stage('encode', encode, workers=Config.PIPELINE_ENCODE_WORKERS,
+              queue_size=Config.PIPELINE_QUEUE_SIZE, policy='block'),
+    ], name=stream)
+
+def run_stream_pipeline(stream, source, policy, keep_running):
+    """Run a stream's pipeline until its source ends or keep_running() turns false"""
+    pipeline = build_stream_pipeline(stream, source, policy)
+    stream_pipelines[stream] = pipeline
+    pipeline.start()
+    try:
+        while pipeline.is_running() and keep_running():
+            time.sleep(0.05)
+    finally:
+        pipeline.stop()
+        pipeline.join(timeout=2)
+        stream_pipelines.pop(stream, None)
+
+def detect_crowd_continuously():
+    """Continuously detect crowd in a separate thread"""
+    def camera_frames():
+        # Decode stage: always the newest frame; older ones are dropped by the reader
+        while not stop_detection:
+            reader = camera_reader
+            if reader is None:
+                time.sleep(0.005)  # Very short sleep for better responsiveness
+                continue
+            captured = reader.read(timeout=0.5)
+            if captured is not None:
+                yield {'frame': captured.frame, 'captured': captured}
+    
+    try:
+        run_stream_pipeline('camera', camera_frames(), Config.CAMERA_BACKPRESSURE,
+                            lambda: not stop_detection)
+    except Exception as e:
+        print(f"Unexpected error in detect_crowd_continuously: {e}")
+        import traceback
+        traceback.print_exc()
 
 def process_video_continuously():
     """Process uploaded video in a separate thread"""
-    global video_capture, current_frame, detection_stats, video_processing, detector
-    
-    frame_count = 0
-    start_time = time.time()
-    last_stats_update = time.time()
-    error_logged = False
+    global video_processing
     
     # Get video FPS for better timing
     fps = video_capture.get(cv2.CAP_PROP_FPS) if video_capture else 30
     frame_delay = 1.0 / fps if fps > 0 else 0.033  # Default to 30 FPS if unknown
     
-    while video_processing and video_capture is not None:
-        try:
+    def video_frames():
+        # Decode stage, paced to the video FPS for real-time playback
+        while video_processing and video_capture is not None:
             ret, frame = video_capture.read()
             if not ret:
                 # End of video
-                video_processing = False
                 break
-            
-            # ALWAYS store the raw frame as fallback
-            if frame is not None:
-                with frame_lock:
-                    current_frame = frame
-            
-            if detector is not None:
-                try:
-                    processed_frame, people_count, detections, risk_data = detector.detect_crowd(frame)
-                    error_logged = False  # Reset error flag on success
-                    
-                    # Update detection stats more frequently for real-time updates
-                    current_time = time.time()
-                    if current_time - last_stats_update >= 0.1:  # Update every 100ms for real-time feel
-                        # Update detection stats
-                        detection_stats['people_count'] = people_count
-                        
-                        # Update stampede risk data
-                        detection_stats['stampede_risk'] = risk_data
-                        
-                        # Calculate alert level based on people count and stampede risk
-                        risk_level = risk_data.get('level', 'LOW')
-                        if risk_level == 'HIGH':
-                            detection_stats['alert_level'] = 4  # Stampede Risk
-                        elif risk_level == 'MEDIUM':
-                            detection_stats['alert_level'] = 3  # High Risk
-                        elif people_count <= Config.ALERT_THRESHOLDS["CAUTION"]:
-                            detection_stats['alert_level'] = 0  # Normal
-                        elif people_count <= Config.ALERT_THRESHOLDS["WARNING"]:
-                            detection_stats['alert_level'] = 1  # Caution
-                        elif people_count <= Config.ALERT_THRESHOLDS["CRITICAL"]:
-                            detection_stats['alert_level'] = 2  # Warning
-                        else:
-                            detection_stats['alert_level'] = 3  # Critical
-                        
-                        # Calculate FPS more frequently for better accuracy
-                        frame_count += 1
-                        if frame_count % 10 == 0:  # Update FPS every 10 frames
-                            elapsed_time = time.time() - start_time
-                            if elapsed_time > 0:  # Avoid division by zero
-                                detection_stats['fps'] = round(frame_count / elapsed_time, 2)
-                            frame_count = 0
-                            start_time = time.time()
-                        
-                        last_stats_update = current_time
-                    
-                    # Store the processed frame
-                    with frame_lock:
-                        current_frame = processed_frame
-                        
-                except Exception as e:
-                    if not error_logged:
-                        print(f"Error in video processing: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        error_logged = True
-                    # Frame is already stored as fallback above
-            else:
-                # Detector not initialized - frame already stored as fallback
-                if not error_logged:
-                    print("Warning: Detector not initialized in video processing")
-                    error_logged = True
-        
-        except Exception as e:
-            print(f"Unexpected error in process_video_continuously: {e}")
-            import traceback
-            traceback.print_exc()
-            video_processing = False
-            break
-        
-        # Sleep to match video FPS for accurate real-time processing
-        time.sleep(frame_delay)
+            yield {'frame': frame}
+            time.sleep(frame_delay)
+    
+    try:
+        run_stream_pipeline('video', video_frames(), Config.VIDEO_BACKPRESSURE,
+                            lambda: video_processing)
+    except Exception as e:
+        print(f"Unexpected error in process_video_continuously: {e}")
+        import traceback
+        traceback.print_exc()
+    video_processing = False
 
 @app.route('/')
 def index():
@@ -244,7 +436,7 @@ def index():
 @app.route('/start_camera')
 def start_camera():
     """Start camera feed"""
-    global camera, detection_thread, stop_detection
+    global camera, camera_reader, detection_thread, stop_detection
     
     with camera_lock:
         if camera is not None and camera.isOpened():
@@ -255,6 +447,14 @@ def start_camera():
         if not camera.isOpened():
             return jsonify({'status': 'error', 'message': 'Failed to open camera'})
     
+    # Capture runs on its own thread so detection always gets the newest frame
+    camera_reader = LatestFrameCapture(camera, camera_lock)
+    camera_reader.start()
+    
+    # Fresh movement and risk state for the new camera session
+    if detector is not None:
+        detector.remove_stream('camera')
+    
     # Start detection thread
     stop_detection = False
     detection_thread = threading.Thread(target=detect_crowd_continuously)
@@ -266,10 +466,14 @@ def start_camera():
 @app.route('/stop_camera')
 def stop_camera():
     """Stop camera feed"""
-    global camera, stop_detection
+    global camera, camera_reader, stop_detection
     
     stop_detection = True
     
+    if camera_reader is not None:
+        camera_reader.stop()
+        camera_reader = None
+    
     with camera_lock:
         if camera is not None:
             camera.release()
@@ -277,6 +481,14 @@ def stop_camera():
     
     return jsonify({'status': 'success', 'message': 'Camera stopped'})
 
+def remove_replaced_videos():
+    """Delete the directories of replaced uploads that no queued or running job reads"""
+    with replaced_videos_lock:
+        for path in list(replaced_videos):
+            if not analysis_jobs.uses_video(path):
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+                replaced_videos.remove(path)
+
 @app.route('/upload_video', methods=['POST'])
 def upload_video():
     """Handle video upload"""
@@ -291,10 +503,15 @@ def upload_video():
             return jsonify({'status': 'error', 'message': 'No video file selected'})
         
         if file:
-            # Save video to temporary file
-            temp_dir = tempfile.gettempdir()
-            video_filename = os.path.join(temp_dir, file.filename or 'uploaded_video.mp4')
-            file.save(video_filename)
+            # Save video to its own temporary directory so queued jobs keep their file
+            temp_dir = tempfile.mkdtemp(prefix='crowd_upload_')
+            path = os.path.join(temp_dir, secure_filename(file.filename) or 'uploaded_video.mp4')
+            file.save(path)
+            with replaced_videos_lock:
+                if video_filename is not None:
+                    replaced_videos.append(video_filename)
+                video_filename = path
+            remove_replaced_videos()
             return jsonify({'status': 'success', 'message': 'Video uploaded successfully', 'filename': file.filename})
         else:
             # This case should not happen, but return an error just in case
@@ -316,6 +533,10 @@ def process_video():
         if not video_capture.isOpened():
             return jsonify({'status': 'error', 'message': 'Failed to open video file'})
         
+        # Fresh movement and risk state for the new video
+        if detector is not None:
+            detector.remove_stream('video')
+        
         # Start video processing thread
         video_processing = True
         video_thread = threading.Thread(target=process_video_continuously)
@@ -339,55 +560,316 @@ def stop_video():
     
     return jsonify({'status': 'success', 'message': 'Video processing stopped'})
 
+def job_params(params):
+    """Priority and analysis parameters of a job submission"""
+    priority = int(params.get('priority', 0))
+    analysis = {key: int(params[key]) for key in ('sample_every', 'segments') if key in params}
+    if analysis.get('sample_every', 1) < 1:
+        raise ValueError("sample_every must be at least 1")
+    return priority, analysis
+
+@app.route('/analyze_video', methods=['POST'])
+def analyze_video():
+    """Queue an analysis job for the uploaded video
+    
+    Optional JSON or form fields: priority (higher runs first), sample_every
+    and segments.
+    """
+    if video_filename is None:
+        return jsonify({'status': 'error', 'message': 'No video uploaded'})
+    
+    try:
+        priority, params = job_params(request.get_json(silent=True) or request.form)
+        job = analysis_jobs.submit(video_filename, priority=priority, **params)
+        return jsonify({'status': 'success', 'message': 'Video analysis queued',
+                        'data': analysis_jobs.get_status(job.id)})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Upload a video and queue an analysis job for it
+    
+    Form fields: video (the file), optional priority, sample_every and segments.
+    """
+    if 'video' not in request.files or request.files['video'].filename == '':
+        return jsonify({'status': 'error', 'message': 'No video file provided'})
+    
+    try:
+        priority, params = job_params(request.form)
+        file = request.files['video']
+        path = analysis_jobs.upload_path(secure_filename(file.filename))
+        file.save(path)
+        job = analysis_jobs.submit(path, name=file.filename, priority=priority, owns_video=True, **params)
+        return jsonify({'status': 'success', 'message': 'Video analysis queued',
+                        'data': analysis_jobs.get_status(job.id)})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/jobs')
+def list_jobs():
+    """All analysis jobs, newest first, with queue and result cache statistics"""
+    return jsonify({'status': 'success', 'data': {
+        'jobs': analysis_jobs.list(),
+        'stats': analysis_jobs.get_stats(),
+        'cache': analysis_cache.get_stats() if analysis_cache is not None else None,
+    }})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """State, queue position and progress (frames, percent, speed, ETA) of an analysis job"""
+    status = analysis_jobs.get_status(job_id)
+    if status is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job'})
+    
+    return jsonify({'status': 'success', 'data': status})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running analysis job"""
+    if analysis_jobs.cancel(job_id) is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job'})
+    
+    return jsonify({'status': 'success', 'message': 'Video analysis cancelled', 'data': analysis_jobs.get_status(job_id)})
+
+@app.route('/jobs/<job_id>/results')
+def job_results(job_id):
+    """Download the per-frame results (JSON lines) of a completed analysis job"""
+    job = analysis_jobs.get(job_id)
+    if job is None or job.state != 'completed' or not os.path.exists(job.output_path):
+        return jsonify({'status': 'error', 'message': 'No analysis results available'})
+    
+    name = os.path.splitext(job.name)[0] + '_analysis.jsonl'
+    return send_file(job.output_path, mimetype='application/x-ndjson', as_attachment=True, download_name=name)
+
+def start_upload_job(upload):
+    """Queue the analysis requested with an upload once it can start
+    
+    Streamable containers start after UPLOAD_ANALYZE_AFTER_BYTES, others
+    when the upload completes.
+    """
+    with upload_jobs_lock:
+        if not upload.params.get('analyze') or upload.job_id is not None:
+            return
+        if not upload.is_complete() and not (is_streamable(upload.filename) and
+                                             upload.received >= Config.UPLOAD_ANALYZE_AFTER_BYTES):
+            return
+        job = analysis_jobs.submit(upload.path, name=upload.filename, priority=upload.params['priority'],
+                                   owns_video=True, upload_id=upload.id, **upload.params['analysis'])
+        upload.job_id = job.id
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked, resumable upload
+    
+    JSON fields: filename, optional size (bytes, checked against the limit)
+    and analyze (queue an analysis job, with optional priority, sample_every
+    and segments). Chunks are then sent with PUT /uploads/<id>?offset=N.
+    """
+    params = request.get_json(silent=True) or {}
+    if not params.get('filename'):
+        return jsonify({'status': 'error', 'message': 'No filename provided'})
+    
+    try:
+        priority, analysis = job_params(params)
+        size = int(params['size']) if params.get('size') is not None else None
+        upload = uploads.create(secure_filename(params['filename']) or 'video', size,
+                                {'analyze': bool(params.get('analyze')), 'priority': priority, 'analysis': analysis})
+        data = dict(upload.to_dict(), max_bytes=uploads.max_bytes, chunk_size=uploads.chunk_size)
+        return jsonify({'status': 'success', 'message': 'Upload created', 'data': data})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Append the request body to an upload at the offset query parameter
+    
+    The offset must equal the bytes received so far; after an interrupted
+    request, GET /uploads/<id> tells where to resume.
+    """
+    upload = uploads.get(upload_id)
+    if upload is None:
+        return jsonify({'status': 'error', 'message': 'Unknown upload'})
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'status': 'error', 'message': 'No offset provided'})
+    if request.content_length is not None and offset + request.content_length > uploads.max_bytes:
+        return jsonify({'status': 'error', 'message': f'Upload exceeds the limit of {uploads.max_bytes} bytes'})
+    
+    try:
+        # Read from the WSGI stream so the body is never buffered whole
+        uploads.append(upload_id, offset, request.stream)
+        start_upload_job(upload)
+        return jsonify({'status': 'success', 'data': upload.to_dict()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e), 'data': upload.to_dict()})
+
+@app.route('/uploads/<upload_id>')
+def upload_status(upload_id):
+    """Bytes received, completion and analysis job of an upload"""
+    upload = uploads.get(upload_id)
+    if upload is None:
+        return jsonify({'status': 'error', 'message': 'Unknown upload'})
+    
+    return jsonify({'status': 'success', 'data': upload.to_dict()})
+
+@app.route('/uploads/<upload_id>/analyze', methods=['POST'])
+def analyze_upload(upload_id):
+    """Queue an analysis job for an upload created without analyze
+    
+    Optional JSON fields: priority, sample_every and segments. The job
+    starts like one requested with the upload: now if the upload is
+    complete or far enough along, otherwise as more data arrives.
+    """
+    upload = uploads.get(upload_id)
+    if upload is None:
+        return jsonify({'status': 'error', 'message': 'Unknown upload'})
+    
+    try:
+        priority, analysis = job_params(request.get_json(silent=True) or {})
+        with upload_jobs_lock:
+            if upload.job_id is not None:
+                return jsonify({'status': 'error', 'message': 'Upload is already being analysed'})
+            upload.params.update(analyze=True, priority=priority, analysis=analysis)
+        start_upload_job(upload)
+        return jsonify({'status': 'success', 'message': 'Upload analysis requested', 'data': upload.to_dict()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """Mark an upload as fully sent; queues its analysis if it has not started yet"""
+    try:
+        upload = uploads.complete(upload_id)
+        if upload is None:
+            return jsonify({'status': 'error', 'message': 'Unknown upload'})
+        start_upload_job(upload)
+        return jsonify({'status': 'success', 'message': 'Upload complete', 'data': upload.to_dict()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
 @app.route('/video_feed')
 def video_feed():
-    """Video streaming route"""
+    """Video streaming route
+    
+    Optional query parameters: w (maximum width in pixels), q (JPEG
+    quality) and fps (maximum frames per second for this client).
+    """
+    width = request.args.get('w', type=int)
+    quality = request.args.get('q', type=int)
+    max_fps = request.args.get('fps', type=float)
+    if (width is not None and width <= 0) or (quality is not None and not 0 < quality <= 100) \
+            or (max_fps is not None and max_fps <= 0):
+        return jsonify({'status': 'error', 'message': 'Invalid w, q or fps parameter'})
+    
     def generate_frames():
-        global current_frame
-        last_good_frame = None
-        frame_skip_count = 0
-        
-        while True:
-            try:
-                with frame_lock:
-                    frame_to_send = current_frame
-                
-                # Use last good frame as fallback if current is None
-                if frame_to_send is None:
-                    if last_good_frame is None:
-                        # Create a placeholder frame if we have nothing to show
-                        placeholder = np.zeros((480, 640, 3), dtype=np.uint8)
-                        cv2.putText(placeholder, "Waiting for camera feed...", (50, 240), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                        frame_to_send = placeholder
-                    else:
-                        frame_to_send = last_good_frame
-                else:
-                    last_good_frame = frame_to_send
-                
-                # Encode frame as JPEG with quality setting for better performance
-                ret, buffer = cv2.imencode('.jpg', frame_to_send, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n'
-                           b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n\r\n' + 
-                           frame_bytes + b'\r\n')
-                else:
-                    print("Failed to encode frame as JPEG")
-            except Exception as e:
-                print(f"Error in generate_frames: {e}")
-                import traceback
-                traceback.print_exc()
-            
-            time.sleep(0.01)  # Short sleep for streaming FPS
+        # Clients share the broadcaster's JPEG (or cached variant) of each frame
+        for broadcast in frame_broadcaster.frames(max_fps=max_fps):
+            frame_bytes = frame_broadcaster.variant(broadcast, width, quality)
+            if frame_bytes is None:
+                continue
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n'
+                   b'X-Frame-Seq: ' + str(broadcast.seq).encode() + b'\r\n'
+                   b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n\r\n' + 
+                   frame_bytes + b'\r\n')
     
     return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/stats')
 def get_stats():
-    """Get current detection statistics"""
-    return jsonify(detection_stats)
+    """Get current detection statistics
+    
+    Serves the pre-serialized snapshot; a poll whose If-None-Match holds
+    the current ETag gets an empty 304 response.
+    """
+    snapshot = stats_publisher.current()
+    if snapshot.etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(snapshot.json, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/timings')
+def get_timings():
+    """Per-stream p50/p95/p99 latency of each detect_crowd stage (optional query parameter stream)"""
+    if detector is None:
+        return jsonify({'status': 'error', 'message': 'Detector not initialized'})
+    
+    timings = detector.timings
+    return jsonify({'status': 'success', 'data': {
+        'enabled': timings.enabled,
+        'window': timings.window,
+        'streams': timings.get_stats(request.args.get('stream')),
+    }})
+
+@app.route('/timings', methods=['POST'])
+def set_timings():
+    """Switch stage timing on or off ({"enabled": true}) and/or clear the samples ({"reset": true})"""
+    if detector is None:
+        return jsonify({'status': 'error', 'message': 'Detector not initialized'})
+    
+    params = request.get_json(silent=True) or {}
+    if 'enabled' in params:
+        detector.timings.enabled = bool(params['enabled'])
+    if params.get('reset'):
+        detector.timings.reset()
+    return jsonify({'status': 'success', 'message': f"Stage timing {'enabled' if detector.timings.enabled else 'disabled'}"})
+
+@app.route('/events')
+def events():
+    """Server-Sent Events: 'stats' deltas when the statistics change and 'incident' for each new stampede incident"""
+    def generate_events():
+        for updates in event_hub.subscribe(heartbeat=Config.EVENTS_HEARTBEAT):
+            yield format_sse(updates)
+    
+    return Response(generate_events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/overlay')
+def overlay():
+    """Server-Sent Events: 'overlay' metadata (boxes, faces, risk) of each broadcast frame, keyed by its sequence number"""
+    def generate_overlay():
+        for updates in overlay_hub.subscribe(heartbeat=Config.EVENTS_HEARTBEAT):
+            yield format_sse(updates)
+    
+    return Response(generate_overlay(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/model_tiers')
+def get_model_tiers():
+    """Get available model tiers and the tier used by each stream"""
+    if detector is None:
+        return jsonify({'status': 'error', 'message': 'Detector not initialized'})
+    
+    return jsonify({
+        'status': 'success',
+        'tiers': detector.model_tiers.names(),
+        'default': detector.model_tier,
+        'streams': stream_model_tiers
+    })
+
+@app.route('/model_tier', methods=['POST'])
+def set_model_tier():
+    """Switch the model tier of a stream at runtime"""
+    if detector is None:
+        return jsonify({'status': 'error', 'message': 'Detector not initialized'})
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        stream = data.get('stream')
+        tier = data.get('tier')
+        if stream not in stream_model_tiers:
+            return jsonify({'status': 'error', 'message': f'Unknown stream: {stream}'})
+        
+        # Load before switching so a missing model never breaks the stream
+        detector.load_model_tier(tier)
+        stream_model_tiers[stream] = tier
+        return jsonify({'status': 'success', 'message': f'{stream} now uses model tier {tier}'})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
 
 @app.route('/history')
 def get_history():
@@ -421,6 +903,7 @@ def reset_database():
     
     try:
         detector.reset_database()
+        event_hub.publish_event('incidents_reset', {})
         return jsonify({'status': 'success', 'message': 'Database reset'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark the inference backends on the same frames
+"""
+
+import sys
+import os
+import time
+import argparse
+import cv2
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from core.backends import BACKENDS, create_backend_from_config
+
+TEST_FRAMES = ["test_frame.jpg", "base_frame.jpg", "moving_frame.jpg", "processed_frame.jpg"]
+
+def load_frames():
+    """Load the repository's test frames, already resized like detect_crowd does"""
+    frames = []
+    for name in TEST_FRAMES:
+        frame = cv2.imread(os.path.join(Config.BASE_DIR, name))
+        if frame is not None:
+            frames.append(cv2.resize(frame, (640, 480)))
+    return frames
+
+def benchmark_backend(backend, frames, iterations, warmup=3):
+    """Return mean milliseconds per forward pass"""
+    blobs = [cv2.dnn.blobFromImage(frame, 1 / 255.0, (416, 416), swapRB=True, crop=False)
+             for frame in frames]
+    for i in range(warmup):
+        backend.forward(blobs[i % len(blobs)])
+
+    start_time = time.perf_counter()
+    for i in range(iterations):
+        backend.forward(blobs[i % len(blobs)])
+    return (time.perf_counter() - start_time) * 1000 / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS),
+                        help="backends to compare (default: all)")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    print("=== Inference Backend Benchmark ===")
+    frames = load_frames()
+    if not frames:
+        print("✗ No test frames found")
+        return False
+    print(f"Frames: {len(frames)}, iterations: {args.iterations}")
+
+    results = {}
+    for name in args.backends:
+        try:
+            backend = create_backend_from_config(Config, name=name)
+        except Exception as e:
+            print(f"\n{name}: skipped ({e})")
+            continue
+        ms = benchmark_backend(backend, frames, args.iterations)
+        results[name] = ms
+        print(f"\n{backend.describe()}")
+        print(f"   {ms:8.2f} ms/frame  ({1000 / ms:6.2f} FPS)")
+
+    if results:
+        fastest = min(results, key=results.get)
+        print(f"\nFastest backend: {fastest}")
+    return bool(results)
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched multi-stream inference against one forward pass per frame
+"""
+
+import sys
+import os
+import time
+import argparse
+import threading
+import cv2
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from core.backends import create_model_tiers_from_config
+from core.batching import InferenceBatcher
+from core.detection import CrowdDetector
+
+def run_streams(detector, frame, streams, frames_per_stream, infer=None):
+    """Run detect_crowd from one thread per stream and return total frames per second"""
+    def run(stream):
+        stream_infer = None
+        if infer is not None:
+            stream_infer = lambda f, tier, roi: infer(f, tier, roi, stream_id=stream)
+        for _ in range(frames_per_stream):
+            detector.detect_crowd(frame, infer=stream_infer, stream_id=stream)
+
+    threads = [threading.Thread(target=run, args=(f"stream-{i}",)) for i in range(streams)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return streams * frames_per_stream / (time.perf_counter() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched multi-stream inference")
+    parser.add_argument("--tier", default=Config.DEFAULT_MODEL_TIER)
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--max-wait", type=float, default=Config.BATCH_MAX_WAIT)
+    parser.add_argument("--iterations", type=int, default=10, help="Frames per stream")
+    args = parser.parse_args()
+
+    print("=== Batched Inference Benchmark ===")
+    frame = cv2.imread(os.path.join(Config.BASE_DIR, "test_frame.jpg"))
+    if frame is None:
+        print("✗ test_frame.jpg not found")
+        return False
+
+    detector = CrowdDetector(':memory:', model_tiers=create_model_tiers_from_config(Config, default_tier=args.tier))
+    try:
+        # Warm up
+        detector.detect_crowd(frame)
+
+        # Unbatched streams take turns on the shared network
+        def single_infer(f, tier, roi, stream_id=None):
+            return detector._infer_people(f, tier, roi)
+
+        print(f"Streams: {args.streams}, tier: {args.tier}, frames per stream: {args.iterations}")
+        print(f"\n{'mode':>12} {'FPS':>8} {'mean batch':>11}")
+        fps = run_streams(detector, frame, args.streams, args.iterations, single_infer)
+        print(f"{'per frame':>12} {fps:>8.2f} {1.0:>11.2f}")
+
+        for batch_size in args.batch_sizes:
+            batcher = InferenceBatcher(detector.infer_people_batch, max_batch_size=batch_size,
+                                       max_wait=args.max_wait)
+            batcher.start()
+            try:
+                fps = run_streams(detector, frame, args.streams, args.iterations, batcher.infer)
+            finally:
+                batcher.stop()
+            print(f"{'batch ' + str(batch_size):>12} {fps:>8.2f} {batcher.get_stats()['mean_batch']:>11.2f}")
+    finally:
+        detector.close()
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark /video_feed streaming: CPU cost per client with per-client encoding
+against the encode-once frame broadcaster, with and without mixed
+resolution/quality variants
+"""
+
+import sys
+import os
+import time
+import argparse
+import threading
+import cv2
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from core.broadcast import FrameBroadcaster, encode_jpeg
+
+def per_client_encoding(frames, clients, stop):
+    """The previous generate_frames: every client encodes the current frame every 10 ms"""
+    def client():
+        while not stop.is_set():
+            encode_jpeg(frames['current'])
+            time.sleep(0.01)
+    return [threading.Thread(target=client) for _ in range(clients)]
+
+# (width, quality) of the clients in variants mode: wall display, tablet, VPN preview
+VARIANTS = [(None, None), (640, 70), (320, 50)]
+
+def broadcast_clients(broadcaster, clients, stop, variants):
+    """Clients sharing the broadcaster's JPEG (or cached variant) of each frame"""
+    def client(width, quality):
+        for broadcast in broadcaster.frames(idle_timeout=0.1):
+            if stop.is_set():
+                break
+            broadcaster.variant(broadcast, width, quality)
+    return [threading.Thread(target=client, args=variants[index % len(variants)]) for index in range(clients)]
+
+def run(mode, frame, clients, fps, duration):
+    """Publish frames at fps for duration seconds and return CPU seconds used"""
+    stop = threading.Event()
+    frames = {'current': frame}
+    broadcaster = FrameBroadcaster()
+    if mode == 'broadcast':
+        threads = broadcast_clients(broadcaster, clients, stop, VARIANTS[:1])
+    elif mode == 'variants':
+        threads = broadcast_clients(broadcaster, clients, stop, VARIANTS)
+    else:
+        threads = per_client_encoding(frames, clients, stop)
+
+    start_cpu = time.process_time()
+    for thread in threads:
+        thread.start()
+    published = 0
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        current = frame.copy()
+        frames['current'] = current
+        if mode != 'per-client':
+            broadcaster.publish(current)
+        published += 1
+        time.sleep(1.0 / fps)
+    stop.set()
+    broadcaster.publish(frame)  # Wake the waiting clients so they see stop
+    for thread in threads:
+        thread.join()
+    return time.process_time() - start_cpu, published
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MJPEG streaming to many clients")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--fps", type=float, default=15, help="Processed frames per second")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per run")
+    args = parser.parse_args()
+
+    print("=== MJPEG Broadcast Benchmark ===")
+    frame = cv2.imread(os.path.join(Config.BASE_DIR, "test_frame.jpg"))
+    if frame is None:
+        print("✗ test_frame.jpg not found")
+        return False
+
+    print(f"Frame: {frame.shape[1]}x{frame.shape[0]}, {args.fps} processed FPS, {args.duration}s per run")
+    print(f"\n{'mode':>12} {'clients':>8} {'CPU s':>8} {'CPU ms/frame':>13} {'ms/frame/client':>16}")
+    for mode in ('per-client', 'broadcast', 'variants'):
+        for clients in args.clients:
+            cpu, published = run(mode, frame, clients, args.fps, args.duration)
+            per_frame = cpu * 1000 / published
+            print(f"{mode:>12} {clients:>8} {cpu:>8.2f} {per_frame:>13.2f} {per_frame / clients:>16.3f}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark tiled inference throughput against the number of tiles
+"""
+
+import sys
+import os
+import time
+import argparse
+import cv2
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from core.backends import create_model_tiers_from_config
+from core.detection import CrowdDetector
+from core.tiling import make_tiles
+
+def run_config(model_tiers, frame, tile_size, args, execution):
+    """Return (tiles per frame, mean ms per frame) for one tiling setup"""
+    detector = CrowdDetector(':memory:', model_tiers=model_tiers, tile_size=tile_size,
+                             tile_overlap=args.overlap, tile_execution=execution,
+                             tile_workers=args.workers)
+    try:
+        # Warm up (also loads per-thread networks in thread mode)
+        detector.detect_crowd(frame)
+        start_time = time.perf_counter()
+        for _ in range(args.iterations):
+            detector.detect_crowd(frame)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000 / args.iterations
+    finally:
+        detector.close()
+
+    height, width = frame.shape[:2]
+    tiles = len(make_tiles(width, height, tile_size, args.overlap)) if tile_size else 1
+    if tile_size and tiles > 1:
+        tiles += 1  # Full frame pass
+    return tiles, elapsed_ms
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tiled inference")
+    parser.add_argument("--tier", default=Config.DEFAULT_MODEL_TIER)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--tile-sizes", type=int, nargs="+", default=[1280, 960, 640, 480])
+    parser.add_argument("--overlap", type=int, default=Config.TILE_OVERLAP)
+    parser.add_argument("--workers", type=int, default=Config.TILE_WORKERS)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=== Tiled Inference Benchmark ===")
+    frame = cv2.imread(os.path.join(Config.BASE_DIR, "test_frame.jpg"))
+    if frame is None:
+        print("✗ test_frame.jpg not found")
+        return False
+    frame = cv2.resize(frame, (args.width, args.height))
+    model_tiers = create_model_tiers_from_config(Config, default_tier=args.tier)
+
+    print(f"Frame: {args.width}x{args.height}, tier: {args.tier}, overlap: {args.overlap}px")
+    tiles, ms = run_config(model_tiers, frame, None, args, 'batch')
+    print(f"\nUntiled: {ms:8.1f} ms/frame ({1000 / ms:5.2f} FPS)")
+
+    for execution in ('batch', 'threads'):
+        print(f"\nExecution: {execution}")
+        print(f"{'tile size':>10} {'tiles':>6} {'ms/frame':>10} {'FPS':>7} {'tiles/s':>8}")
+        for tile_size in args.tile_sizes:
+            tiles, ms = run_config(model_tiers, frame, tile_size, args, execution)
+            print(f"{tile_size:>10} {tiles:>6} {ms:>10.1f} {1000 / ms:>7.2f} {tiles * 1000 / ms:>8.1f}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark process-pool inference: frames per second against worker count
+"""
+
+import sys
+import os
+import time
+import argparse
+import threading
+from functools import partial
+import cv2
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from core.engine import create_engine_from_config
+from core.workers import InferenceWorkerPool
+
+def run_streams(infer, frame, streams, frames_per_stream):
+    """Call infer from one thread per stream and return total frames per second"""
+    def run():
+        for _ in range(frames_per_stream):
+            infer(frame)
+
+    threads = [threading.Thread(target=run) for _ in range(streams)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return streams * frames_per_stream / (time.perf_counter() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process-pool inference workers")
+    parser.add_argument("--tier", default=Config.DEFAULT_MODEL_TIER)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--cv-threads", type=int, default=Config.WORKER_CV_THREADS)
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=10, help="Frames per stream")
+    args = parser.parse_args()
+
+    print("=== Inference Worker Benchmark ===")
+    frame = cv2.imread(os.path.join(Config.BASE_DIR, "test_frame.jpg"))
+    if frame is None:
+        print("✗ test_frame.jpg not found")
+        return False
+    engine_factory = partial(create_engine_from_config, Config, args.tier)
+
+    print(f"Streams: {args.streams}, tier: {args.tier}, frames per stream: {args.iterations}, "
+          f"OpenCV threads per worker: {args.cv_threads}")
+    print(f"\n{'mode':>12} {'FPS':>8} {'FPS/worker':>11}")
+
+    # Baseline: stream threads sharing one engine in this process
+    engine = engine_factory()
+    engine.infer_people(frame)
+    fps = run_streams(engine.infer_people, frame, args.streams, args.iterations)
+    print(f"{'threads':>12} {fps:>8.2f} {'-':>11}")
+    engine.close()
+
+    for workers in args.workers:
+        pool = InferenceWorkerPool(engine_factory, workers=workers, cv_threads=args.cv_threads,
+                                   max_frame_bytes=frame.nbytes)
+        pool.start()
+        try:
+            # Warm up every worker
+            run_streams(pool.infer, frame, workers, 1)
+            fps = run_streams(pool.infer, frame, args.streams, args.iterations)
+        finally:
+            pool.stop()
+        print(f"{str(workers) + ' workers':>12} {fps:>8.2f} {fps / workers:>11.2f}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
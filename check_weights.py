@@ -1,23 +1,30 @@
 #!/usr/bin/env python3
 """
-Utility script to check if YOLOv3 weights are downloaded
+Utility script to check if the YOLO weights for the model tiers are downloaded
 """
 
 import os
 import sys
 
-def check_yolo_weights():
-    """Check if YOLOv3 weights file exists"""
-    filename = "yolov3.weights"
-    
+from config import Config
+
+# Smallest plausible size of each known weights file in MB
+MIN_SIZES_MB = {
+    "yolov3.weights": 200,
+    "yolov3-tiny.weights": 30,
+}
+
+def check_weights_file(filename):
+    """Check that a weights file exists and has a plausible size"""
     if os.path.exists(filename):
         # Check file size
         file_size = os.path.getsize(filename)
         print(f"✓ {filename} found")
         print(f"  File size: {file_size / (1024*1024):.2f} MB")
         
-        # Check if file size is reasonable (should be around 237MB)
-        if file_size > 200 * 1024 * 1024:  # 200MB
+        # Check if file size is reasonable
+        min_size_mb = MIN_SIZES_MB.get(filename, 0)
+        if file_size > min_size_mb * 1024 * 1024:
             print("  Status: File size looks correct")
             return True
         else:
@@ -25,12 +32,34 @@ def check_yolo_weights():
             return False
     else:
         print(f"✗ {filename} not found")
-        print("  Please download from: https://pjreddie.com/media/files/yolov3.weights")
+        print(f"  Please download from: https://pjreddie.com/media/files/{filename}")
         return False
 
+def check_yolo_weights():
+    """Check the weights of every configured model tier.
+
+    Only the default tier is required; other tiers are reported so they can
+    be downloaded when a stream needs them.
+    """
+    required = Config.MODEL_TIERS[Config.DEFAULT_MODEL_TIER]["weights"]
+    weight_files = sorted({tier["weights"] for tier in Config.MODEL_TIERS.values() if "weights" in tier})
+    
+    success = True
+    for filename in weight_files:
+        tiers = [name for name, tier in Config.MODEL_TIERS.items() if tier.get("weights") == filename]
+        print(f"\nModel tiers: {', '.join(tiers)}")
+        found = check_weights_file(filename)
+        if filename == required:
+            success = success and found
+        elif not found:
+            print("  (optional - only needed by streams using these tiers)")
+    return success
+
 if __name__ == "__main__":
     success = check_yolo_weights()
     if not success:
         print("\nTo download the weights, run:")
         print("  python download_weights.py")
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    print("\nTo download the weights of every tier, run:")
+    print("  python download_weights.py all")
+    sys.exit(0 if success else 1)
@@ -1,6 +1,7 @@
 # Configuration file for Crowd Management System
 
 import os
+import tempfile
 
 class Config:
     # Camera settings
@@ -15,9 +16,162 @@ class Config:
     COCO_NAMES_FILE = "coco.names"
     FACE_CASCADE_FILE = "haarcascade_frontalface_default.xml"
 
+    # Inference backend: "opencv" (cv2.dnn), "onnxruntime" or "openvino"
+    INFERENCE_BACKEND = "opencv"
+    OPENCV_DNN_BACKEND = "default"   # "default", "opencv" or "inference_engine"
+    OPENCV_DNN_TARGET = "cpu"        # "cpu", "opencl" or "opencl_fp16"
+    INFERENCE_THREADS = 0            # 0 lets the runtime choose
+    ONNX_MODEL_FILE = "yolov3.onnx"
+    OPENVINO_MODEL_FILE = "yolov3.xml"
+
+    # Model tiers that can be loaded side by side. Tiers sharing model files
+    # share one loaded network. Each tier names its model files for every
+    # backend it runs on ("cfg"/"weights", "onnx", "openvino"); loading a tier
+    # without files for INFERENCE_BACKEND fails
+    MODEL_TIERS = {
+        "full-608": {"cfg": "yolov3.cfg", "weights": "yolov3.weights", "onnx": "yolov3.onnx",
+                     "openvino": "yolov3.xml", "input_size": 608},
+        "full-416": {"cfg": "yolov3.cfg", "weights": "yolov3.weights", "onnx": "yolov3.onnx",
+                     "openvino": "yolov3.xml", "input_size": 416},
+        "full-320": {"cfg": "yolov3.cfg", "weights": "yolov3.weights", "onnx": "yolov3.onnx",
+                     "openvino": "yolov3.xml", "input_size": 320},
+        "tiny": {"cfg": "yolov3-tiny.cfg", "weights": "yolov3-tiny.weights", "onnx": "yolov3-tiny.onnx",
+                 "openvino": "yolov3-tiny.xml", "input_size": 416},
+    }
+    DEFAULT_MODEL_TIER = "full-416"
+    # Tier per stream; streams not listed use DEFAULT_MODEL_TIER
+    STREAM_MODEL_TIERS = {
+        "camera": "full-416",
+        "video": "full-416",
+    }
+
     # Detection thresholds
     CONFIDENCE_THRESHOLD = 0.6
     NMS_THRESHOLD = 0.3
+    PERSON_ONLY_NMS = True  # Drop non-person candidates before a single NMS pass
+
+    # Keyframe mode: run the DNN every N frames and track people in between
+    # (1 runs the DNN on every frame). A keyframe is also forced when the mean
+    # pixel change since the last keyframe exceeds the motion threshold (0-255)
+    KEYFRAME_INTERVAL = 1
+    KEYFRAME_MOTION_THRESHOLD = 8.0
+
+    # Motion gate: skip the DNN and reuse the last result while the mean pixel
+    # change (0-255) since the last DNN run stays below the threshold
+    # (None disables the gate). The result is refreshed at least every
+    # MOTION_GATE_MAX_SKIP frames
+    MOTION_GATE_THRESHOLD = None
+    MOTION_GATE_MAX_SKIP = 150
+
+    # Tiled inference for high resolution cameras: overlapping TILE_SIZE pixel
+    # crops of the full frame (None disables tiling), run as one batch
+    # ("batch") or on TILE_WORKERS threads ("threads"), merged with a global NMS
+    TILE_SIZE = None
+    TILE_OVERLAP = 96
+    TILE_EXECUTION = "batch"
+    TILE_WORKERS = 4
+    TILE_FULL_FRAME = True  # Also run the whole frame to catch people larger than a tile
+
+    # Regions of interest per stream: polygons of (x, y) points in normalised
+    # [0, 1] frame coordinates covering where people can stand. Inference is
+    # cropped to them and density uses their area; streams not listed use the
+    # whole frame. Example: {"camera": [[(0, 0.4), (1, 0.4), (1, 1), (0, 1)]]}
+    STREAM_ROIS = {}
+
+    # Batched multi-stream inference: frames of all streams that need a DNN
+    # pass are gathered (up to BATCH_MAX_SIZE frames, waiting at most
+    # BATCH_MAX_WAIT seconds) and run as one cv2.dnn.blobFromImages batch
+    INFERENCE_BATCHING = False
+    BATCH_MAX_SIZE = 4
+    BATCH_MAX_WAIT = 0.02
+
+    # Process-pool inference: INFERENCE_WORKERS processes (0 runs inference in
+    # the stream threads) each load the model once and run OpenCV on
+    # WORKER_CV_THREADS threads; frames up to WORKER_MAX_FRAME_BYTES are passed
+    # through shared memory (larger ones run in-process) and fail if a worker
+    # takes longer than WORKER_TASK_TIMEOUT seconds. Takes precedence over
+    # INFERENCE_BATCHING
+    INFERENCE_WORKERS = 0
+    WORKER_CV_THREADS = 1
+    WORKER_MAX_FRAME_BYTES = 1920 * 1080 * 3
+    WORKER_TASK_TIMEOUT = 30
+
+    # Stream pipelines (decode -> preprocess -> infer -> postprocess -> persist
+    # -> encode): queue size between stages, worker threads of the infer and
+    # encode stages (several infer workers only run in parallel with inference
+    # workers or batching) and the policy when the preprocess queue is full:
+    # "drop_oldest" keeps live cameras current, "block" analyses every video
+    # frame. Later queues always block, so planned frames are never lost
+    PIPELINE_QUEUE_SIZE = 2
+    PIPELINE_INFER_WORKERS = 1
+    PIPELINE_ENCODE_WORKERS = 1
+    CAMERA_BACKPRESSURE = "drop_oldest"
+    VIDEO_BACKPRESSURE = "block"
+
+    # JPEG quality of /video_feed; each frame is encoded once for all viewers
+    STREAM_JPEG_QUALITY = 85
+
+    # Dashboard push channel (/events): maximum messages per second per
+    # client (faster updates are merged) and keep-alive interval in seconds
+    EVENTS_MAX_RATE = 5
+    EVENTS_HEARTBEAT = 15
+
+    # Overlay metadata channel (/overlay): maximum messages per second per
+    # client; the dashboard draws the boxes over /video_feed
+    OVERLAY_MAX_RATE = 30
+
+    # Offline analysis of uploaded videos (/analyze_video, crowdctl analyze):
+    # analyse every Nth frame, inference threads (more than one only run in
+    # parallel with inference workers or batching) and queue size between stages
+    OFFLINE_SAMPLE_EVERY = 1
+    OFFLINE_INFER_WORKERS = 2
+    OFFLINE_QUEUE_SIZE = 8
+
+    # Segmented offline analysis: split the video into this many frame ranges,
+    # each analysed by its own process with its own model (0 = single process).
+    # Each segment first analyses SEGMENT_WARMUP_FRAMES frames before its start
+    # so tracking and movement history are warm at the boundary
+    SEGMENT_PROCESSES = 0
+    SEGMENT_WARMUP_FRAMES = 30
+
+    # Video analysis jobs (/jobs): JOB_WORKERS jobs run at once and at most
+    # JOB_MAX_QUEUED wait. While a camera or video plays live each job analyses
+    # at most JOB_LIVE_MAX_FPS frames per second (0 = no limit) so the live
+    # streams keep their inference capacity. Videos and results of the last
+    # JOB_HISTORY finished jobs are kept under JOBS_DIR
+    JOB_WORKERS = 1
+    JOB_MAX_QUEUED = 100
+    JOB_LIVE_MAX_FPS = 5
+    JOB_HISTORY = 100
+    JOBS_DIR = os.path.join(tempfile.gettempdir(), "crowd_analysis_jobs")
+
+    # Result cache of analysis jobs: a video submitted again with the same
+    # content, model and settings is replayed from ANALYSIS_CACHE_DIR instead
+    # of re-analysed. Least recently used results are evicted beyond
+    # ANALYSIS_CACHE_MAX_BYTES (0 disables the cache)
+    ANALYSIS_CACHE_DIR = os.path.join(tempfile.gettempdir(), "crowd_analysis_cache")
+    ANALYSIS_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+    # Chunked, resumable uploads (/uploads): request bodies are streamed to
+    # UPLOADS_DIR UPLOAD_CHUNK_SIZE bytes at a time, up to UPLOAD_MAX_BYTES per
+    # file; uploads idle for UPLOAD_EXPIRY seconds without an analysis job
+    # are deleted. An
+    # analysis requested with a streamable upload (AVI, MKV, WebM, MPEG-TS...)
+    # starts once UPLOAD_ANALYZE_AFTER_BYTES have arrived, and fails if the
+    # upload then receives nothing for UPLOAD_IDLE_TIMEOUT seconds
+    UPLOADS_DIR = os.path.join(tempfile.gettempdir(), "crowd_uploads")
+    UPLOAD_MAX_BYTES = 8 * 1024 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    UPLOAD_EXPIRY = 24 * 3600
+    UPLOAD_ANALYZE_AFTER_BYTES = 4 * 1024 * 1024
+    UPLOAD_IDLE_TIMEOUT = 600
+
+    # Stage timings inside detect_crowd (plan, resize, blob, forward, decode,
+    # nms, tracking, faces, movement, risk, sqlite) per stream, reported as
+    # p50/p95/p99 over each stage's last STAGE_TIMINGS_WINDOW samples by
+    # /timings and crowdctl --timings. Can be switched on at runtime
+    STAGE_TIMINGS = False
+    STAGE_TIMINGS_WINDOW = 1024
 
     # Database settings
     DATABASE_FILE = "detection_database.db"
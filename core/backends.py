@@ -0,0 +1,259 @@
+import os
+import threading
+import cv2
+
+# Names accepted for OpenCV DNN backend/target settings
+OPENCV_DNN_BACKENDS = {
+    'default': cv2.dnn.DNN_BACKEND_DEFAULT,
+    'opencv': cv2.dnn.DNN_BACKEND_OPENCV,
+    'inference_engine': cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE,
+}
+
+OPENCV_DNN_TARGETS = {
+    'cpu': cv2.dnn.DNN_TARGET_CPU,
+    'opencl': cv2.dnn.DNN_TARGET_OPENCL,
+    'opencl_fp16': cv2.dnn.DNN_TARGET_OPENCL_FP16,
+}
+
+
+class InferenceBackend:
+    """Base class for the runtimes that execute the YOLO network.
+
+    A backend takes a preprocessed NCHW blob (as built by
+    cv2.dnn.blobFromImage) and returns the raw YOLO output layers, one
+    array of Darknet-style rows [cx, cy, w, h, objectness, class scores...]
+    per output layer.
+    """
+
+    name = 'base'
+
+    def forward(self, blob):
+        """Run the network on a blob and return the list of output arrays"""
+        raise NotImplementedError
+
+    def describe(self):
+        """Short human readable description of the backend settings"""
+        return self.name
+
+
+class OpenCVDNNBackend(InferenceBackend):
+    """YOLO inference through cv2.dnn with explicit backend/target settings"""
+
+    name = 'opencv'
+
+    def __init__(self, cfg_path, weights_path, backend='default', target='cpu', num_threads=0):
+        if backend not in OPENCV_DNN_BACKENDS:
+            raise ValueError(f"Unknown OpenCV DNN backend: {backend}")
+        if target not in OPENCV_DNN_TARGETS:
+            raise ValueError(f"Unknown OpenCV DNN target: {target}")
+
+        self.backend = backend
+        self.target = target
+        self.num_threads = num_threads
+
+        # cv2.setNumThreads is process wide; 0 keeps OpenCV's default
+        if num_threads > 0:
+            cv2.setNumThreads(num_threads)
+
+        self.net = cv2.dnn.readNet(weights_path, cfg_path)
+        self.net.setPreferableBackend(OPENCV_DNN_BACKENDS[backend])
+        self.net.setPreferableTarget(OPENCV_DNN_TARGETS[target])
+        self.output_layers = list(self.net.getUnconnectedOutLayersNames())
+
+    def forward(self, blob):
+        self.net.setInput(blob)
+        return list(self.net.forward(self.output_layers))
+
+    def describe(self):
+        return f"opencv (backend={self.backend}, target={self.target}, threads={self.num_threads or 'auto'})"
+
+
+class ONNXRuntimeBackend(InferenceBackend):
+    """YOLO inference through ONNX Runtime on the CPU execution provider.
+
+    The model must be an export of the Darknet network whose outputs are
+    the decoded YOLO rows (the same layout cv2.dnn produces).
+    """
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, num_threads=0):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def forward(self, blob):
+        return self.session.run(None, {self.input_name: blob})
+
+    def describe(self):
+        return f"onnxruntime (CPU, threads={self.num_threads or 'auto'})"
+
+
+class OpenVINOBackend(InferenceBackend):
+    """YOLO inference through the OpenVINO runtime on the CPU device.
+
+    Accepts an OpenVINO IR (.xml) or an ONNX file with the same output
+    layout as ONNXRuntimeBackend.
+    """
+
+    name = 'openvino'
+
+    def __init__(self, model_path, num_threads=0):
+        try:
+            import openvino as ov
+        except ImportError:
+            raise RuntimeError("openvino is not installed (pip install openvino)")
+
+        config = {}
+        if num_threads > 0:
+            config['INFERENCE_NUM_THREADS'] = num_threads
+
+        self.num_threads = num_threads
+        core = ov.Core()
+        self.compiled_model = core.compile_model(core.read_model(model_path), 'CPU', config)
+        self.outputs = list(self.compiled_model.outputs)
+
+    def forward(self, blob):
+        results = self.compiled_model([blob])
+        return [results[output] for output in self.outputs]
+
+    def describe(self):
+        return f"openvino (CPU, threads={self.num_threads or 'auto'})"
+
+
+BACKENDS = {
+    OpenCVDNNBackend.name: OpenCVDNNBackend,
+    ONNXRuntimeBackend.name: ONNXRuntimeBackend,
+    OpenVINOBackend.name: OpenVINOBackend,
+}
+
+
+# Tier spec keys naming the model files each backend loads
+MODEL_FILE_KEYS = {
+    OpenCVDNNBackend.name: ('cfg', 'weights'),
+    ONNXRuntimeBackend.name: ('onnx',),
+    OpenVINOBackend.name: ('openvino',),
+}
+
+
+def create_backend(name, base_dir, cfg_file="yolov3.cfg", weights_file="yolov3.weights",
+                   onnx_file="yolov3.onnx", openvino_file="yolov3.xml",
+                   opencv_backend='default', opencv_target='cpu', num_threads=0):
+    """Create an inference backend by name with model files relative to base_dir"""
+    if name == OpenCVDNNBackend.name:
+        return OpenCVDNNBackend(os.path.join(base_dir, cfg_file), os.path.join(base_dir, weights_file),
+                                backend=opencv_backend, target=opencv_target, num_threads=num_threads)
+    if name == ONNXRuntimeBackend.name:
+        return ONNXRuntimeBackend(os.path.join(base_dir, onnx_file), num_threads=num_threads)
+    if name == OpenVINOBackend.name:
+        return OpenVINOBackend(os.path.join(base_dir, openvino_file), num_threads=num_threads)
+    raise ValueError(f"Unknown inference backend: {name} (expected one of {', '.join(BACKENDS)})")
+
+
+def create_backend_from_config(config, name=None, tier_spec=None):
+    """Create the inference backend selected by a Config class.
+
+    If tier_spec is given, its model files override the Config defaults;
+    a tier spec without the model files of the selected backend raises
+    ValueError rather than silently loading the default model.
+    """
+    name = name or config.INFERENCE_BACKEND
+    if tier_spec is not None:
+        missing = [key for key in MODEL_FILE_KEYS.get(name, ()) if key not in tier_spec]
+        if missing:
+            raise ValueError(f"Model tier has no {'/'.join(missing)} file for the {name} backend")
+    tier_spec = tier_spec or {}
+    return create_backend(
+        name,
+        config.BASE_DIR,
+        cfg_file=tier_spec.get('cfg', config.YOLO_CONFIG_FILE),
+        weights_file=tier_spec.get('weights', config.YOLO_WEIGHTS_FILE),
+        onnx_file=tier_spec.get('onnx', config.ONNX_MODEL_FILE),
+        openvino_file=tier_spec.get('openvino', config.OPENVINO_MODEL_FILE),
+        opencv_backend=config.OPENCV_DNN_BACKEND,
+        opencv_target=config.OPENCV_DNN_TARGET,
+        num_threads=config.INFERENCE_THREADS,
+    )
+
+
+class ModelTier:
+    """A loaded network together with the input size it runs at"""
+
+    def __init__(self, name, backend, input_size):
+        self.name = name
+        self.backend = backend
+        self.input_size = input_size
+
+    def describe(self):
+        return f"{self.name} ({self.input_size}x{self.input_size}, {self.backend.describe()})"
+
+
+class ModelTiers:
+    """Registry of model tiers that can be loaded side by side.
+
+    Each tier spec names the model files and the network input size.
+    Tiers are loaded on first use, and tiers using the same model files
+    (e.g. full YOLOv3 at 608/416/320) share one loaded backend.
+    """
+
+    FILE_KEYS = ('cfg', 'weights', 'onnx', 'openvino')
+
+    def __init__(self, specs, backend_factory, default_tier):
+        if default_tier not in specs:
+            raise ValueError(f"Unknown model tier: {default_tier}")
+        self.specs = dict(specs)
+        self.backend_factory = backend_factory
+        self.default_tier = default_tier
+        self.loaded = {}
+        self.backends = {}
+        self.lock = threading.Lock()
+        self.can_create_backends = True  # False if the factory always returns one shared backend
+
+    @classmethod
+    def single(cls, backend, name='full-416', input_size=416):
+        """Registry with one tier wrapping an already created backend"""
+        tiers = cls({name: {'input_size': input_size}}, lambda spec: backend, name)
+        tiers.can_create_backends = False
+        return tiers
+
+    def names(self):
+        return list(self.specs)
+
+    def create_backend(self, name=None):
+        """Create a separate, unshared backend for a tier (e.g. one per worker thread)"""
+        return self.backend_factory(self.specs[name or self.default_tier])
+
+    def load(self, name=None):
+        """Return the ModelTier for name (default tier if None), loading it if needed"""
+        name = name or self.default_tier
+        tier = self.loaded.get(name)
+        if tier is not None:
+            return tier
+        if name not in self.specs:
+            raise ValueError(f"Unknown model tier: {name} (expected one of {', '.join(self.specs)})")
+
+        with self.lock:
+            if name not in self.loaded:
+                spec = self.specs[name]
+                files = tuple(spec.get(key) for key in self.FILE_KEYS)
+                if files not in self.backends:
+                    self.backends[files] = self.backend_factory(spec)
+                self.loaded[name] = ModelTier(name, self.backends[files], spec.get('input_size', 416))
+            return self.loaded[name]
+
+
+def create_model_tiers_from_config(config, default_tier=None):
+    """Create the model tier registry described by a Config class"""
+    return ModelTiers(config.MODEL_TIERS,
+                      lambda spec: create_backend_from_config(config, tier_spec=spec),
+                      default_tier or config.DEFAULT_MODEL_TIER)
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceBatcher:
+    """Shares batched forward passes between the frames of several streams.
+
+    Stream threads hand their frame to infer() and block until the result
+    is ready. A worker thread gathers pending frames until max_batch_size
+    are waiting or max_wait seconds passed since the oldest one, then runs
+    them through infer_batch(frames, model_tier, rois) in one call (e.g.
+    CrowdDetector.infer_people_batch). Frames for different model tiers
+    are batched separately since their blobs have different input sizes.
+
+    Only the latest frame of a stream is kept: submitting a new frame for a
+    stream_id that is still waiting cancels the older request.
+    """
+
+    def __init__(self, infer_batch, max_batch_size=4, max_wait=0.02):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.infer_batch = infer_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pending = []  # [stream_id, frame, model_tier, roi, future, submitted_at]
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.stats = {'batches': 0, 'frames': 0, 'largest_batch': 0, 'superseded': 0}
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the worker; requests still waiting fail with RuntimeError"""
+        with self.condition:
+            self.running = False
+            pending, self.pending = self.pending, []
+            self.condition.notify_all()
+        for request in pending:
+            request[4].set_exception(RuntimeError("Inference batcher stopped"))
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, frame, model_tier=None, roi=None, stream_id=None):
+        """Queue a frame and return a Future of its (boxes, confidences)"""
+        future = Future()
+        with self.condition:
+            if not self.running:
+                raise RuntimeError("Inference batcher is not running")
+            if stream_id is not None:
+                for index, request in enumerate(self.pending):
+                    if request[0] == stream_id:
+                        request[4].cancel()
+                        del self.pending[index]
+                        self.stats['superseded'] += 1
+                        break
+            self.pending.append([stream_id, frame, model_tier, roi, future, time.monotonic()])
+            self.condition.notify_all()
+        return future
+
+    def infer(self, frame, model_tier=None, roi=None, stream_id=None):
+        """Run a frame through the next batch and return its (boxes, confidences)"""
+        return self.submit(frame, model_tier, roi, stream_id).result()
+
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats['pending'] = len(self.pending)
+        stats['mean_batch'] = stats['frames'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def _take_batch(self):
+        """Wait for a full batch or the deadline of the oldest request and take it"""
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+            if not self.running:
+                return None
+
+            model_tier = self.pending[0][2]
+            deadline = self.pending[0][5] + self.max_wait
+            while self.running:
+                same_tier = sum(1 for request in self.pending if request[2] == model_tier)
+                remaining = deadline - time.monotonic()
+                if same_tier >= self.max_batch_size or remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            if not self.running:
+                return None
+
+            batch = [request for request in self.pending if request[2] == model_tier][:self.max_batch_size]
+            taken = {id(request) for request in batch}
+            self.pending = [request for request in self.pending if id(request) not in taken]
+            # Futures cancelled by their caller are dropped here
+            batch = [request for request in batch if request[4].set_running_or_notify_cancel()]
+            if batch:
+                self.stats['batches'] += 1
+            self.stats['frames'] += len(batch)
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+            return model_tier, batch
+
+    def _run(self):
+        while True:
+            taken = self._take_batch()
+            if taken is None:
+                return
+            model_tier, batch = taken
+            if not batch:
+                continue
+            try:
+                results = self.infer_batch([request[1] for request in batch], model_tier,
+                                           [request[3] for request in batch])
+            except Exception as e:
+                print(f"Error in batched inference: {e}")
+                for request in batch:
+                    request[4].set_exception(e)
+                continue
+            for request, result in zip(batch, results):
+                request[4].set_result(result)
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+import cv2
+
+# A published frame: seq counts up from 1 per publish, jpeg is the encoded frame
+BroadcastFrame = namedtuple('BroadcastFrame', ['seq', 'frame', 'jpeg', 'timestamp'])
+
+
+def encode_jpeg(frame, quality=85):
+    """Encode a frame as JPEG bytes, or None if encoding failed"""
+    ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return buffer.tobytes() if ret else None
+
+
+class FrameBroadcaster:
+    """Encodes each processed frame once and hands it to every viewer.
+
+    The producer calls publish() once per frame; viewers wait on a
+    condition for a sequence number newer than the one they last sent, so
+    the encode cost does not grow with the number of clients and an idle
+    stream costs nothing.
+
+    Viewers may ask for a smaller width or a different JPEG quality.
+    Requests are snapped to WIDTH_STEP pixels and QUALITY_STEP quality
+    points, and each distinct variant of a frame is encoded once by the
+    first viewer that asks for it and shared with the others.
+    """
+
+    WIDTH_STEP = 16
+    QUALITY_STEP = 5
+    MIN_WIDTH = 160
+
+    def __init__(self, quality=85):
+        self.quality = quality
+        self.condition = threading.Condition()
+        self.latest = None
+        self.seq = 0
+        self.clients = 0
+        self.variants = {}  # (seq, width, quality) -> Future of the JPEG bytes
+        self.stats = {'published': 0, 'encode_failures': 0, 'sent': 0,
+                      'variants_encoded': 0, 'variant_hits': 0}
+
+    def publish(self, frame, jpeg=None):
+        """Encode frame (unless jpeg is given) and wake the waiting viewers"""
+        if jpeg is None:
+            jpeg = encode_jpeg(frame, self.quality)
+        with self.condition:
+            if jpeg is None:
+                self.stats['encode_failures'] += 1
+                return None
+            self.seq += 1
+            self.latest = BroadcastFrame(self.seq, frame, jpeg, time.time())
+            self.stats['published'] += 1
+            # Viewers may still be sending the previous frame; older variants are dropped
+            self.variants = {key: variant for key, variant in self.variants.items() if key[0] >= self.seq - 1}
+            self.condition.notify_all()
+            return self.latest
+
+    def get_latest(self):
+        with self.condition:
+            return self.latest
+
+    def wait_for_frame(self, last_seq=0, timeout=None):
+        """Wait for a frame newer than last_seq; returns None on timeout"""
+        with self.condition:
+            if not self.condition.wait_for(
+                    lambda: self.latest is not None and self.latest.seq > last_seq, timeout):
+                return None
+            self.stats['sent'] += 1
+            return self.latest
+
+    def normalize_variant(self, frame, width=None, quality=None):
+        """Snap a requested width and quality to a cacheable variant; None means the original"""
+        frame_width = frame.shape[1]
+        if width is not None:
+            width = max(self.MIN_WIDTH, width - width % self.WIDTH_STEP)
+            if width >= frame_width:
+                width = None
+        if quality is not None:
+            quality = min(95, max(self.QUALITY_STEP, quality - quality % self.QUALITY_STEP))
+            if quality == self.quality:
+                quality = None
+        return width, quality
+
+    def variant(self, broadcast, width=None, quality=None):
+        """JPEG bytes of a broadcast frame resized to width and encoded at quality.
+
+        Without width and quality (or when they match the original) this is
+        the frame's shared JPEG. Returns None if encoding failed.
+        """
+        width, quality = self.normalize_variant(broadcast.frame, width, quality)
+        if width is None and quality is None:
+            return broadcast.jpeg
+
+        key = (broadcast.seq, width, quality)
+        with self.condition:
+            future = self.variants.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                if broadcast.seq >= self.seq - 1:
+                    self.variants[key] = future
+                self.stats['variants_encoded'] += 1
+            else:
+                self.stats['variant_hits'] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            image = broadcast.frame
+            if width is not None:
+                height = max(1, round(image.shape[0] * width / image.shape[1]))
+                image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+            jpeg = encode_jpeg(image, quality if quality is not None else self.quality)
+        except Exception as e:
+            print(f"Error encoding stream variant: {e}")
+            jpeg = None
+        future.set_result(jpeg)  # Also wakes viewers waiting for a failed variant
+        return jpeg
+
+    def frames(self, idle_timeout=1.0, max_fps=None):
+        """Yield BroadcastFrames for one viewer, skipping frames it was too slow for.
+
+        The latest frame is repeated after idle_timeout seconds without a
+        new one, so the server notices viewers that disconnected while the
+        stream was paused. max_fps caps how often this viewer gets a frame.
+        """
+        interval = 1.0 / max_fps if max_fps else 0
+        with self.condition:
+            self.clients += 1
+        try:
+            last_seq = 0
+            next_time = 0
+            while True:
+                delay = next_time - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                frame = self.wait_for_frame(last_seq, idle_timeout)
+                if frame is None:
+                    frame = self.get_latest()
+                    if frame is None:
+                        continue
+                last_seq = frame.seq
+                next_time = time.time() + interval
+                yield frame
+        finally:
+            with self.condition:
+                self.clients -= 1
+
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats['clients'] = self.clients
+            stats['latest_seq'] = self.seq
+        return stats
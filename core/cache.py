@@ -0,0 +1,243 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+# Config settings that change analysis results besides the video and model tier
+FINGERPRINT_SETTINGS = (
+    'INFERENCE_BACKEND', 'CONFIDENCE_THRESHOLD', 'NMS_THRESHOLD', 'PERSON_ONLY_NMS',
+    'KEYFRAME_INTERVAL', 'KEYFRAME_MOTION_THRESHOLD', 'MOTION_GATE_THRESHOLD', 'MOTION_GATE_MAX_SKIP',
+    'TILE_SIZE', 'TILE_OVERLAP', 'TILE_FULL_FRAME', 'ALERT_THRESHOLDS', 'STAMPEDE_RISK_THRESHOLDS',
+)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_fingerprint(config, model_tier=None, roi=None, **params):
+    """Digest of the model, detection settings and analysis parameters.
+
+    Model files are identified by path, size and modification time, so
+    replacing the weights invalidates cached results without hashing them.
+    """
+    tier = model_tier or config.DEFAULT_MODEL_TIER
+    spec = config.MODEL_TIERS.get(tier, {})
+    files = {}
+    for key in ('cfg', 'weights', 'onnx', 'openvino'):
+        path = os.path.join(config.BASE_DIR, spec[key]) if key in spec else None
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            files[key] = [spec[key], stat.st_size, int(stat.st_mtime)]
+    payload = {
+        'tier': tier,
+        'spec': spec,
+        'files': files,
+        'roi': roi,
+        'settings': {name: getattr(config, name, None) for name in FINGERPRINT_SETTINGS},
+        'params': params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    """Analysis results on disk, keyed by video content and config fingerprint.
+
+    Each entry is the gzip-compressed JSON lines results file plus the
+    final status of the run. Entries are evicted least recently used
+    first once their total size exceeds max_bytes; the recency order
+    survives restarts through the files' modification times.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> bytes on disk, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def key(video_digest, fingerprint):
+        return hashlib.sha256(f"{video_digest}:{fingerprint}".encode()).hexdigest()[:32]
+
+    def get(self, key):
+        """Final status stored with an entry, or None on a miss; marks the entry as recently used"""
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._status_path(key)) as f:
+                    status = json.load(f)
+                os.utime(self._results_path(key))
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return status
+
+    def restore(self, key, output_path):
+        """Decompress an entry's results to output_path; False if it is gone"""
+        try:
+            with gzip.open(self._results_path(key), 'rb') as source, open(output_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            return True
+        except OSError:
+            return False
+
+    def put(self, key, results_path, status):
+        """Store a finished run's results file and status, then evict down to max_bytes"""
+        results_tmp = self._results_path(key) + '.tmp'
+        status_tmp = self._status_path(key) + '.tmp'
+        with open(results_path, 'rb') as source, gzip.open(results_tmp, 'wb', compresslevel=6) as target:
+            shutil.copyfileobj(source, target)
+        with open(status_tmp, 'w') as f:
+            json.dump(status, f, default=str)
+        size = os.path.getsize(results_tmp) + os.path.getsize(status_tmp)
+        with self.lock:
+            os.replace(status_tmp, self._status_path(key))
+            os.replace(results_tmp, self._results_path(key))
+            self.entries[key] = size
+            self.entries.move_to_end(key)
+            while sum(self.entries.values()) > self.max_bytes and len(self.entries) > 1:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': sum(self.entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _results_path(self, key):
+        return os.path.join(self.directory, f"{key}.jsonl.gz")
+
+    def _status_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remove(self, key):
+        self.entries.pop(key, None)
+        for path in (self._results_path(key), self._status_path(key)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _load(self):
+        # Rebuild the LRU order from the results files' modification times
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.jsonl.gz'):
+                continue
+            key = name[:-len('.jsonl.gz')]
+            if not os.path.exists(self._status_path(key)):
+                continue
+            stat = os.stat(self._results_path(key))
+            found.append((stat.st_mtime, key, stat.st_size + os.path.getsize(self._status_path(key))))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+
+
+class CachedAnalysis:
+    """Replays a cached analysis: restores the results file and reports the stored status"""
+
+    def __init__(self, cache, key, status, output_path):
+        self.cache = cache
+        self.key = key
+        self.stored = status
+        self.output_path = output_path
+        self.state = 'pending'
+        self.error = None
+        self.elapsed = 0.0
+
+    def start(self):
+        start_time = time.time()
+        if self.cache.restore(self.key, self.output_path):
+            self.state = 'completed'
+        else:
+            self.state = 'failed'
+            self.error = "Cached results are no longer available"
+        self.elapsed = time.time() - start_time
+
+    def run(self):
+        self.start()
+        return self.get_status()
+
+    def join(self, timeout=None):
+        pass
+
+    def cancel(self):
+        pass
+
+    def is_running(self):
+        return False
+
+    def get_status(self):
+        status = dict(self.stored, state=self.state, output=self.output_path, error=self.error,
+                      elapsed_seconds=round(self.elapsed, 2), eta_seconds=None, cached=True)
+        status['original_elapsed_seconds'] = self.stored.get('elapsed_seconds')
+        return status
+
+
+class CachingAnalyzer:
+    """Wraps an analyzer and stores its results in a ResultCache when it completes.
+
+    Only runs that completed without any error are stored; a video that
+    could not be read to the end leaves truncated results, which must not
+    be replayed for later submissions.
+    """
+
+    def __init__(self, analyzer, cache, key):
+        self.analyzer = analyzer
+        self.cache = cache
+        self.key = key
+        self.output_path = analyzer.output_path
+
+    def start(self):
+        self.analyzer.start()
+
+    def run(self):
+        self.start()
+        self.join()
+        return self.get_status()
+
+    def join(self, timeout=None):
+        self.analyzer.join(timeout)
+        if self.key is None or self.analyzer.is_running():
+            return
+        key, self.key = self.key, None  # Store once
+        status = self.analyzer.get_status()
+        source_error = (status.get('pipeline') or {}).get('source_error')
+        if status['state'] == 'completed' and not status['error'] and not source_error:
+            status.pop('pipeline', None)
+            try:
+                self.cache.put(key, self.output_path, status)
+            except OSError as e:
+                print(f"Warning: could not cache analysis results: {e}")
+
+    def cancel(self):
+        self.analyzer.cancel()
+
+    def is_running(self):
+        return self.analyzer.is_running()
+
+    def get_status(self):
+        return dict(self.analyzer.get_status(), cached=False)
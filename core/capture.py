@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import namedtuple
+
+# A frame as grabbed by the capture thread: seq counts up from 1 per capture
+# and timestamp is the time.time() the frame was read
+CapturedFrame = namedtuple('CapturedFrame', ['frame', 'seq', 'timestamp'])
+
+
+class LatestFrameCapture:
+    """Reads a cv2.VideoCapture on its own thread, keeping only the newest frame.
+
+    The driver is drained as fast as it delivers, so frames never queue up
+    behind a slow consumer. read() always returns the freshest frame and
+    counts the frames that were overwritten before anyone read them.
+    """
+
+    def __init__(self, capture, lock=None, retry_delay=0.005):
+        self.capture = capture
+        self.lock = lock or threading.Lock()  # Held around capture.read(), e.g. app.camera_lock
+        self.retry_delay = retry_delay
+        self.condition = threading.Condition()
+        self.latest = None
+        self.last_read_seq = 0
+        self.seq = 0
+        self.running = False
+        self.thread = None
+        self.stats = {'captured': 0, 'consumed': 0, 'dropped': 0, 'read_failures': 0}
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name='frame-capture', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def read(self, timeout=None):
+        """Wait for a frame newer than the last one read and return it as a CapturedFrame.
+
+        Returns None on timeout or once the capture stopped.
+        """
+        with self.condition:
+            if not self.condition.wait_for(
+                    lambda: not self.running or (self.latest is not None and self.latest.seq > self.last_read_seq),
+                    timeout):
+                return None
+            if not self.running or self.latest.seq <= self.last_read_seq:
+                return None
+            captured = self.latest
+            self.stats['dropped'] += captured.seq - self.last_read_seq - 1
+            self.stats['consumed'] += 1
+            self.last_read_seq = captured.seq
+            return captured
+
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            latest = self.latest
+        stats['latest_seq'] = latest.seq if latest is not None else 0
+        stats['latest_age_ms'] = round((time.time() - latest.timestamp) * 1000, 1) if latest is not None else None
+        return stats
+
+    def _run(self):
+        while self.running:
+            with self.lock:
+                if self.capture is None or not self.capture.isOpened():
+                    ret, frame = False, None
+                else:
+                    ret, frame = self.capture.read()
+            if not ret or frame is None:
+                with self.condition:
+                    self.stats['read_failures'] += 1
+                time.sleep(self.retry_delay)
+                continue
+
+            with self.condition:
+                self.seq += 1
+                self.latest = CapturedFrame(frame, self.seq, time.time())
+                self.stats['captured'] += 1
+                self.condition.notify_all()
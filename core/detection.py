@@ -3,7 +3,13 @@ import numpy as np
 import sqlite3
 from datetime import datetime
 import os
-from collections import deque
+import threading
+
+from core.backends import ModelTiers, OpenCVDNNBackend, create_model_tiers_from_config
+from core.engine import InferenceEngine
+from core.stream import StreamState
+from core.timing import StageTimings
+from core.tracking import motion_score, small_gray
 
 class StampedeRiskAssessment:
     """Class to assess stampede risk based on crowd dynamics"""
@@ -107,22 +113,84 @@ class StampedeRiskAssessment:
             }
         }
 
+def _default_stream_attribute(name):
+    """Property forwarding to the default stream's state, for single stream callers"""
+    return property(lambda self: getattr(self.default_stream, name),
+                    lambda self, value: setattr(self.default_stream, name, value))
+
 class CrowdDetector:
-    def __init__(self, db_path='detection_database.db'):
+    """Crowd detection facade: one shared InferenceEngine plus a registry of streams.
+    
+    Each camera or video passes its own stream_id to detect_crowd and gets
+    its own StreamState (movement histories, tracker, motion gate), while
+    all streams share the engine and so one loaded copy of the weights.
+    Calls without a stream_id use the default stream. With timings (a
+    StageTimings) enabled, every stage's latency is recorded per stream.
+    """
+    
+    # Single stream API: the state of the default stream
+    position_history = _default_stream_attribute('position_history')
+    velocity_history = _default_stream_attribute('velocity_history')
+    direction_history = _default_stream_attribute('direction_history')
+    acceleration_history = _default_stream_attribute('acceleration_history')
+    frame_history = _default_stream_attribute('frame_history')
+    tracker = _default_stream_attribute('tracker')
+    keyframe_detections = _default_stream_attribute('keyframe_detections')
+    last_result = _default_stream_attribute('last_result')
+    inference_counts = _default_stream_attribute('inference_counts')
+    
+    def __init__(self, db_path='detection_database.db', person_only=True, backend=None,
+                 model_tiers=None, keyframe_interval=1, keyframe_motion_threshold=None,
+                 motion_gate_threshold=None, motion_gate_max_skip=150,
+                 tile_size=None, tile_overlap=96, tile_execution='batch', tile_workers=4,
+                 tile_full_frame=True, roi=None, engine=None, timings=None):
         self.db_path = db_path
+        self.engine = engine  # InferenceEngine shared with other detectors; built from the models if None
+        self.backend = backend  # InferenceBackend; OpenCV DNN on the bundled model if None
+        self.model_tiers = model_tiers  # ModelTiers registry; wraps self.backend if None
+        self.model_tier = None  # Name of the tier used when detect_crowd is not given one
         self.net = None
         self.classes = []
+        self.person_class_id = 0
+        self.person_only = person_only  # Drop non-person candidates before a single NMS pass
         self.face_cascade = None
+        self.face_lock = threading.Lock()
         self.db_conn = None
         self.db_cursor = None
+        self.db_lock = threading.Lock()  # Streams share one connection and cursor
         
         # Stampede prevention attributes
         self.stampede_assessor = StampedeRiskAssessment()
-        self.position_history = {}  # Track positions over time
-        self.velocity_history = deque(maxlen=30)  # Last 30 frames
-        self.direction_history = deque(maxlen=30)
-        self.acceleration_history = deque(maxlen=30)
-        self.frame_history = deque(maxlen=5)  # Reduced for better performance
+        
+        # Per-stream state, created on first use
+        self.streams = {}
+        self.streams_lock = threading.Lock()
+        self.default_stream = self.stream()
+        
+        # Keyframe mode: run the DNN every keyframe_interval frames (or earlier when
+        # motion since the last keyframe exceeds the threshold) and track in between
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_motion_threshold = keyframe_motion_threshold
+        self.tracking_scale = 0.5  # Tracking and motion run on half-size grayscale frames
+        
+        # Motion gate: reuse the last result while the scene is static, refreshing
+        # at least every motion_gate_max_skip frames
+        self.motion_gate_threshold = motion_gate_threshold
+        self.motion_gate_max_skip = motion_gate_max_skip
+        
+        # Tiled mode settings, handed to the engine
+        if tile_execution not in ('batch', 'threads'):
+            raise ValueError(f"Unknown tile execution mode: {tile_execution}")
+        self.tile_settings = dict(tile_size=tile_size, tile_overlap=tile_overlap,
+                                  tile_execution=tile_execution, tile_workers=tile_workers,
+                                  tile_full_frame=tile_full_frame)
+        
+        # Region of interest: inference only covers its bounding rectangles,
+        # detections outside it are dropped and density uses its area
+        self.roi = roi
+        
+        # Per-stage latencies, shared with the engine this detector builds
+        self.timings = timings
         
         self.initialize_models()
         self.initialize_database()
@@ -140,24 +208,41 @@ class CrowdDetector:
             cascade_path = os.path.join(base_dir, "haarcascade_frontalface_default.xml")
             
             # Check if files exist
-            for file_path, file_name in [
-                (weights_path, "yolov3.weights"),
-                (cfg_path, "yolov3.cfg"),
+            required_files = [
                 (names_path, "coco.names"),
                 (cascade_path, "haarcascade_frontalface_default.xml")
-            ]:
+            ]
+            if self.engine is None and self.backend is None and self.model_tiers is None:
+                required_files += [(weights_path, "yolov3.weights"), (cfg_path, "yolov3.cfg")]
+            for file_path, file_name in required_files:
                 if not os.path.exists(file_path):
                     print(f"Warning: {file_name} not found at {file_path}")
             
-            # Load YOLO
-            print(f"Loading YOLO network from: {weights_path}")
-            self.net = cv2.dnn.readNet(weights_path, cfg_path)
-            print("✓ YOLO network loaded successfully")
-            
             with open(names_path, "r") as f:
                 self.classes = f.read().strip().split("\n")
+            if "person" in self.classes:
+                self.person_class_id = self.classes.index("person")
             print(f"✓ Loaded {len(self.classes)} COCO classes")
             
+            # Load YOLO, unless sharing the engine of another detector
+            if self.engine is None:
+                if self.model_tiers is None:
+                    if self.backend is None:
+                        print(f"Loading YOLO network from: {weights_path}")
+                        self.backend = OpenCVDNNBackend(cfg_path, weights_path)
+                    self.model_tiers = ModelTiers.single(self.backend)
+                self.engine = InferenceEngine(self.model_tiers, self.person_class_id,
+                                              person_only=self.person_only, timings=self.timings,
+                                              **self.tile_settings)
+            if self.timings is None:
+                self.timings = self.engine.timings
+            self.model_tiers = self.engine.model_tiers
+            self.model_tier = self.model_tiers.default_tier
+            default_tier = self.engine.load_model_tier(self.model_tier)
+            self.backend = default_tier.backend
+            self.net = getattr(self.backend, 'net', None)
+            print(f"✓ YOLO network loaded successfully ({default_tier.describe()})")
+            
             # Face detection
             self.face_cascade = cv2.CascadeClassifier(cascade_path)
             if self.face_cascade.empty():
@@ -189,194 +274,194 @@ class CrowdDetector:
             print(f"Database Error: {e}")
             raise
     
-    def detect_crowd(self, frame):
-        """Detect people in frame using YOLOv3 with fallback methods"""
+    def load_model_tier(self, name):
+        """Load a model tier so it is ready to serve, returning the ModelTier"""
+        if self.engine is None:
+            raise RuntimeError("Models not initialized properly")
+        return self.engine.load_model_tier(name)
+    
+    def set_model_tier(self, name):
+        """Set the model tier used when detect_crowd is called without one"""
+        self.load_model_tier(name)
+        self.model_tier = name
+    
+    def stream(self, stream_id=None):
+        """Return the StreamState of a stream, creating it on first use"""
+        stream_id = stream_id or 'default'
+        with self.streams_lock:
+            state = self.streams.get(stream_id)
+            if state is None:
+                state = self.streams[stream_id] = StreamState(stream_id)
+            return state
+    
+    def remove_stream(self, stream_id):
+        """Forget the state of a stream that ended"""
+        with self.streams_lock:
+            self.streams.pop(stream_id, None)
+    
+    def detect_crowd(self, frame, model_tier=None, roi=None, infer=None, stream_id=None):
+        """Detect people in frame using YOLOv3 with fallback methods.
+        
+        stream_id selects the movement and risk state the frame belongs to
+        (the default stream if None). infer(frame, model_tier, roi) ->
+        (boxes, confidences) replaces the engine's forward pass, e.g.
+        InferenceBatcher.infer so several streams share batched forward passes.
+        """
         # Check if models are loaded
-        if self.net is None or self.face_cascade is None:
+        if self.model_tiers is None or self.face_cascade is None:
             raise RuntimeError("Models not initialized properly")
         
         # Check if database is initialized
         if self.db_conn is None or self.db_cursor is None:
             raise RuntimeError("Database not initialized properly")
         
+        state = self.stream(stream_id)
+        with state.lock, self.timings.bind(state.stream_id):
+            plan = self._plan_frame(state, frame)
+            people = None
+            if plan['keyframe']:
+                people = (infer or self._infer_people)(frame, model_tier, roi or self.roi)
+            result, records = self._finish_frame(state, frame, plan, people, roi)
+            self.persist(records, state.stream_id)
+            return result
+    
+    def plan_frame(self, frame, stream_id=None):
+        """First step of detect_crowd: decide how a frame is handled.
+        
+        Returns a plan dict whose 'keyframe' entry says whether the frame
+        needs a DNN pass. Together with finish_frame and persist this lets
+        a pipeline run the steps on different threads; plan_frame and
+        finish_frame must each see a stream's frames in order.
+        """
+        return self._plan_frame(self.stream(stream_id), frame)
+    
+    def finish_frame(self, frame, plan, people=None, roi=None, stream_id=None):
+        """Second step of detect_crowd: tracking, faces, movement and risk.
+        
+        people is the (boxes, confidences) inference result for keyframes.
+        Returns (detect_crowd result, database records for persist).
+        """
+        return self._finish_frame(self.stream(stream_id), frame, plan, people, roi)
+    
+    def _plan_frame(self, state, frame):
+        with self.timings.stage('plan', state.stream_id):
+            return self._plan(state, frame)
+    
+    def _plan(self, state, frame):
+        state.inference_counts['frames'] += 1
+        tracking_gray = None
+        if self.keyframe_interval > 1 or self.motion_gate_threshold is not None:
+            tracking_gray = state.tracking_gray = small_gray(frame, self.tracking_scale)
+        
+        # Static scene since the last DNN run: reuse its detections and risk
+        if self._motion_gate_closed(state):
+            state.inference_counts['gated'] += 1
+            return {'gated': True, 'keyframe': False, 'tracking_gray': tracking_gray}
+        
+        # Run the DNN on keyframes; in between move the keyframe boxes with the tracker
+        keyframe = self._is_keyframe(state)
+        if keyframe:
+            state.inference_counts['inferences'] += 1
+            state.frames_since_keyframe = 0
+            state.keyframe_gray = tracking_gray
+        else:
+            state.inference_counts['tracked'] += 1
+            state.frames_since_keyframe += 1
+        return {'gated': False, 'keyframe': keyframe, 'tracking_gray': tracking_gray}
+    
+    def _finish_frame(self, state, frame, plan, people, roi):
+        if plan['gated'] and state.last_result is None:
+            # The keyframe this frame was gated on never finished (e.g. its inference failed)
+            plan = dict(plan, gated=False)
+        if plan['gated']:
+            num_people, detections, risk_assessment = state.last_result
+            return (frame, num_people, [dict(d) for d in detections], dict(risk_assessment)), []
+        
         # Store frame for flow analysis (only if we have movement analysis enabled)
-        if len(self.velocity_history) > 0 or len(self.direction_history) > 0:
-            self.frame_history.append(frame.copy())
+        if len(state.velocity_history) > 0 or len(state.direction_history) > 0:
+            state.frame_history.append(frame.copy())
         
         # Use original frame size for better display (but process at reasonable size for performance)
         original_height, original_width = frame.shape[:2]
-        # Process at a reasonable size for performance but not too small
-        process_width, process_height = 640, 480
-        process_frame = cv2.resize(frame, (process_width, process_height))
-        
-        # Calculate scaling factors for accurate coordinate mapping
-        width_scale = original_width / process_width
-        height_scale = original_height / process_height
-        
-        # Prepare frame for YOLO
-        blob = cv2.dnn.blobFromImage(process_frame, 1 / 255.0, (416, 416), swapRB=True, crop=False)
-        self.net.setInput(blob)
-        outs = self.net.forward(self.get_output_layers(self.net))
-        
-        boxes, confidences, class_ids = [], [], []
-        
-        # Collect detections
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                # Increase confidence threshold for better accuracy
-                if confidence > 0.6:
-                    center_x = int(detection[0] * process_frame.shape[1])
-                    center_y = int(detection[1] * process_frame.shape[0])
-                    w = int(detection[2] * process_frame.shape[1])
-                    h = int(detection[3] * process_frame.shape[0])
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-                    
-                    # Scale back to original frame size with improved precision
-                    x = int(round(x * width_scale))
-                    y = int(round(y * height_scale))
-                    w = int(round(w * width_scale))
-                    h = int(round(h * height_scale))
-                    
-                    # Ensure bounding boxes are within frame bounds
-                    x = max(0, min(x, original_width - 1))
-                    y = max(0, min(y, original_height - 1))
-                    w = max(1, min(w, original_width - x))
-                    h = max(1, min(h, original_height - y))
-                    
-                    boxes.append([x, y, w, h])
-                    confidences.append(float(confidence))
-                    class_ids.append(class_id)
-        
-        # NMS to remove duplicates with improved threshold for crowd detection
-        indices = cv2.dnn.NMSBoxes(boxes, confidences, 0.6, 0.3)
+        
+        keyframe = plan['keyframe']
+        timings = self.timings
+        stream_id = state.stream_id
+        if keyframe:
+            person_boxes, person_confidences = people
+            if self.keyframe_interval > 1:
+                with timings.stage('tracking', stream_id):
+                    state.tracker.init(plan['tracking_gray'], person_boxes, self.tracking_scale)
+        else:
+            with timings.stage('tracking', stream_id):
+                person_boxes = np.round(state.tracker.update(plan['tracking_gray'])).astype(np.int32)
+            person_confidences = np.array([d['confidence'] for d in state.keyframe_detections])
         
         # Process detections
         num_people = 0
         detections = []
         current_positions = {}
-        
-        if len(indices) > 0:
-            # Convert indices to a list of integers using a safe approach
-            indices_list = []
+        records = []
+        
+        for (x, y, w, h), confidence in zip(person_boxes.tolist(), person_confidences.tolist()):
+            label = "person"
+            num_people += 1
+            if keyframe:
+                # Save object detection
+                records.append(('object_detections', (datetime.now(), label, confidence)))
             
-            # Handle different types of indices
-            if isinstance(indices, (list, tuple)):
-                for i in indices:
-                    if isinstance(i, (int, np.integer)):
-                        indices_list.append(int(i))
-            elif isinstance(indices, np.ndarray):
-                if indices.size > 0:
-                    if indices.ndim > 1:
-                        flat_indices = indices.flatten()
-                    else:
-                        flat_indices = indices
-                    for i in flat_indices:
-                        if isinstance(i, (int, np.integer)):
-                            indices_list.append(int(i))
-            else:
-                # For single values, check type first
-                if isinstance(indices, (int, np.integer)):
-                    indices_list.append(int(indices))
-            
-            # Filter out overlapping boxes more aggressively for better accuracy
-            filtered_boxes = []
-            filtered_confidences = []
-            filtered_class_ids = []
+            detection = {
+                'x': x,
+                'y': y,
+                'w': w,
+                'h': h,
+                'label': label,
+                'confidence': confidence
+            }
+            detections.append(detection)
             
-            for idx in indices_list:
-                # Ensure index is within bounds
-                if idx >= len(boxes) or idx >= len(class_ids) or idx >= len(confidences):
-                    continue
-                
-                # Additional filtering for person class only
-                if str(self.classes[class_ids[idx]]) == "person":
-                    filtered_boxes.append(boxes[idx])
-                    filtered_confidences.append(confidences[idx])
-                    filtered_class_ids.append(class_ids[idx])
+            # Track position for movement analysis
+            person_id = f"person_{num_people}"
+            current_positions[person_id] = (x + w/2, y + h/2)  # Center point
             
-            # Apply second round of NMS for person detections only
-            if filtered_boxes:
-                final_indices = cv2.dnn.NMSBoxes(filtered_boxes, filtered_confidences, 0.6, 0.3)
+            if not keyframe:
+                # Tracked frame: move the keyframe faces along with their person box
+                detection['tracked'] = True
+                keyframe_detection = state.keyframe_detections[num_people - 1]
+                if 'faces' in keyframe_detection:
+                    dx, dy = x - keyframe_detection['x'], y - keyframe_detection['y']
+                    detection['faces'] = [dict(face, x=face['x'] + dx, y=face['y'] + dy)
+                                          for face in keyframe_detection['faces']]
+            # Face detection inside person bounding box (only for first few people for performance)
+            elif num_people <= 3:  # Limit face detection for performance
+                # Make sure coordinates are within frame bounds
+                x1 = max(0, x)
+                y1 = max(0, y)
+                x2 = min(original_width, x + w)
+                y2 = min(original_height, y + h)
                 
-                if len(final_indices) > 0:
-                    # Convert final indices
-                    final_indices_list = []
-                    if isinstance(final_indices, (list, tuple)):
-                        for i in final_indices:
-                            if isinstance(i, (int, np.integer)):
-                                final_indices_list.append(int(i))
-                    elif isinstance(final_indices, np.ndarray):
-                        if final_indices.size > 0:
-                            if final_indices.ndim > 1:
-                                flat_indices = final_indices.flatten()
-                            else:
-                                flat_indices = final_indices
-                            for i in flat_indices:
-                                if isinstance(i, (int, np.integer)):
-                                    final_indices_list.append(int(i))
-                    else:
-                        if isinstance(final_indices, (int, np.integer)):
-                            final_indices_list.append(int(final_indices))
-                    
-                    for idx in final_indices_list:
-                        # Ensure index is within bounds
-                        if idx >= len(filtered_boxes) or idx >= len(filtered_class_ids) or idx >= len(filtered_confidences):
-                            continue
-                            
-                        x, y, w, h = filtered_boxes[idx]
-                        label = str(self.classes[filtered_class_ids[idx]])
-                        confidence = filtered_confidences[idx]
-                        
-                        if label == "person":
-                            num_people += 1
-                            # Save object detection
-                            timestamp = datetime.now()
-                            self.db_cursor.execute("INSERT INTO object_detections (timestamp, object_label, confidence) VALUES (?, ?, ?)",
-                                                 (timestamp, label, confidence))
-                            self.db_conn.commit()
-                            
-                            detection = {
-                                'x': x,
-                                'y': y,
-                                'w': w,
-                                'h': h,
-                                'label': label,
-                                'confidence': confidence
-                            }
-                            detections.append(detection)
-                            
-                            # Track position for movement analysis
-                            person_id = f"person_{num_people}"
-                            current_positions[person_id] = (x + w/2, y + h/2)  # Center point
-                            
-                            # Face detection inside person bounding box (only for first few people for performance)
-                            if num_people <= 3:  # Limit face detection for performance
-                                # Make sure coordinates are within frame bounds
-                                x1 = max(0, x)
-                                y1 = max(0, y)
-                                x2 = min(original_width, x + w)
-                                y2 = min(original_height, y + h)
-                                
-                                if x2 > x1 and y2 > y1:  # Check if valid region
-                                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                                    faces = self.face_cascade.detectMultiScale(gray[y1:y2, x1:x2], scaleFactor=1.3, minNeighbors=5, minSize=(30, 30))
-                                    detection['faces'] = []
-                                    for (fx, fy, fw, fh) in faces:
-                                        face_data = {
-                                            'x': x1 + fx,
-                                            'y': y1 + fy,
-                                            'w': fw,
-                                            'h': fh
-                                        }
-                                        detection['faces'].append(face_data)
+                if x2 > x1 and y2 > y1:  # Check if valid region
+                    with timings.stage('faces', stream_id):  # One sample per person checked
+                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                        with self.face_lock:
+                            faces = self.face_cascade.detectMultiScale(gray[y1:y2, x1:x2], scaleFactor=1.3, minNeighbors=5, minSize=(30, 30))
+                    detection['faces'] = []
+                    for (fx, fy, fw, fh) in faces:
+                        face_data = {
+                            'x': x1 + fx,
+                            'y': y1 + fy,
+                            'w': fw,
+                            'h': fh
+                        }
+                        detection['faces'].append(face_data)
+        
+        if keyframe:
+            state.keyframe_detections = list(detections)
         
         # Fallback detection using motion detection for better accuracy in videos
-        if num_people == 0 and len(self.frame_history) >= 2:
-            fallback_count = self._fallback_detection(frame)
+        if num_people == 0 and len(state.frame_history) >= 2:
+            with timings.stage('fallback', stream_id):
+                fallback_count = self._fallback_detection(frame, state)
             if fallback_count > 0:
                 num_people = fallback_count
                 # Update detections list if fallback found people
@@ -393,82 +478,91 @@ class CrowdDetector:
                     detections.append(detection)
         
         # Analyze movement patterns for stampede risk (only if we have people)
-        if num_people > 0:
-            self._analyze_movement_patterns(current_positions)
-        else:
-            # Clear histories when no people detected
-            self.velocity_history.clear()
-            self.direction_history.clear()
-            self.acceleration_history.clear()
-            self.position_history.clear()
-        
-        # Calculate stampede risk
-        area_pixels = original_width * original_height
-        risk_assessment = self.stampede_assessor.assess_risk(
-            num_people, area_pixels,
-            list(self.velocity_history),
-            list(self.direction_history),
-            list(self.acceleration_history)
-        )
+        with timings.stage('movement', stream_id):
+            if num_people > 0:
+                state.analyze_movement(current_positions)
+            else:
+                # Clear histories when no people detected
+                state.clear_movement()
+        
+        # Calculate stampede risk over the walkable area
+        with timings.stage('risk', stream_id):
+            roi = roi or self.roi
+            area_pixels = roi.area_pixels(frame.shape) if roi is not None else original_width * original_height
+            risk_assessment = self.stampede_assessor.assess_risk(
+                num_people, area_pixels,
+                list(state.velocity_history),
+                list(state.direction_history),
+                list(state.acceleration_history)
+            )
         
         # Store high-risk incidents (only for actual high risk, not just high people count)
         if risk_assessment['level'] == 'HIGH' and risk_assessment['score'] > 0.8:
             timestamp = datetime.now()
             factors_str = str(risk_assessment['factors'])
-            self.db_cursor.execute("""INSERT INTO stampede_incidents 
-                                 (timestamp, risk_level, people_count, risk_score, factors) 
-                                 VALUES (?, ?, ?, ?, ?)""",
-                                 (timestamp, risk_assessment['level'], num_people, 
-                                  risk_assessment['score'], factors_str))
-            self.db_conn.commit()
+            records.append(('stampede_incidents', (timestamp, risk_assessment['level'], num_people,
+                                                   risk_assessment['score'], factors_str)))
+        
+        if self.motion_gate_threshold is not None:
+            state.last_result = (num_people, [dict(d) for d in detections], dict(risk_assessment))
         
         # Return the original frame size for proper display
-        return frame, num_people, detections, risk_assessment
+        return (frame, num_people, detections, risk_assessment), records
     
-    def _analyze_movement_patterns(self, current_positions):
-        """Analyze movement patterns for stampede risk"""
-        if not self.position_history:
-            # First frame, just store positions
-            self.position_history = current_positions
+    def persist(self, records, stream_id=None):
+        """Write the database records of finish_frame in one transaction"""
+        if not records:
             return
+        with self.db_lock, self.timings.stage('sqlite', stream_id):
+            for table, values in records:
+                if table == 'object_detections':
+                    self.db_cursor.execute("INSERT INTO object_detections (timestamp, object_label, confidence) VALUES (?, ?, ?)",
+                                           values)
+                else:
+                    self.db_cursor.execute("""INSERT INTO stampede_incidents 
+                                         (timestamp, risk_level, people_count, risk_score, factors) 
+                                         VALUES (?, ?, ?, ?, ?)""", values)
+            self.db_conn.commit()
+    
+    def _motion_gate_closed(self, state):
+        """True when the scene barely changed since the last DNN run"""
+        if self.motion_gate_threshold is None or state.keyframe_gray is None:
+            return False
+        if state.frames_gated >= self.motion_gate_max_skip:
+            state.frames_gated = 0
+            return False
+        if motion_score(state.keyframe_gray, state.tracking_gray) >= self.motion_gate_threshold:
+            state.frames_gated = 0
+            return False
+        state.frames_gated += 1
+        return True
+    
+    def get_inference_stats(self, stream_id=None):
+        """Frame and inference counters of a stream, including the DNN runs saved by gating and tracking"""
+        return self.stream(stream_id).get_inference_stats()
+    
+    def _is_keyframe(self, state):
+        """Decide whether this frame needs a DNN pass (always true outside keyframe mode)"""
+        if self.keyframe_interval <= 1:
+            return True
         
-        # Calculate velocities and directions
-        velocities = []
-        directions = []
-        
-        for person_id, current_pos in current_positions.items():
-            if person_id in self.position_history:
-                prev_pos = self.position_history[person_id]
-                # Calculate displacement
-                dx = current_pos[0] - prev_pos[0]
-                dy = current_pos[1] - prev_pos[1]
-                
-                # Calculate velocity (distance per frame)
-                velocity = np.sqrt(dx**2 + dy**2)
-                velocities.append(velocity)
-                
-                # Calculate direction (angle in radians)
-                if velocity > 0:  # Avoid division by zero
-                    direction = np.arctan2(dy, dx)
-                    directions.append(direction)
-        
-        # Update histories
-        if velocities:
-            avg_velocity = np.mean(velocities)
-            self.velocity_history.append(avg_velocity)
-            
-            # Calculate acceleration (change in velocity)
-            if len(self.velocity_history) >= 2:
-                acceleration = abs(avg_velocity - self.velocity_history[-2])
-                self.acceleration_history.append(acceleration)
-        
-        if directions:
-            # Measure coherence of directions (variance)
-            avg_direction = np.mean(directions)
-            self.direction_history.append(avg_direction)
-        
-        # Update position history
-        self.position_history = current_positions
+        if state.keyframe_gray is None or state.frames_since_keyframe + 1 >= self.keyframe_interval:
+            return True
+        if self.keyframe_motion_threshold is not None:
+            return motion_score(state.keyframe_gray, state.tracking_gray) > self.keyframe_motion_threshold
+        return False
+    
+    def _infer_people(self, frame, model_tier=None, roi=None):
+        """Run YOLO on a frame and return (boxes, confidences) of the people found"""
+        return self.engine.infer_people(frame, model_tier or self.model_tier, roi)
+    
+    def infer_people_batch(self, frames, model_tier=None, rois=None):
+        """Run YOLO on several frames in one forward pass (see InferenceEngine.infer_people_batch)"""
+        if self.timings.is_bound():
+            return self.engine.infer_people_batch(frames, model_tier or self.model_tier, rois)
+        # Batches mix streams; their stages are reported under 'batch'
+        with self.timings.bind('batch'):
+            return self.engine.infer_people_batch(frames, model_tier or self.model_tier, rois)
     
     def get_output_layers(self, net):
         """Get output layers for YOLO"""
@@ -489,13 +583,14 @@ class CrowdDetector:
                     output_layers.append(layer_names[i])
             return output_layers
     
-    def _fallback_detection(self, frame):
+    def _fallback_detection(self, frame, state=None):
         """Fallback detection method using motion detection"""
-        if len(self.frame_history) < 2:
+        frame_history = (state or self.default_stream).frame_history
+        if len(frame_history) < 2:
             return 0
         
         # Get previous frame
-        prev_frame = self.frame_history[-2]
+        prev_frame = frame_history[-2]
         
         # Ensure both frames have the same size
         if prev_frame.shape != frame.shape:
@@ -559,14 +654,15 @@ class CrowdDetector:
         heatmap = cv2.GaussianBlur(heatmap, (15, 15), 0)
         return heatmap
     
-    def get_flow_directions(self, frame):
+    def get_flow_directions(self, frame, stream_id=None):
         """Analyze optical flow for movement directions"""
-        if len(self.frame_history) < 2:
+        frame_history = self.stream(stream_id).frame_history
+        if len(frame_history) < 2:
             return None
             
         # Get last two frames
-        prev_frame = self.frame_history[-2]
-        curr_frame = self.frame_history[-1]
+        prev_frame = frame_history[-2]
+        curr_frame = frame_history[-1]
         
         # Convert to grayscale
         prev_gray = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
@@ -603,8 +699,9 @@ class CrowdDetector:
             raise RuntimeError("Database not initialized properly")
         
         try:
-            self.db_cursor.execute("SELECT * FROM object_detections ORDER BY timestamp DESC LIMIT ?", (limit,))
-            return self.db_cursor.fetchall()
+            with self.db_lock:
+                self.db_cursor.execute("SELECT * FROM object_detections ORDER BY timestamp DESC LIMIT ?", (limit,))
+                return self.db_cursor.fetchall()
         except Exception as e:
             print(f"Error fetching detection history: {e}")
             return []
@@ -616,8 +713,9 @@ class CrowdDetector:
             raise RuntimeError("Database not initialized properly")
             
         try:
-            self.db_cursor.execute("SELECT * FROM stampede_incidents ORDER BY timestamp DESC LIMIT ?", (limit,))
-            return self.db_cursor.fetchall()
+            with self.db_lock:
+                self.db_cursor.execute("SELECT * FROM stampede_incidents ORDER BY timestamp DESC LIMIT ?", (limit,))
+                return self.db_cursor.fetchall()
         except Exception as e:
             print(f"Error fetching stampede incidents: {e}")
             return []
@@ -629,10 +727,11 @@ class CrowdDetector:
             raise RuntimeError("Database not initialized properly")
         
         try:
-            self.db_conn.execute("DELETE FROM object_detections")
-            self.db_conn.execute("DELETE FROM face_detections")
-            self.db_conn.execute("DELETE FROM stampede_incidents")
-            self.db_conn.commit()
+            with self.db_lock:
+                self.db_conn.execute("DELETE FROM object_detections")
+                self.db_conn.execute("DELETE FROM face_detections")
+                self.db_conn.execute("DELETE FROM stampede_incidents")
+                self.db_conn.commit()
         except Exception as e:
             print(f"Error resetting database: {e}")
     
@@ -644,8 +743,9 @@ class CrowdDetector:
         
         try:
             import csv
-            self.db_cursor.execute("SELECT * FROM object_detections")
-            rows = self.db_cursor.fetchall()
+            with self.db_lock:
+                self.db_cursor.execute("SELECT * FROM object_detections")
+                rows = self.db_cursor.fetchall()
             
             with open(filepath, 'w', newline='') as file:
                 writer = csv.writer(file)
@@ -664,8 +764,9 @@ class CrowdDetector:
             
         try:
             import csv
-            self.db_cursor.execute("SELECT * FROM stampede_incidents")
-            rows = self.db_cursor.fetchall()
+            with self.db_lock:
+                self.db_cursor.execute("SELECT * FROM stampede_incidents")
+                rows = self.db_cursor.fetchall()
             
             with open(filepath, 'w', newline='') as file:
                 writer = csv.writer(file)
@@ -678,5 +779,23 @@ class CrowdDetector:
     
     def close(self):
         """Close database connection"""
+        if getattr(self, 'engine', None) is not None:
+            self.engine.close()
         if hasattr(self, 'db_conn') and self.db_conn:
-            self.db_conn.close()
\ No newline at end of file
+            self.db_conn.close()
+
+
+def create_detector_from_config(config, db_path=None, default_tier=None):
+    """Create the CrowdDetector described by a Config class"""
+    return CrowdDetector(db_path or config.DATABASE_FILE, person_only=config.PERSON_ONLY_NMS,
+                         model_tiers=create_model_tiers_from_config(config, default_tier),
+                         keyframe_interval=config.KEYFRAME_INTERVAL,
+                         keyframe_motion_threshold=config.KEYFRAME_MOTION_THRESHOLD,
+                         motion_gate_threshold=config.MOTION_GATE_THRESHOLD,
+                         motion_gate_max_skip=config.MOTION_GATE_MAX_SKIP,
+                         tile_size=config.TILE_SIZE,
+                         tile_overlap=config.TILE_OVERLAP,
+                         tile_execution=config.TILE_EXECUTION,
+                         tile_workers=config.TILE_WORKERS,
+                         tile_full_frame=config.TILE_FULL_FRAME,
+                         timings=StageTimings(config.STAGE_TIMINGS, config.STAGE_TIMINGS_WINDOW))
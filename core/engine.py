@@ -0,0 +1,189 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from core.backends import create_model_tiers_from_config
+from core.postprocess import decode_yolo_outputs, select_people, split_batch_outputs
+from core.tiling import make_tiles
+from core.timing import StageTimings
+
+
+class InferenceEngine:
+    """Loaded YOLO model tiers plus the stateless detection pipeline around them.
+
+    The engine keeps no per-stream state, so one instance (and one copy of
+    the weights) can serve any number of cameras and videos from several
+    threads. Forward passes on a shared network are serialised with a lock
+    per backend; in tiled thread mode every worker thread owns its own
+    network instead. Stage latencies go to timings (a StageTimings), under
+    the stream bound to the calling thread.
+    """
+
+    def __init__(self, model_tiers, person_class_id=0, person_only=True, tile_size=None,
+                 tile_overlap=96, tile_execution='batch', tile_workers=4, tile_full_frame=True, timings=None):
+        if tile_execution not in ('batch', 'threads'):
+            raise ValueError(f"Unknown tile execution mode: {tile_execution}")
+        self.model_tiers = model_tiers
+        self.person_class_id = person_class_id
+        self.person_only = person_only  # Drop non-person candidates before a single NMS pass
+
+        # Tiled mode: run overlapping tile_size crops of the full resolution frame
+        # (plus the whole frame if tile_full_frame) as one batch or on a thread pool
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_execution = tile_execution
+        self.tile_workers = tile_workers
+        self.tile_full_frame = tile_full_frame
+        self.tile_pool = None
+        self.tile_backends = threading.local()
+
+        self.lock = threading.Lock()
+        self.backend_locks = {}  # id(backend) -> lock around its forward pass
+        self.timings = timings if timings is not None else StageTimings()
+
+    def load_model_tier(self, name=None):
+        """Load a model tier so it is ready to serve, returning the ModelTier"""
+        return self.model_tiers.load(name)
+
+    def infer_people(self, frame, model_tier=None, roi=None):
+        """Run YOLO on a frame and return (boxes, confidences) of the people found"""
+        return self.infer_people_batch([frame], model_tier, [roi])[0]
+
+    def infer_people_batch(self, frames, model_tier=None, rois=None):
+        """Run YOLO on several frames (e.g. one per stream) in one forward pass.
+
+        Every frame, or each of its tiles and region of interest rectangles,
+        becomes one image of a single cv2.dnn.blobFromImages batch. Returns a
+        (boxes, confidences) pair per frame, the same as each frame would get
+        on its own.
+        """
+        rois = rois or [None] * len(frames)
+        crops, owners = [], []
+        with self.timings.stage('resize'):
+            for index, (frame, roi) in enumerate(zip(frames, rois)):
+                frame_crops = self._frame_crops(frame, roi)
+                crops += frame_crops
+                owners += [index] * len(frame_crops)
+
+        tier = self.model_tiers.load(model_tier)
+        crop_outs = self._forward_crops([crop[0] for crop in crops], tier)
+
+        # Decode each crop in its own coordinates, then shift into its frame
+        candidates = [([], [], []) for _ in frames]
+        with self.timings.stage('decode'):
+            for (_, process_size, original_size, (x, y)), outs, index in zip(crops, crop_outs, owners):
+                boxes, confidences, class_ids = decode_yolo_outputs(outs, process_size, original_size,
+                                                                    conf_threshold=0.6)
+                boxes[:, 0] += x
+                boxes[:, 1] += y
+                for collected, values in zip(candidates[index], (boxes, confidences, class_ids)):
+                    collected.append(values)
+
+        results = []
+        with self.timings.stage('nms'):
+            for frame, roi, (all_boxes, all_confidences, all_class_ids) in zip(frames, rois, candidates):
+                if not all_boxes:
+                    results.append((np.zeros((0, 4), dtype=np.int32), np.zeros(0, dtype=np.float32)))
+                    continue
+                # NMS to remove duplicates (and merge people seen by several tiles)
+                boxes, confidences = select_people(
+                    np.concatenate(all_boxes), np.concatenate(all_confidences), np.concatenate(all_class_ids),
+                    self.person_class_id, score_threshold=0.6, nms_threshold=0.3, person_only=self.person_only)
+                if roi is not None:
+                    inside = roi.contains_boxes(boxes, frame.shape)
+                    boxes, confidences = boxes[inside], confidences[inside]
+                results.append((boxes, confidences))
+        return results
+
+    def _frame_crops(self, frame, roi=None):
+        """Images to run for one frame as (image, process_size, original_size, offset).
+
+        A plain frame is resized once; with a region of interest or in tiled
+        mode its rectangles are cut out at full resolution, split into
+        overlapping tiles (plus the whole region if tile_full_frame).
+        """
+        original_height, original_width = frame.shape[:2]
+        if roi is not None:
+            regions = roi.bounding_rects(frame.shape)
+        elif self.tile_size:
+            regions = [[0, 0, original_width, original_height]]
+        else:
+            # Process at a reasonable size for performance but not too small
+            process_width, process_height = 640, 480
+            process_frame = cv2.resize(frame, (process_width, process_height))
+            return [(process_frame, (process_width, process_height), (original_width, original_height), (0, 0))]
+
+        tiles = []
+        for region_x, region_y, region_w, region_h in regions:
+            if not self.tile_size:
+                tiles.append([region_x, region_y, region_w, region_h])
+                continue
+            region_tiles = make_tiles(region_w, region_h, self.tile_size, self.tile_overlap)
+            tiles += [[region_x + x, region_y + y, w, h] for x, y, w, h in region_tiles]
+            if self.tile_full_frame and len(region_tiles) > 1:
+                tiles.append([region_x, region_y, region_w, region_h])
+        return [(frame[y:y + h, x:x + w], (w, h), (w, h), (x, y)) for x, y, w, h in tiles]
+
+    def _forward_crops(self, crops, tier):
+        """Raw YOLO outputs of each crop, from one batched blob or the tile thread pool"""
+        if not crops:
+            return []
+        size = (tier.input_size, tier.input_size)
+        if self.tile_execution == 'threads' and self.model_tiers.can_create_backends and len(crops) > 1:
+            with self.lock:
+                if self.tile_pool is None:
+                    self.tile_pool = ThreadPoolExecutor(max_workers=self.tile_workers)
+            # Blobs are made on the tile threads, so their time counts as forward
+            with self.timings.stage('forward'):
+                return list(self.tile_pool.map(
+                    lambda crop: self._tile_backend(tier.name).forward(
+                        cv2.dnn.blobFromImage(crop, 1 / 255.0, size, swapRB=True, crop=False)),
+                    crops))
+        with self.timings.stage('blob'):
+            blob = cv2.dnn.blobFromImages(crops, 1 / 255.0, size, swapRB=True, crop=False)
+        with self._backend_lock(tier.backend):
+            with self.timings.stage('forward'):
+                outs = tier.backend.forward(blob)
+        return split_batch_outputs(outs, len(crops))
+
+    def _backend_lock(self, backend):
+        """Lock serialising forward passes on a shared backend"""
+        with self.lock:
+            return self.backend_locks.setdefault(id(backend), threading.Lock())
+
+    def _tile_backend(self, tier_name):
+        """Backend owned by the calling tile worker thread (networks are not thread safe)"""
+        backends = getattr(self.tile_backends, 'by_tier', None)
+        if backends is None:
+            backends = self.tile_backends.by_tier = {}
+        if tier_name not in backends:
+            backends[tier_name] = self.model_tiers.create_backend(tier_name)
+        return backends[tier_name]
+
+    def close(self):
+        """Stop the tile worker threads"""
+        if self.tile_pool is not None:
+            self.tile_pool.shutdown(wait=False)
+            self.tile_pool = None
+
+
+def create_engine_from_config(config, default_tier=None, timings=None):
+    """Create the InferenceEngine described by a Config class"""
+    person_class_id = 0
+    names_path = os.path.join(config.BASE_DIR, "coco.names")
+    if os.path.exists(names_path):
+        with open(names_path, "r") as f:
+            classes = f.read().strip().split("\n")
+        if "person" in classes:
+            person_class_id = classes.index("person")
+    return InferenceEngine(create_model_tiers_from_config(config, default_tier), person_class_id,
+                           person_only=config.PERSON_ONLY_NMS,
+                           tile_size=config.TILE_SIZE,
+                           tile_overlap=config.TILE_OVERLAP,
+                           tile_execution=config.TILE_EXECUTION,
+                           tile_workers=config.TILE_WORKERS,
+                           tile_full_frame=config.TILE_FULL_FRAME,
+                           timings=timings)
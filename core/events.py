@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from collections import deque
+
+
+class EventHub:
+    """Push channel for dashboard updates (served as Server-Sent Events).
+
+    Two kinds of updates are published:
+
+    - state (e.g. detection stats): a dict whose top-level keys are
+      versioned separately. A subscriber receives only the keys that
+      changed since its last message, so skipped updates are merged
+      instead of queued.
+    - events (e.g. stampede incidents): every event published after a
+      subscriber connected is delivered, from a log of the last
+      history_size events. Earlier events are not replayed; clients load
+      the history separately.
+
+    Each subscriber is sent at most max_rate messages per second; updates
+    arriving faster are coalesced into the next message.
+    """
+
+    def __init__(self, max_rate=5.0, history_size=100):
+        self.max_rate = max_rate
+        self.condition = threading.Condition()
+        self.version = 0
+        self.states = {}  # name -> {key: value}
+        self.key_versions = {}  # name -> {key: version of its last change}
+        self.log = deque(maxlen=history_size)  # (version, name, data)
+        self.subscribers = 0
+        self.stats = {'published': 0, 'unchanged': 0, 'messages': 0}
+
+    def publish_state(self, name, state):
+        """Record a new value of a state; returns the changed keys (empty when nothing changed)"""
+        with self.condition:
+            current = self.states.setdefault(name, {})
+            versions = self.key_versions.setdefault(name, {})
+            changed = [key for key, value in state.items() if key not in current or current[key] != value]
+            if not changed:
+                self.stats['unchanged'] += 1
+                return []
+            self.version += 1
+            for key in changed:
+                current[key] = state[key]
+                versions[key] = self.version
+            self.stats['published'] += 1
+            self.condition.notify_all()
+            return changed
+
+    def publish_event(self, name, data):
+        """Append an event that every subscriber receives"""
+        with self.condition:
+            self.version += 1
+            self.log.append((self.version, name, data))
+            self.stats['published'] += 1
+            self.condition.notify_all()
+
+    def updates_since(self, last_version, events_since=None):
+        """Return (version, [(name, data), ...]) of everything newer than last_version.
+
+        States come first as deltas; with last_version 0 they are complete.
+        Events are those newer than events_since (default last_version).
+        """
+        if events_since is None:
+            events_since = last_version
+        with self.condition:
+            updates = []
+            for name, versions in self.key_versions.items():
+                delta = {key: self.states[name][key] for key, version in versions.items() if version > last_version}
+                if delta:
+                    updates.append((name, delta))
+            updates.extend((name, data) for version, name, data in self.log if version > events_since)
+            return self.version, updates
+
+    def subscribe(self, heartbeat=15.0):
+        """Return a generator of lists of (name, data) updates for one subscriber.
+
+        The first list holds the complete current states and the events
+        published since subscribe() was called. An empty list is yielded
+        after heartbeat seconds without updates so the server notices
+        disconnected clients.
+        """
+        with self.condition:
+            start_version = self.version
+        return self._subscription(start_version, heartbeat)
+
+    def _subscription(self, start_version, heartbeat):
+        interval = 1.0 / self.max_rate if self.max_rate else 0
+        with self.condition:
+            self.subscribers += 1
+        try:
+            last_version = 0
+            events_since = start_version
+            next_time = 0
+            while True:
+                delay = next_time - time.time()
+                if delay > 0:
+                    time.sleep(delay)  # Coalesce updates arriving faster than max_rate
+                with self.condition:
+                    self.condition.wait_for(lambda: self.version > last_version, heartbeat)
+                last_version, updates = self.updates_since(last_version, events_since)
+                events_since = last_version
+                if updates:
+                    with self.condition:
+                        self.stats['messages'] += 1
+                    next_time = time.time() + interval
+                yield updates
+        finally:
+            with self.condition:
+                self.subscribers -= 1
+
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats['subscribers'] = self.subscribers
+            stats['version'] = self.version
+        return stats
+
+
+def format_sse(updates):
+    """Server-Sent Events text for a list of (name, data) updates, or a keep-alive comment"""
+    if not updates:
+        return ": keep-alive\n\n"
+    return "".join(f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n" for name, data in updates)
@@ -0,0 +1,225 @@
+import heapq
+import itertools
+import os
+import shutil
+import threading
+import time
+import uuid
+
+FINISHED_STATES = ('completed', 'failed', 'cancelled')
+
+
+class Job:
+    """One video analysis request: its video, parameters, state and results file"""
+
+    def __init__(self, job_id, video_path, directory, name=None, priority=0, params=None, owns_video=False):
+        self.id = job_id
+        self.video_path = video_path
+        self.directory = directory
+        self.output_path = os.path.join(directory, 'results.jsonl')
+        self.name = name or os.path.basename(video_path)
+        self.priority = priority
+        self.params = dict(params or {})
+        self.owns_video = owns_video  # The video is deleted with the job
+        self.state = 'queued'
+        self.error = None
+        self.analyzer = None
+        self.cancel_requested = False
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'state': self.state,
+            'priority': self.priority,
+            'params': self.params,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error,
+            'results_available': os.path.exists(self.output_path) and self.state == 'completed',
+            'progress': self.analyzer.get_status() if self.analyzer is not None else None,
+        }
+
+
+class JobManager:
+    """Runs video analysis jobs from a priority queue on a bounded number of worker threads.
+
+    analyzer_factory(job) returns an unstarted analyzer (OfflineAnalyzer or
+    SegmentedAnalyzer) writing to job.output_path. Higher priorities run
+    first, equal priorities in submission order. At most max_queued jobs
+    wait; the last history_size finished jobs keep their results, older
+    ones are deleted together with their directory.
+    """
+
+    def __init__(self, analyzer_factory, directory, workers=1, max_queued=100, history_size=100):
+        self.analyzer_factory = analyzer_factory
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.history_size = history_size
+        self.condition = threading.Condition()
+        self.queue = []  # Heap of (-priority, order, job); cancelled jobs are skipped when popped
+        self.order = itertools.count()
+        self.jobs = {}
+        self.finished = []  # Finished job ids, oldest first
+        self.threads = []
+        self.closed = False
+        self.submitted = 0
+
+    def upload_path(self, filename):
+        """Unique path for an uploaded video that will be submitted with owns_video=True"""
+        uploads = os.path.join(self.directory, 'uploads')
+        os.makedirs(uploads, exist_ok=True)
+        return os.path.join(uploads, f"{uuid.uuid4().hex[:12]}_{os.path.basename(filename) or 'video'}")
+
+    def submit(self, video_path, name=None, priority=0, owns_video=False, **params):
+        """Queue a video for analysis and return its Job
+
+        Raises RuntimeError when the queue is full or the manager is shut down.
+        """
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Job manager is shut down")
+            if self._queued_count() >= self.max_queued:
+                raise RuntimeError(f"Job queue is full ({self.max_queued} jobs waiting)")
+            job_id = uuid.uuid4().hex[:12]
+            directory = os.path.join(self.directory, job_id)
+            os.makedirs(directory, exist_ok=True)
+            job = Job(job_id, video_path, directory, name, priority, params, owns_video)
+            self.jobs[job_id] = job
+            heapq.heappush(self.queue, (-priority, next(self.order), job))
+            self.submitted += 1
+            self._start_workers()
+            self.condition.notify()
+        return job
+
+    def uses_video(self, video_path):
+        """True while a queued or running job reads video_path"""
+        with self.condition:
+            return any(job.video_path == video_path and job.state not in FINISHED_STATES
+                       for job in self.jobs.values())
+
+    def get(self, job_id):
+        with self.condition:
+            return self.jobs.get(job_id)
+
+    def get_status(self, job_id):
+        """Job as a dict, with its queue position while queued, or None if unknown"""
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            status = job.to_dict()
+            status['position'] = self._position(job)
+        return status
+
+    def list(self):
+        """All known jobs as dicts, newest first"""
+        with self.condition:
+            jobs = sorted(self.jobs.values(), key=lambda job: job.created, reverse=True)
+            return [dict(job.to_dict(), position=self._position(job)) for job in jobs]
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the Job, or None if unknown"""
+        analyzer = None
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == 'queued':
+                job.state = 'cancelled'
+                job.finished = time.time()
+                self._finish(job)
+            elif job.state == 'running':
+                job.cancel_requested = True
+                analyzer = job.analyzer
+        if analyzer is not None:
+            analyzer.cancel()
+        return job
+
+    def get_stats(self):
+        with self.condition:
+            states = [job.state for job in self.jobs.values()]
+            stats = {state: states.count(state) for state in ('queued', 'running') + FINISHED_STATES}
+            stats.update({'workers': self.workers, 'max_queued': self.max_queued, 'submitted': self.submitted})
+        return stats
+
+    def shutdown(self, timeout=5):
+        """Stop taking jobs, cancel the running ones and wait for the workers"""
+        with self.condition:
+            self.closed = True
+            running = [job.analyzer for job in self.jobs.values() if job.state == 'running' and job.analyzer]
+            self.condition.notify_all()
+        for analyzer in running:
+            analyzer.cancel()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _start_workers(self):
+        self.threads = [thread for thread in self.threads if thread.is_alive()]
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"analysis-job-{len(self.threads)}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _queued_count(self):
+        return sum(1 for _, _, job in self.queue if job.state == 'queued')
+
+    def _position(self, job):
+        """1-based place in the queue of a queued job"""
+        if job.state != 'queued':
+            return None
+        waiting = sorted(entry for entry in self.queue if entry[2].state == 'queued')
+        return 1 + [entry[2] for entry in waiting].index(job)
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.closed and not self.queue:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                _, _, job = heapq.heappop(self.queue)
+                if job.state != 'queued':
+                    continue  # Cancelled while it waited
+                job.state = 'running'
+                job.started = time.time()
+
+            state, error = self._run(job)
+            with self.condition:
+                job.state = state
+                job.error = error
+                job.finished = time.time()
+                self._finish(job)
+
+    def _run(self, job):
+        try:
+            analyzer = self.analyzer_factory(job)
+            analyzer.start()
+            with self.condition:
+                job.analyzer = analyzer
+                cancel = job.cancel_requested or self.closed
+            if cancel:
+                analyzer.cancel()
+            analyzer.join()
+            status = analyzer.get_status()
+        except Exception as e:
+            print(f"Error in analysis job {job.id}: {e}")
+            return 'failed', str(e)
+        state = status['state'] if status['state'] in FINISHED_STATES else 'failed'
+        return state, status['error']
+
+    def _finish(self, job):
+        # Keep the results of the last history_size finished jobs
+        self.finished.append(job.id)
+        while len(self.finished) > self.history_size:
+            old = self.jobs.pop(self.finished.pop(0), None)
+            if old is None:
+                continue
+            shutil.rmtree(old.directory, ignore_errors=True)
+            if old.owns_video and os.path.exists(old.video_path):
+                os.remove(old.video_path)
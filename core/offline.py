@@ -0,0 +1,296 @@
+import json
+import math
+import os
+import threading
+import time
+import cv2
+
+from core.overlay import overlay_metadata
+from core.pipeline import Pipeline, Stage
+
+
+def frame_record(index, video_fps, frame_shape, result, incident=False):
+    """Results file line of one analysed frame: index, video time, count, risk and boxes"""
+    _, people_count, _, risk = result
+    return {
+        'frame': index,
+        'time': round(index / video_fps, 3) if video_fps > 0 else None,
+        'people_count': people_count,
+        'risk_level': risk.get('level'),
+        'risk_score': round(float(risk.get('score', 0.0)), 3),
+        'incident': incident,
+        'boxes': overlay_metadata(index, frame_shape, result)['boxes'],
+    }
+
+
+class OfflineAnalyzer:
+    """Analyses a recorded video as fast as possible, writing one JSON line per analysed frame.
+
+    Unlike live playback nothing is paced to the video FPS: a decode thread
+    feeds a blocking pipeline (plan -> infer -> analyze -> write), so every
+    sampled frame is analysed and the run is bounded only by the cores.
+    With sample_every N only every Nth frame is decoded and analysed; the
+    others are skipped with grab(). max_fps (a number, or a callable read
+    before each frame) caps the analysis rate, e.g. to leave inference
+    capacity to live cameras. Progress and ETA come from get_status().
+
+    source_complete, a callable returning True once the video is fully
+    written, lets the analysis start on the prefix of a file that is still
+    being uploaded: at the end of the data the file is reopened at the
+    first frame not yet analysed whenever it has grown. While the file
+    grows, each frame is held back until the frame after it decoded, so a
+    half-written last frame is never analysed. If the file stops growing
+    for idle_timeout seconds before it is complete (an abandoned upload),
+    or source_complete raises, the analysis fails.
+    """
+
+    def __init__(self, detector, video_path, output_path, sample_every=1, stream_id='offline',
+                 model_tier=None, roi=None, infer=None, infer_workers=1, queue_size=8, persist=True,
+                 max_fps=None, source_complete=None, poll_interval=0.5, idle_timeout=None):
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.detector = detector
+        self.video_path = video_path
+        self.output_path = output_path
+        self.sample_every = sample_every
+        self.stream_id = stream_id
+        self.model_tier = model_tier
+        self.roi = roi
+        self.infer = infer  # Callable like detector._infer_people, e.g. a worker pool's infer
+        self.infer_workers = infer_workers
+        self.queue_size = queue_size
+        self.persist = persist
+        self.max_fps = max_fps
+        self.source_complete = source_complete
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+        self.state = 'pending'
+        self.error = None
+        self.total_frames = 0
+        self.video_fps = 0.0
+        self.decoded = 0
+        self.processed = 0
+        self.incidents = 0
+        self.last_frame = -1
+        self.start_time = None
+        self.end_time = None
+        self.pipeline = None
+        self.thread = None
+        self.output = None
+
+    def start(self):
+        """Open the video and start analysing it in the background"""
+        capture = cv2.VideoCapture(self.video_path)
+        if not capture.isOpened() and self.source_complete is not None:
+            capture = self._open_prefix()
+        if not capture.isOpened():
+            raise RuntimeError(f"Failed to open video file {self.video_path}")
+        self.total_frames = max(0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.video_fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.output = open(self.output_path, 'w')
+        self.detector.remove_stream(self.stream_id)
+
+        self.pipeline = Pipeline(self._frames(capture), [
+            Stage('plan', self._plan, queue_size=self.queue_size),
+            Stage('infer', self._infer, workers=self.infer_workers, queue_size=self.queue_size),
+            Stage('analyze', self._analyze, queue_size=self.queue_size),
+            Stage('write', self._write, queue_size=self.queue_size),
+        ], name=f"offline-{self.stream_id}")
+        with self.lock:
+            self.state = 'running'
+            self.start_time = time.time()
+        self.pipeline.start()
+        self.thread = threading.Thread(target=self._wait, name=f"offline-{self.stream_id}", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Analyse the whole video and return the final status"""
+        self.start()
+        self.join()
+        return self.get_status()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def cancel(self):
+        with self.lock:
+            if self.state != 'running':
+                return
+            self.state = 'cancelled'
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+    def is_running(self):
+        with self.lock:
+            return self.state == 'running'
+
+    def get_status(self):
+        """Progress of the analysis: frames, percent done, analysis speed and ETA"""
+        with self.lock:
+            elapsed = ((self.end_time or time.time()) - self.start_time) if self.start_time else 0.0
+            expected = math.ceil(self.total_frames / self.sample_every) if self.total_frames else None
+            status = {
+                'state': self.state,
+                'video': self.video_path,
+                'output': self.output_path,
+                'sample_every': self.sample_every,
+                'total_frames': self.total_frames,
+                'decoded_frames': self.decoded,
+                'analyzed_frames': self.processed,
+                'expected_frames': expected,
+                'incidents': self.incidents,
+                'elapsed_seconds': round(elapsed, 2),
+                'fps': round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+                'percent': None,
+                'eta_seconds': None,
+                'realtime_factor': None,
+                'error': self.error,
+            }
+            if expected:
+                status['percent'] = round(min(100.0, 100.0 * self.processed / expected), 1)
+                if self.state == 'running' and self.processed > 0:
+                    status['eta_seconds'] = round(max(0, expected - self.processed) * elapsed / self.processed, 1)
+            if self.video_fps > 0 and elapsed > 0 and self.last_frame >= 0:
+                # Seconds of video analysed per second of wall time
+                status['realtime_factor'] = round((self.last_frame + 1) / self.video_fps / elapsed, 2)
+        if self.pipeline is not None:
+            status['pipeline'] = self.pipeline.get_stats()
+        return status
+
+    def _frames(self, capture):
+        """Decode stage: every sample_every-th frame, as fast as the pipeline accepts them"""
+        index = 0
+        pending = None  # Last sampled frame, held back while the file still grows
+        final = self.source_complete is None
+        try:
+            while self.is_running():
+                if index % self.sample_every:
+                    ok, frame = capture.grab(), None  # Skipped frames are not decoded
+                else:
+                    ok, frame = capture.read()
+                if not ok:
+                    if final:
+                        break
+                    # Out of data: continue from the first frame not known to be whole
+                    resume = pending[0] if pending is not None else index
+                    capture.release()
+                    capture, final = self._resume(resume)
+                    if capture is None:
+                        break
+                    index, pending = resume, None
+                    continue
+                if pending is not None:
+                    yield self._deliver(*pending)
+                    pending = None
+                if frame is not None:
+                    if final:
+                        yield self._deliver(index, frame)
+                    else:
+                        pending = (index, frame)
+                index += 1
+        finally:
+            capture.release()
+
+    def _deliver(self, index, frame):
+        limit = self.max_fps() if callable(self.max_fps) else self.max_fps
+        if limit:
+            delay = self.next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time = max(self.next_time, time.time()) + 1.0 / limit
+        with self.lock:
+            self.decoded += 1
+        return {'index': index, 'frame': frame}
+
+    def _open_prefix(self):
+        """Wait until enough of a growing file is written to open it"""
+        capture = cv2.VideoCapture(self.video_path)
+        while not capture.isOpened() and not self.source_complete() and self.is_running():
+            time.sleep(self.poll_interval)
+            capture = cv2.VideoCapture(self.video_path)
+        return capture
+
+    def _resume(self, index):
+        """Reopen a growing file at frame index once more data arrived
+
+        Returns (capture, complete), or (None, True) when nothing more can be
+        read. Raises RuntimeError when the file stopped growing for idle_timeout.
+        """
+        size = os.path.getsize(self.video_path)
+        last_growth = time.time()
+        while self.is_running():
+            complete = self.source_complete()
+            grown = os.path.getsize(self.video_path)
+            if grown == size and not complete:
+                if self.idle_timeout is not None and time.time() - last_growth > self.idle_timeout:
+                    raise RuntimeError(f"No new data for {self.idle_timeout}s; the upload was abandoned")
+                time.sleep(self.poll_interval)
+                continue
+            size = grown
+            last_growth = time.time()
+            capture = cv2.VideoCapture(self.video_path)
+            if capture.isOpened():
+                if index:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+                position = int(capture.get(cv2.CAP_PROP_POS_FRAMES))
+                while position < index and capture.grab():
+                    position += 1
+                if position == index:
+                    if complete:
+                        with self.lock:
+                            self.total_frames = max(self.total_frames, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+                    return capture, complete
+            capture.release()
+            if complete:
+                return None, True
+        return None, True
+
+    def _plan(self, item):
+        item['plan'] = self.detector.plan_frame(item['frame'], stream_id=self.stream_id)
+        return item
+
+    def _infer(self, item):
+        if item['plan']['keyframe']:
+            infer = self.infer or self.detector._infer_people
+            with self.detector.timings.bind(self.stream_id):
+                item['people'] = infer(item['frame'], self.model_tier, self.roi or self.detector.roi)
+        return item
+
+    def _analyze(self, item):
+        item['result'], records = self.detector.finish_frame(item['frame'], item['plan'], item.get('people'),
+                                                             self.roi, stream_id=self.stream_id)
+        if self.persist:
+            self.detector.persist(records, self.stream_id)
+        item['incident'] = any(table == 'stampede_incidents' for table, _ in records)
+        return item
+
+    def _write(self, item):
+        index = item['index']
+        record = frame_record(index, self.video_fps, item['frame'].shape, item['result'], item['incident'])
+        self.output.write(json.dumps(record) + '\n')
+        with self.lock:
+            self.processed += 1
+            self.last_frame = index
+            if item['incident']:
+                self.incidents += 1
+        return None
+
+    def _wait(self):
+        self.pipeline.join()
+        self.output.close()
+        self.detector.remove_stream(self.stream_id)
+        stats = self.pipeline.get_stats()
+        errors = sum(stage['errors'] for stage in stats['stages'].values())
+        with self.lock:
+            self.end_time = time.time()
+            if self.state == 'running' and self.pipeline.source_error is not None:
+                # The results file stops where reading failed
+                self.state = 'failed'
+                self.error = f"Reading the video failed after {self.decoded} frames: {self.pipeline.source_error}"
+            elif self.state == 'running':
+                self.state = 'completed'
+                if errors:
+                    self.error = f"{errors} frames failed"
@@ -0,0 +1,32 @@
+def overlay_metadata(seq, frame_shape, result=None, stream=None):
+    """Compact description of what to draw over a broadcast frame.
+
+    seq is the frame's FrameBroadcaster sequence number, so clients can
+    match the overlay to the picture. Boxes are [x, y, w, h, confidence,
+    tracked] and faces [x, y, w, h], in pixels of the original frame
+    (width x height); the client scales them to the displayed size.
+    result is detect_crowd's (frame, people_count, detections, risk).
+    """
+    height, width = frame_shape[:2]
+    metadata = {
+        'seq': seq,
+        'stream': stream,
+        'width': width,
+        'height': height,
+        'people_count': 0,
+        'boxes': [],
+        'faces': [],
+        'risk': {'level': 'LOW', 'score': 0.0},
+    }
+    if result is None:
+        return metadata
+
+    _, people_count, detections, risk = result
+    metadata['people_count'] = people_count
+    for detection in detections:
+        metadata['boxes'].append([int(detection['x']), int(detection['y']), int(detection['w']), int(detection['h']),
+                                  round(float(detection['confidence']), 2), 1 if detection.get('tracked') else 0])
+        for face in detection.get('faces', []):
+            metadata['faces'].append([int(face['x']), int(face['y']), int(face['w']), int(face['h'])])
+    metadata['risk'] = {'level': risk.get('level', 'LOW'), 'score': round(float(risk.get('score', 0.0)), 3)}
+    return metadata
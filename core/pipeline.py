@@ -0,0 +1,210 @@
+import threading
+from collections import deque
+
+_CLOSED = object()
+
+
+class BoundedQueue:
+    """FIFO queue with a capacity and a backpressure policy.
+
+    With 'block' put() waits for space; with 'drop_oldest' the oldest item
+    is discarded to make room, so a slow stage always works on recent
+    frames. Once closed, get() drains the remaining items and then returns
+    the closed marker.
+    """
+
+    POLICIES = ('block', 'drop_oldest')
+
+    def __init__(self, capacity, policy='block'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        if capacity < 1:
+            raise ValueError("Queue capacity must be at least 1")
+        self.capacity = capacity
+        self.policy = policy
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Add an item; returns False if the queue was closed"""
+        with self.condition:
+            if self.policy == 'block':
+                self.condition.wait_for(lambda: self.closed or len(self.items) < self.capacity)
+            elif len(self.items) >= self.capacity:
+                self.items.popleft()
+                self.dropped += 1
+            if self.closed:
+                return False
+            self.items.append(item)
+            self.condition.notify_all()
+            return True
+
+    def get(self):
+        """Take the oldest item, waiting for one; returns the closed marker when drained"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.closed or self.items)
+            if not self.items:
+                return _CLOSED
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self, discard=False):
+        with self.condition:
+            self.closed = True
+            if discard:
+                self.items.clear()
+            self.condition.notify_all()
+
+    def depth(self):
+        with self.condition:
+            return len(self.items)
+
+
+class Stage:
+    """One pipeline step: func(item) returns the item for the next stage, or None to drop it.
+
+    workers threads run func concurrently. An ordered stage hands its
+    results on in the order its items arrived, so a stateful stage after
+    a multi-worker one still sees frames in sequence. policy applies to
+    the stage's input queue of queue_size items.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=4, policy='block', ordered=True):
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least 1 worker")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = BoundedQueue(queue_size, policy)
+        self.ordered = ordered
+        self.take_lock = threading.Lock()
+        self.order_lock = threading.Lock()
+        self.arrivals = deque()  # Sequence numbers in arrival order (ordered stages)
+        self.done = {}  # Finished results waiting for their turn
+        self.running_workers = 0
+        self.stats = {'processed': 0, 'errors': 0}
+
+
+class Pipeline:
+    """Runs a frame source through a chain of stages on separate threads.
+
+    The source is an iterable (e.g. a generator reading a camera); its
+    items flow through the stages' bounded queues, so decoding, inference,
+    post-processing, persistence and encoding of different frames overlap.
+    The pipeline ends when the source is exhausted and every stage has
+    drained, or when stop() is called. An exception raised by the source
+    also ends it, and is kept in source_error.
+    """
+
+    def __init__(self, source, stages, name='pipeline'):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.source = source
+        self.stages = list(stages)
+        self.name = name
+        self.threads = []
+        self.stopping = False
+        self.produced = 0
+        self.source_error = None
+
+    def start(self):
+        for index, stage in enumerate(self.stages):
+            stage.running_workers = stage.workers
+            for worker in range(stage.workers):
+                thread = threading.Thread(target=self._run_stage, args=(index,),
+                                          name=f"{self.name}-{stage.name}-{worker}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        source_thread = threading.Thread(target=self._run_source, name=f"{self.name}-source", daemon=True)
+        source_thread.start()
+        self.threads.append(source_thread)
+
+    def stop(self):
+        """Stop reading the source and discard frames still in flight"""
+        self.stopping = True
+        for stage in self.stages:
+            stage.queue.close(discard=True)
+
+    def join(self, timeout=None):
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    def get_stats(self):
+        """Per-stage queue depth, capacity, drops and processed counts"""
+        stages = {}
+        for stage in self.stages:
+            stages[stage.name] = {
+                'depth': stage.queue.depth(),
+                'capacity': stage.queue.capacity,
+                'dropped': stage.queue.dropped,
+                'workers': stage.workers,
+                'processed': stage.stats['processed'],
+                'errors': stage.stats['errors'],
+            }
+        return {'produced': self.produced, 'source_error': str(self.source_error) if self.source_error else None,
+                'stages': stages}
+
+    def _run_source(self):
+        first = self.stages[0].queue
+        try:
+            for item in self.source:
+                if self.stopping:
+                    break
+                if item is None:
+                    continue
+                if not first.put((self.produced, item)):
+                    break
+                self.produced += 1
+        except Exception as e:
+            print(f"Error in {self.name} source: {e}")
+            self.source_error = e
+        finally:
+            first.close()
+
+    def _run_stage(self, index):
+        stage = self.stages[index]
+        next_queue = self.stages[index + 1].queue if index + 1 < len(self.stages) else None
+        while True:
+            with stage.take_lock:
+                entry = stage.queue.get()
+                if entry is _CLOSED:
+                    break
+                seq, item = entry
+                if stage.ordered:
+                    with stage.order_lock:
+                        stage.arrivals.append(seq)
+
+            try:
+                result = stage.func(item)
+                counter = 'processed'
+            except Exception as e:
+                print(f"Error in {self.name} stage {stage.name}: {e}")
+                result = None
+                counter = 'errors'
+
+            with stage.order_lock:
+                stage.stats[counter] += 1
+            if stage.ordered:
+                with stage.order_lock:
+                    stage.done[seq] = result
+                    while stage.arrivals and stage.arrivals[0] in stage.done:
+                        ready_seq = stage.arrivals.popleft()
+                        ready = stage.done.pop(ready_seq)
+                        if ready is not None and next_queue is not None:
+                            next_queue.put((ready_seq, ready))
+            elif result is not None and next_queue is not None:
+                next_queue.put((seq, result))
+
+        # The last worker to finish closes the next stage's input
+        with stage.order_lock:
+            stage.running_workers -= 1
+            last = stage.running_workers == 0
+        if last and next_queue is not None:
+            next_queue.close()
@@ -0,0 +1,128 @@
+import cv2
+import numpy as np
+
+
+def decode_yolo_outputs(outs, process_size, original_size, conf_threshold=0.6):
+    """Decode raw YOLO output layers into boxes, scores and class ids.
+
+    All rows of all output layers are handled as one array, so the cost no
+    longer grows with a Python loop over the ~10k candidate rows per frame.
+
+    Args:
+        outs: list of YOLO output arrays, each of shape (rows, 5 + classes)
+        process_size: (width, height) of the frame the blob was built from
+        original_size: (width, height) of the frame boxes are mapped back to
+        conf_threshold: minimum class score for a row to be kept
+
+    Returns:
+        (boxes, scores, class_ids) where boxes is an int32 array of
+        [x, y, w, h] rows in original frame coordinates, scores is float32
+        and class_ids is int32.
+    """
+    empty = (np.zeros((0, 4), dtype=np.int32),
+             np.zeros(0, dtype=np.float32),
+             np.zeros(0, dtype=np.int32))
+    if not outs:
+        return empty
+
+    detections = np.concatenate([np.asarray(out).reshape(-1, out.shape[-1]) for out in outs])
+
+    # Darknet region layers scale class scores by objectness, so rows whose
+    # objectness is below the threshold can never pass the class score check
+    detections = detections[detections[:, 4] > conf_threshold]
+    if len(detections) == 0:
+        return empty
+
+    class_scores = detections[:, 5:]
+    class_ids = np.argmax(class_scores, axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+    keep = scores > conf_threshold
+    if not np.any(keep):
+        return empty
+    detections, class_ids, scores = detections[keep], class_ids[keep], scores[keep]
+
+    process_width, process_height = process_size
+    original_width, original_height = original_size
+    width_scale = original_width / process_width
+    height_scale = original_height / process_height
+
+    # Box geometry in process frame pixels (truncated like int() would)
+    center_x = np.trunc(detections[:, 0] * np.float32(process_width))
+    center_y = np.trunc(detections[:, 1] * np.float32(process_height))
+    w = np.trunc(detections[:, 2] * np.float32(process_width)).astype(np.float64)
+    h = np.trunc(detections[:, 3] * np.float32(process_height)).astype(np.float64)
+    x = np.trunc(center_x - w / 2)
+    y = np.trunc(center_y - h / 2)
+
+    # Scale back to original frame size
+    x = np.round(x * width_scale)
+    y = np.round(y * height_scale)
+    w = np.round(w * width_scale)
+    h = np.round(h * height_scale)
+
+    # Ensure bounding boxes are within frame bounds
+    x = np.clip(x, 0, original_width - 1)
+    y = np.clip(y, 0, original_height - 1)
+    w = np.clip(w, 1, original_width - x)
+    h = np.clip(h, 1, original_height - y)
+
+    boxes = np.stack([x, y, w, h], axis=1).astype(np.int32)
+    return boxes, scores.astype(np.float32), class_ids.astype(np.int32)
+
+
+def split_batch_outputs(outs, batch_size):
+    """Split the outputs of a batched forward pass into per-image output lists.
+
+    cv2.dnn returns (batch, rows, 5 + classes) arrays for batches and
+    (rows, 5 + classes) arrays for a single image.
+    """
+    per_image = [[] for _ in range(batch_size)]
+    for out in outs:
+        out = np.asarray(out)
+        if out.ndim == 2:
+            out = out.reshape(batch_size, -1, out.shape[-1])
+        for i in range(batch_size):
+            per_image[i].append(out[i])
+    return per_image
+
+
+def nms_indices(boxes, scores, score_threshold, nms_threshold):
+    """Run cv2.dnn.NMSBoxes and return kept indices as a flat int array.
+
+    Depending on the OpenCV version NMSBoxes returns an (N, 1) array, a flat
+    array or an empty tuple; this always gives a 1-D array of ints.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.intp)
+    indices = cv2.dnn.NMSBoxes(np.asarray(boxes).tolist(), np.asarray(scores, dtype=np.float32).tolist(),
+                               score_threshold, nms_threshold)
+    return np.asarray(indices, dtype=np.intp).reshape(-1)
+
+
+def select_people(boxes, scores, class_ids, person_class_id=0, score_threshold=0.6,
+                  nms_threshold=0.3, person_only=True):
+    """Reduce decoded candidates to non-overlapping person boxes.
+
+    With person_only, non-person candidates are dropped by class id and a
+    single NMS pass is run. Otherwise NMS runs over all classes, the person
+    boxes are kept and a second NMS pass is applied to them (the original
+    detect_crowd behaviour).
+
+    Returns:
+        (boxes, scores) of the kept person detections, highest score first.
+    """
+    boxes = np.asarray(boxes).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32)
+    class_ids = np.asarray(class_ids)
+
+    if person_only:
+        is_person = class_ids == person_class_id
+        boxes, scores = boxes[is_person], scores[is_person]
+        keep = nms_indices(boxes, scores, score_threshold, nms_threshold)
+        return boxes[keep], scores[keep]
+
+    keep = nms_indices(boxes, scores, score_threshold, nms_threshold)
+    keep = keep[class_ids[keep] == person_class_id]
+    boxes, scores = boxes[keep], scores[keep]
+    keep = nms_indices(boxes, scores, score_threshold, nms_threshold)
+    return boxes[keep], scores[keep]
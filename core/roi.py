@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+
+class RegionOfInterest:
+    """Walkable area of a camera view, made of one or more polygons.
+
+    Polygons are lists of (x, y) points in normalised [0, 1] frame
+    coordinates so the same configuration works at any resolution. The
+    pixel mask, bounding rectangles and area are computed once per frame
+    size and cached.
+    """
+
+    def __init__(self, polygons):
+        self.polygons = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in polygons]
+        if not self.polygons or any(len(polygon) < 3 for polygon in self.polygons):
+            raise ValueError("A region of interest needs polygons with at least 3 points")
+        self._cache = {}
+
+    def _geometry(self, shape):
+        """(mask, rects, area) for a frame shape"""
+        height, width = shape[:2]
+        geometry = self._cache.get((height, width))
+        if geometry is None:
+            scale = np.array([width, height], dtype=np.float64)
+            points = [np.round(polygon * scale).astype(np.int32) for polygon in self.polygons]
+            mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.fillPoly(mask, points, 255)
+
+            rects = []
+            for polygon_points in points:
+                x, y, w, h = cv2.boundingRect(polygon_points)
+                # Clip to the frame; polygons may extend past the edges
+                x2, y2 = min(x + w, width), min(y + h, height)
+                x, y = max(x, 0), max(y, 0)
+                if x2 > x and y2 > y:
+                    rects.append([x, y, x2 - x, y2 - y])
+
+            geometry = (mask, rects, int(cv2.countNonZero(mask)))
+            self._cache[(height, width)] = geometry
+        return geometry
+
+    def mask(self, shape):
+        """uint8 mask (255 inside the region) for a frame shape"""
+        return self._geometry(shape)[0]
+
+    def bounding_rects(self, shape):
+        """[x, y, w, h] bounding rectangle of each polygon, clipped to the frame"""
+        return [list(rect) for rect in self._geometry(shape)[1]]
+
+    def area_pixels(self, shape):
+        """Number of pixels inside the region"""
+        return self._geometry(shape)[2]
+
+    def contains_boxes(self, boxes, shape):
+        """Boolean array: whether each [x, y, w, h] box stands inside the region.
+
+        A person stands where their feet are, so the bottom centre of the box
+        is tested against the mask.
+        """
+        boxes = np.asarray(boxes).reshape(-1, 4)
+        height, width = shape[:2]
+        feet_x = np.clip(boxes[:, 0] + boxes[:, 2] // 2, 0, width - 1)
+        feet_y = np.clip(boxes[:, 1] + boxes[:, 3] - 1, 0, height - 1)
+        return self.mask(shape)[feet_y, feet_x] > 0
@@ -0,0 +1,280 @@
+import json
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from core.offline import frame_record
+
+# Set in each worker process by _init_segment_worker
+_progress = None
+_stop = None
+
+
+def plan_segments(total_frames, segments, warmup_frames=0):
+    """Split frames [0, total_frames) into contiguous segments.
+
+    Returns (start, end, warmup_start) per segment: frames from
+    warmup_start to start only warm up the movement state and are not
+    reported, so consecutive segments never report a frame twice.
+    """
+    segments = max(1, min(segments, total_frames))
+    bounds = [round(i * total_frames / segments) for i in range(segments + 1)]
+    return [(bounds[i], bounds[i + 1], max(0, bounds[i] - warmup_frames)) for i in range(segments)]
+
+
+def _init_segment_worker(progress, stop, cv_threads):
+    global _progress, _stop
+    _progress, _stop = progress, stop
+    cv2.setNumThreads(cv_threads)
+
+
+def _analyze_segment(detector_factory, video_path, index, start, end, warmup_start, sample_every,
+                     output_path, model_tier=None, roi=None):
+    """Worker process: seek to warmup_start, analyse up to end and write frames from start on"""
+    detector = detector_factory()
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        detector.close()
+        raise RuntimeError(f"Failed to open video file {video_path}")
+
+    analyzed = 0
+    persisted = []
+    try:
+        if warmup_start > 0:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, warmup_start)
+        # Some containers only seek to the previous keyframe; walk forward from where we landed
+        position = int(capture.get(cv2.CAP_PROP_POS_FRAMES))
+        while position < warmup_start and capture.grab():
+            position += 1
+        video_fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+
+        frame_index = position
+        with open(output_path, 'w') as output:
+            while frame_index < end and not _stop.is_set():
+                if frame_index % sample_every:
+                    if not capture.grab():
+                        break
+                    frame_index += 1
+                    continue
+                ret, frame = capture.read()
+                if not ret:
+                    break
+
+                plan = detector.plan_frame(frame, stream_id='segment')
+                people = detector._infer_people(frame, model_tier, roi or detector.roi) if plan['keyframe'] else None
+                result, records = detector.finish_frame(frame, plan, people, roi, stream_id='segment')
+                if frame_index >= start:
+                    # Warm-up frames belong to the previous segment, which reports them
+                    persisted.extend(records)
+                    incident = any(table == 'stampede_incidents' for table, _ in records)
+                    output.write(json.dumps(frame_record(frame_index, video_fps, frame.shape, result,
+                                                         incident)) + '\n')
+                    analyzed += 1
+                    if analyzed % 10 == 0:
+                        _progress.put((index, analyzed))
+                frame_index += 1
+    finally:
+        capture.release()
+        detector.close()
+        _progress.put((index, analyzed))
+    return {'segment': index, 'analyzed_frames': analyzed, 'seek_position': position,
+            'records': persisted, 'cancelled': _stop.is_set()}
+
+
+class SegmentedAnalyzer:
+    """Analyses a long video in parallel segments, one worker process per segment.
+
+    The frame range is split into segments that are seeked to with
+    CAP_PROP_POS_FRAMES. Each worker first analyses warmup_frames frames
+    before its segment so tracking and movement history are warm at the
+    boundary, then writes its segment to a part file. The parts are
+    stitched into one results file in frame order, in the format of
+    OfflineAnalyzer. detector_factory must be picklable (e.g. a
+    functools.partial of create_detector_from_config), since workers are
+    spawned and each loads its own model.
+    """
+
+    def __init__(self, detector_factory, video_path, output_path, segments=None, processes=None,
+                 warmup_frames=30, sample_every=1, model_tier=None, roi=None, cv_threads=1, detector=None):
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.detector_factory = detector_factory
+        self.video_path = video_path
+        self.output_path = output_path
+        self.processes = processes or os.cpu_count() or 1
+        self.segment_count = segments or self.processes
+        self.warmup_frames = warmup_frames
+        self.sample_every = sample_every
+        self.model_tier = model_tier
+        self.roi = roi
+        self.cv_threads = cv_threads
+        self.detector = detector  # Detector whose database receives the detections and incidents, if any
+        self.lock = threading.Lock()
+        self.state = 'pending'
+        self.error = None
+        self.total_frames = 0
+        self.video_fps = 0.0
+        self.segments = []
+        self.progress = {}
+        self.incidents = 0
+        self.start_time = None
+        self.end_time = None
+        self.executor = None
+        self.progress_queue = None
+        self.stop_event = None
+        self.futures = []
+        self.thread = None
+
+    def start(self):
+        """Split the video and start the segment workers in the background"""
+        capture = cv2.VideoCapture(self.video_path)
+        if not capture.isOpened():
+            raise RuntimeError(f"Failed to open video file {self.video_path}")
+        self.total_frames = max(0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.video_fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        capture.release()
+        if self.total_frames == 0:
+            raise RuntimeError("Video frame count is unknown; it cannot be split into segments")
+
+        self.segments = plan_segments(self.total_frames, self.segment_count, self.warmup_frames)
+        self.progress = {index: 0 for index in range(len(self.segments))}
+        context = multiprocessing.get_context('spawn')
+        self.progress_queue = context.Queue()
+        self.stop_event = context.Event()
+        self.executor = ProcessPoolExecutor(max_workers=min(self.processes, len(self.segments)), mp_context=context,
+                                            initializer=_init_segment_worker,
+                                            initargs=(self.progress_queue, self.stop_event, self.cv_threads))
+        with self.lock:
+            self.state = 'running'
+            self.start_time = time.time()
+        self.futures = [
+            self.executor.submit(_analyze_segment, self.detector_factory, self.video_path, index, start, end,
+                                 warmup_start, self.sample_every, self._part_path(index), self.model_tier, self.roi)
+            for index, (start, end, warmup_start) in enumerate(self.segments)
+        ]
+        self.thread = threading.Thread(target=self._wait, name='segment-analysis', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Analyse the whole video and return the final status"""
+        self.start()
+        self.join()
+        return self.get_status()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def cancel(self):
+        with self.lock:
+            if self.state != 'running':
+                return
+            self.state = 'cancelled'
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def is_running(self):
+        with self.lock:
+            return self.state == 'running'
+
+    def get_status(self):
+        """Progress of the analysis, overall and per segment"""
+        with self.lock:
+            elapsed = ((self.end_time or time.time()) - self.start_time) if self.start_time else 0.0
+            processed = sum(self.progress.values())
+            expected = [self._expected(start, end) for start, end, _ in self.segments]
+            status = {
+                'state': self.state,
+                'video': self.video_path,
+                'output': self.output_path,
+                'sample_every': self.sample_every,
+                'total_frames': self.total_frames,
+                'analyzed_frames': processed,
+                'expected_frames': sum(expected) if expected else None,
+                'incidents': self.incidents,
+                'elapsed_seconds': round(elapsed, 2),
+                'fps': round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+                'percent': None,
+                'eta_seconds': None,
+                'realtime_factor': None,
+                'error': self.error,
+                'segments': [{'start': start, 'end': end, 'warmup_start': warmup_start,
+                              'analyzed_frames': self.progress.get(index, 0), 'expected_frames': expected[index]}
+                             for index, (start, end, warmup_start) in enumerate(self.segments)],
+            }
+            if status['expected_frames']:
+                status['percent'] = round(min(100.0, 100.0 * processed / status['expected_frames']), 1)
+                if self.state == 'running' and processed > 0:
+                    status['eta_seconds'] = round(max(0, status['expected_frames'] - processed) * elapsed / processed, 1)
+            if self.video_fps > 0 and elapsed > 0:
+                # Seconds of video analysed per second of wall time
+                status['realtime_factor'] = round(processed * self.sample_every / self.video_fps / elapsed, 2)
+        return status
+
+    def _expected(self, start, end):
+        """Sampled frames in [start, end)"""
+        return math.ceil(end / self.sample_every) - math.ceil(start / self.sample_every)
+
+    def _part_path(self, index):
+        return f"{self.output_path}.part{index}"
+
+    def _wait(self):
+        # Follow the workers' progress until every segment finished
+        while any(not future.done() for future in self.futures):
+            self._drain_progress(timeout=0.2)
+        self._drain_progress(timeout=0)
+
+        results = []
+        error = None
+        for future in self.futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                error = error or str(e)
+        self.executor.shutdown(wait=True)
+
+        with self.lock:
+            cancelled = self.state == 'cancelled'
+        try:
+            if not cancelled and error is None:
+                self._stitch()
+                records = [record for result in results for record in result['records']]
+                if self.detector is not None:
+                    self.detector.persist(records)
+                with self.lock:
+                    self.incidents = sum(1 for table, _ in records if table == 'stampede_incidents')
+        except Exception as e:
+            error = str(e)
+        finally:
+            for index in range(len(self.segments)):
+                if os.path.exists(self._part_path(index)):
+                    os.remove(self._part_path(index))
+
+        with self.lock:
+            self.end_time = time.time()
+            if self.state == 'running':
+                self.state = 'failed' if error else 'completed'
+                self.error = error
+
+    def _drain_progress(self, timeout):
+        try:
+            while True:
+                index, analyzed = self.progress_queue.get(timeout=timeout)
+                with self.lock:
+                    self.progress[index] = max(self.progress[index], analyzed)
+        except queue.Empty:
+            pass
+
+    def _stitch(self):
+        """Concatenate the segment part files into one timeline"""
+        with open(self.output_path, 'w') as output:
+            for index in range(len(self.segments)):
+                with open(self._part_path(index)) as part:
+                    for line in part:
+                        output.write(line)
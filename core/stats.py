@@ -0,0 +1,54 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+# One published state of the statistics. data is a read-only view that is
+# never modified after publishing, json holds the serialized bytes served by
+# /stats and etag identifies this version for conditional requests.
+StatsSnapshot = namedtuple('StatsSnapshot', ['version', 'data', 'json', 'etag', 'timestamp'])
+
+
+class StatsPublisher:
+    """Publishes detection statistics as immutable, pre-serialized snapshots.
+
+    Writers hand update() the fields that changed; the publisher merges
+    them into a new snapshot under a lock, so readers always see a
+    complete state and never a half-written one. Each snapshot is
+    serialized once, and its ETag lets pollers skip unchanged states.
+    """
+
+    def __init__(self, initial=None):
+        self.lock = threading.Lock()
+        self.instance = os.urandom(4).hex()  # Keeps ETags unique across restarts
+        self.version = 0
+        self.snapshot = self._make_snapshot(copy.deepcopy(initial or {}))
+
+    def update(self, changes):
+        """Merge changed top-level fields into a new snapshot and return it.
+
+        The current snapshot is returned unchanged when the merged state
+        serializes to the same JSON.
+        """
+        changes = copy.deepcopy(changes)
+        with self.lock:
+            data = dict(self.snapshot.data)
+            data.update(changes)
+            payload = json.dumps(data, default=str).encode()
+            if payload == self.snapshot.json:
+                return self.snapshot
+            self.version += 1
+            self.snapshot = self._make_snapshot(data, payload)
+            return self.snapshot
+
+    def current(self):
+        return self.snapshot
+
+    def _make_snapshot(self, data, payload=None):
+        if payload is None:
+            payload = json.dumps(data, default=str).encode()
+        return StatsSnapshot(self.version, MappingProxyType(data), payload,
+                             f"{self.instance}-{self.version}", time.time())
@@ -0,0 +1,98 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+from core.tracking import MedianFlowTracker
+
+
+class StreamState:
+    """Mutable detection state of one camera or video stream.
+
+    Holds everything detect_crowd remembers between frames of a stream:
+    recent frames for the motion fallback, person positions and the
+    velocity, direction and acceleration histories behind the stampede
+    risk, the keyframe tracker and the motion gate. It holds no model, so
+    streams are cheap and never disturb each other's movement analysis.
+    """
+
+    def __init__(self, stream_id='default'):
+        self.stream_id = stream_id
+        self.lock = threading.Lock()  # One frame of a stream is processed at a time
+
+        # Stampede prevention attributes
+        self.position_history = {}  # Track positions over time
+        self.velocity_history = deque(maxlen=30)  # Last 30 frames
+        self.direction_history = deque(maxlen=30)
+        self.acceleration_history = deque(maxlen=30)
+        self.frame_history = deque(maxlen=5)  # Reduced for better performance
+
+        # Keyframe mode
+        self.tracker = MedianFlowTracker()
+        self.tracking_gray = None
+        self.keyframe_gray = None  # Tracking frame of the last DNN run
+        self.keyframe_detections = []
+        self.frames_since_keyframe = 0
+
+        # Motion gate
+        self.frames_gated = 0
+        self.last_result = None
+        self.inference_counts = {'frames': 0, 'inferences': 0, 'tracked': 0, 'gated': 0}
+
+    def analyze_movement(self, current_positions):
+        """Analyze movement patterns for stampede risk"""
+        if not self.position_history:
+            # First frame, just store positions
+            self.position_history = current_positions
+            return
+
+        # Calculate velocities and directions
+        velocities = []
+        directions = []
+
+        for person_id, current_pos in current_positions.items():
+            if person_id in self.position_history:
+                prev_pos = self.position_history[person_id]
+                # Calculate displacement
+                dx = current_pos[0] - prev_pos[0]
+                dy = current_pos[1] - prev_pos[1]
+
+                # Calculate velocity (distance per frame)
+                velocity = np.sqrt(dx**2 + dy**2)
+                velocities.append(velocity)
+
+                # Calculate direction (angle in radians)
+                if velocity > 0:  # Avoid division by zero
+                    direction = np.arctan2(dy, dx)
+                    directions.append(direction)
+
+        # Update histories
+        if velocities:
+            avg_velocity = np.mean(velocities)
+            self.velocity_history.append(avg_velocity)
+
+            # Calculate acceleration (change in velocity)
+            if len(self.velocity_history) >= 2:
+                acceleration = abs(avg_velocity - self.velocity_history[-2])
+                self.acceleration_history.append(acceleration)
+
+        if directions:
+            # Measure coherence of directions (variance)
+            avg_direction = np.mean(directions)
+            self.direction_history.append(avg_direction)
+
+        # Update position history
+        self.position_history = current_positions
+
+    def clear_movement(self):
+        """Forget movement histories (no people in view)"""
+        self.velocity_history.clear()
+        self.direction_history.clear()
+        self.acceleration_history.clear()
+        self.position_history.clear()
+
+    def get_inference_stats(self):
+        """Frame and inference counters, including the DNN runs saved by gating and tracking"""
+        stats = dict(self.inference_counts)
+        stats['saved'] = stats['frames'] - stats['inferences']
+        return stats
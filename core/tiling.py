@@ -0,0 +1,26 @@
+def _tile_starts(length, tile_size, overlap):
+    """Start offsets of tiles along one axis, the last tile flush with the edge"""
+    if length <= tile_size:
+        return [0]
+    step = max(tile_size - overlap, 1)
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)
+    return starts
+
+
+def make_tiles(width, height, tile_size, overlap=0):
+    """Split a frame into overlapping square tiles.
+
+    Returns a list of [x, y, w, h] rectangles covering the whole frame.
+    Tiles are tile_size pixels wide (smaller if the frame is) and
+    neighbouring tiles share overlap pixels, so people cut by one tile
+    border appear whole in the next tile.
+    """
+    if overlap >= tile_size:
+        raise ValueError("Tile overlap must be smaller than the tile size")
+
+    tiles = []
+    for y in _tile_starts(height, tile_size, overlap):
+        for x in _tile_starts(width, tile_size, overlap):
+            tiles.append([x, y, min(tile_size, width), min(tile_size, height)])
+    return tiles
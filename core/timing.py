@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Stages of a frame in the order they run; other names sort after them
+STAGES = ('plan', 'resize', 'blob', 'forward', 'decode', 'nms', 'tracking', 'faces', 'fallback',
+          'movement', 'risk', 'sqlite')
+
+
+class _NullContext:
+    """Shared no-op context returned while timing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class _Stage:
+    __slots__ = ('timings', 'stream_id', 'name', 'start')
+
+    def __init__(self, timings, stream_id, name):
+        self.timings = timings
+        self.stream_id = stream_id
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.record(self.stream_id, self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Binding:
+    __slots__ = ('local', 'stream_id', 'previous')
+
+    def __init__(self, local, stream_id):
+        self.local = local
+        self.stream_id = stream_id
+
+    def __enter__(self):
+        self.previous = getattr(self.local, 'stream_id', None)
+        self.local.stream_id = self.stream_id
+        return self
+
+    def __exit__(self, *exc_info):
+        self.local.stream_id = self.previous
+        return False
+
+
+class StageTimings:
+    """Rolling latency samples of detect_crowd's stages per stream.
+
+    Code wraps each stage in "with timings.stage(name, stream_id):". While
+    disabled this returns a shared no-op context, so the hooks cost one
+    method call per stage. Stages that do not know their stream (inside
+    the inference engine) use the stream bound to the calling thread with
+    bind(). Each (stream, stage) keeps its last `window` samples, from
+    which get_stats() computes p50/p95/p99.
+    """
+
+    def __init__(self, enabled=False, window=1024):
+        self.enabled = enabled
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}  # (stream_id, stage) -> deque of seconds
+        self.counts = {}  # (stream_id, stage) -> samples recorded in total
+        self.local = threading.local()
+
+    def stage(self, name, stream_id=None):
+        """Context manager timing one stage of a frame"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _Stage(self, stream_id or getattr(self.local, 'stream_id', None) or 'default', name)
+
+    def bind(self, stream_id):
+        """Context manager attributing this thread's unlabelled stages to stream_id"""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _Binding(self.local, stream_id)
+
+    def is_bound(self):
+        return getattr(self.local, 'stream_id', None) is not None
+
+    def record(self, stream_id, name, seconds):
+        if not self.enabled:
+            return
+        key = (stream_id or 'default', name)
+        with self.lock:
+            samples = self.samples.get(key)
+            if samples is None:
+                samples = self.samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+
+    def get_stats(self, stream_id=None):
+        """{stream: {stage: count, mean, p50, p95, p99 and max in ms}}, stages in pipeline order"""
+        with self.lock:
+            snapshot = [(key, np.array(samples), self.counts[key]) for key, samples in self.samples.items()
+                        if stream_id is None or key[0] == stream_id]
+        order = {name: index for index, name in enumerate(STAGES)}
+        snapshot.sort(key=lambda entry: (entry[0][0], order.get(entry[0][1], len(STAGES)), entry[0][1]))
+
+        stats = {}
+        for (stream, stage), samples, count in snapshot:
+            milliseconds = samples * 1000.0
+            p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+            stats.setdefault(stream, {})[stage] = {
+                'count': count,
+                'mean_ms': round(float(milliseconds.mean()), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+                'max_ms': round(float(milliseconds.max()), 3),
+            }
+        return stats
+
+
+def format_stage_stats(stats):
+    """Plain text table of one stream's get_stats() entry"""
+    lines = [f"{'stage':<10} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for stage, values in stats.items():
+        lines.append(f"{stage:<10} {values['count']:>8} {values['p50_ms']:>9.2f} {values['p95_ms']:>9.2f} "
+                     f"{values['p99_ms']:>9.2f} {values['max_ms']:>9.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+
+def small_gray(frame, scale):
+    """Downscaled grayscale copy of a BGR frame, used for motion and tracking"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def motion_score(prev_gray, curr_gray):
+    """Mean absolute pixel difference (0-255) between two grayscale frames"""
+    if prev_gray is None or prev_gray.shape != curr_gray.shape:
+        return float('inf')
+    return float(cv2.absdiff(prev_gray, curr_gray).mean())
+
+
+class MedianFlowTracker:
+    """Moves person boxes between keyframes using sparse optical flow.
+
+    A grid of points inside every box is followed with pyramidal
+    Lucas-Kanade on downscaled grayscale frames, and each box is shifted by
+    the median displacement of its points. Boxes whose points are lost keep
+    their last position until the next keyframe refreshes them.
+    """
+
+    def __init__(self, grid_size=5, min_points=3):
+        self.grid_size = grid_size
+        self.min_points = min_points
+        self.scale = 1.0
+        self.prev_gray = None
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+    def init(self, gray, boxes, scale=1.0):
+        """Start tracking boxes (full frame [x, y, w, h]) from a downscaled gray frame"""
+        self.scale = scale
+        self.prev_gray = gray
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+    def reset(self):
+        self.prev_gray = None
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+
+    def _grid_points(self):
+        """Grid of points inside every box, in downscaled coordinates"""
+        steps = (np.arange(self.grid_size) + 0.5) / self.grid_size
+        gx, gy = np.meshgrid(steps, steps)
+        gx, gy = gx.ravel(), gy.ravel()
+        boxes = self.boxes * self.scale
+        xs = boxes[:, 0:1] + gx * boxes[:, 2:3]
+        ys = boxes[:, 1:2] + gy * boxes[:, 3:4]
+        return np.stack([xs.ravel(), ys.ravel()], axis=1).astype(np.float32).reshape(-1, 1, 2)
+
+    def update(self, gray):
+        """Advance all boxes to a new downscaled gray frame and return them"""
+        if self.prev_gray is None or len(self.boxes) == 0:
+            self.prev_gray = gray
+            return self.boxes.copy()
+
+        points = self._grid_points()
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None, **self.lk_params)
+        self.prev_gray = gray
+        if new_points is None:
+            return self.boxes.copy()
+
+        points_per_box = self.grid_size * self.grid_size
+        displacement = (new_points - points).reshape(len(self.boxes), points_per_box, 2)
+        valid = status.reshape(len(self.boxes), points_per_box).astype(bool)
+
+        height, width = gray.shape[:2]
+        for i in range(len(self.boxes)):
+            if valid[i].sum() < self.min_points:
+                continue
+            dx, dy = np.median(displacement[i][valid[i]], axis=0) / self.scale
+            self.boxes[i, 0] = np.clip(self.boxes[i, 0] + dx, 0, width / self.scale - 1)
+            self.boxes[i, 1] = np.clip(self.boxes[i, 1] + dy, 0, height / self.scale - 1)
+        # Keep each box inside the frame; the stored size is kept for when it moves back in
+        boxes = self.boxes.copy()
+        boxes[:, 2] = np.minimum(boxes[:, 2], width / self.scale - boxes[:, 0])
+        boxes[:, 3] = np.minimum(boxes[:, 3], height / self.scale - boxes[:, 1])
+        return boxes
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+# Containers that can be decoded from a prefix while the rest is still uploading
+# (MP4/MOV usually keep their index at the end and cannot)
+STREAMABLE_EXTENSIONS = ('.avi', '.mkv', '.webm', '.ts', '.mts', '.m2ts', '.mjpeg', '.mjpg', '.flv')
+
+
+def is_streamable(filename):
+    return os.path.splitext(filename)[1].lower() in STREAMABLE_EXTENSIONS
+
+
+class Upload:
+    """A file being uploaded in chunks: bytes received so far and their SHA-256"""
+
+    def __init__(self, upload_id, filename, path, total_size=None, params=None):
+        self.id = upload_id
+        self.filename = filename
+        self.path = path
+        self.total_size = total_size
+        self.params = dict(params or {})  # Analysis job requested with the upload, if any
+        self.received = 0
+        self.complete = False
+        self.digest = hashlib.sha256()
+        self.job_id = None
+        self.created = time.time()
+        self.updated = self.created
+        self.lock = threading.Lock()
+
+    def is_complete(self):
+        return self.complete
+
+    def sha256(self):
+        """Content hash of the complete upload"""
+        with self.lock:
+            return self.digest.hexdigest() if self.complete else None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'received': self.received,
+            'total_size': self.total_size,
+            'complete': self.complete,
+            'streamable': is_streamable(self.filename),
+            'job_id': self.job_id,
+            'created': self.created,
+            'updated': self.updated,
+        }
+
+
+class UploadManager:
+    """Resumable chunked uploads written straight to disk.
+
+    Chunks are appended at the offset the client sends, which must equal
+    the bytes already received; after an interrupted request the client
+    asks for the upload's status and resumes from 'received'. Bodies are
+    read from the request stream chunk_size bytes at a time, so nothing
+    is buffered in memory. Uploads idle for longer than expiry seconds
+    are forgotten, and their files deleted unless an analysis job was
+    started on them (the job owns the file then).
+    """
+
+    def __init__(self, directory, max_bytes, chunk_size=1024 * 1024, expiry=24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.expiry = expiry
+        self.lock = threading.Lock()
+        self.uploads = {}
+
+    def create(self, filename, total_size=None, params=None):
+        """Start an upload; raises ValueError if the announced size is over the limit"""
+        if total_size is not None and total_size > self.max_bytes:
+            raise ValueError(f"Upload of {total_size} bytes exceeds the limit of {self.max_bytes} bytes")
+        self._expire()
+        upload_id = uuid.uuid4().hex[:12]
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{upload_id}_{os.path.basename(filename) or 'video'}")
+        open(path, 'wb').close()
+        upload = Upload(upload_id, filename, path, total_size, params)
+        with self.lock:
+            self.uploads[upload_id] = upload
+        return upload
+
+    def get(self, upload_id):
+        with self.lock:
+            return self.uploads.get(upload_id)
+
+    def append(self, upload_id, offset, stream):
+        """Append the body read from stream at offset; returns the Upload, or None if unknown
+
+        Raises ValueError if the offset is not the number of bytes received,
+        the upload is complete or the data exceeds the size limit. Bytes
+        written before an error or a dropped connection are kept.
+        """
+        upload = self.get(upload_id)
+        if upload is None:
+            return None
+        limit = min(self.max_bytes, upload.total_size if upload.total_size is not None else self.max_bytes)
+        with upload.lock:
+            if upload.complete:
+                raise ValueError("Upload is already complete")
+            if offset != upload.received:
+                raise ValueError(f"Offset {offset} does not match the {upload.received} bytes received")
+            with open(upload.path, 'ab') as f:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    if upload.received + len(chunk) > limit:
+                        raise ValueError(f"Upload exceeds the limit of {limit} bytes")
+                    f.write(chunk)
+                    f.flush()  # Visible to an analysis already reading the prefix
+                    upload.digest.update(chunk)
+                    upload.received += len(chunk)
+                    upload.updated = time.time()
+        return upload
+
+    def complete(self, upload_id):
+        """Mark an upload as fully received; returns the Upload, or None if unknown
+
+        Raises ValueError if fewer bytes than announced were received.
+        """
+        upload = self.get(upload_id)
+        if upload is None:
+            return None
+        with upload.lock:
+            if upload.total_size is not None and upload.received != upload.total_size:
+                raise ValueError(f"Received {upload.received} of {upload.total_size} bytes")
+            upload.complete = True
+            upload.updated = time.time()
+        return upload
+
+    def get_stats(self):
+        with self.lock:
+            uploads = list(self.uploads.values())
+        return {
+            'uploads': len(uploads),
+            'in_progress': sum(1 for upload in uploads if not upload.complete),
+            'bytes_received': sum(upload.received for upload in uploads),
+            'max_bytes': self.max_bytes,
+        }
+
+    def _expire(self):
+        cutoff = time.time() - self.expiry
+        with self.lock:
+            expired = [upload for upload in self.uploads.values() if upload.updated < cutoff]
+            for upload in expired:
+                del self.uploads[upload.id]
+        for upload in expired:
+            if upload.job_id is None and os.path.exists(upload.path):
+                os.remove(upload.path)
@@ -0,0 +1,342 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import connection, shared_memory
+
+import cv2
+import numpy as np
+
+
+class SharedFrameRing:
+    """Fixed size frame slots in one multiprocessing.shared_memory block.
+
+    The pool writes a frame into a free slot and only sends the slot number,
+    shape and dtype to a worker, which maps the slot as a NumPy array
+    without copying or pickling the pixels.
+    """
+
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            # Workers share the pool's resource tracker, which unlinks the block once
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+    def view(self, slot, shape, dtype=np.uint8):
+        """NumPy array mapped onto a slot"""
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def write(self, slot, frame):
+        """Copy a frame into a slot and return its (shape, dtype) for view()"""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+        self.view(slot, frame.shape, frame.dtype)[...] = frame
+        return frame.shape, frame.dtype.str
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker_main(engine_factory, ring_name, slots, slot_bytes, cv_threads, conn):
+    """Worker process: load the engine once, then run the frames sent over conn from the ring"""
+    cv2.setNumThreads(cv_threads)
+    ring = SharedFrameRing(slots, slot_bytes, name=ring_name)
+    try:
+        engine = engine_factory()
+        engine.load_model_tier()
+    except Exception as e:
+        conn.send(('failed', None, str(e)))
+        ring.shm.close()
+        return
+    conn.send(('ready', None, None))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break  # The pool went away
+        if task is None:
+            break
+        task_id, slot, shape, dtype, model_tier, roi = task
+        try:
+            boxes, confidences = engine.infer_people(ring.view(slot, shape, dtype), model_tier, roi)
+            conn.send(('result', task_id, (boxes, confidences)))
+        except Exception as e:
+            conn.send(('error', task_id, str(e)))
+    engine.close()
+    ring.shm.close()
+
+
+class _Worker:
+    """A worker process, the pool's end of its pipe and the frames sent to it"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = {}  # task_id -> ring slot of each frame sent and not answered
+        self.send_lock = threading.Lock()
+        self.retired = False  # Being killed for hanging; gets no new frames
+
+
+class InferenceWorkerPool:
+    """Runs InferenceEngine.infer_people in worker processes, outside the GIL.
+
+    Every worker builds its own engine with engine_factory (a picklable
+    callable, e.g. functools.partial(create_engine_from_config, Config)),
+    loading the model once, and pins OpenCV to cv_threads threads so the
+    workers do not oversubscribe the cores. Frames travel through a
+    SharedFrameRing; only slot numbers and the small result arrays go over
+    each worker's pipe. infer() has the same signature as
+    InferenceBatcher.infer, so it can be passed to detect_crowd.
+
+    Each frame goes to the worker with the fewest frames in flight, so the
+    pool knows which frames a worker holds: when a worker dies (e.g. killed
+    for running out of memory) they fail and their slots are freed, and the
+    worker is replaced unless it exited cleanly. infer() gives up after
+    task_timeout seconds and kills the hung worker. Frames larger than
+    max_frame_bytes, and all frames once no worker is left, run on fallback
+    (e.g. detector._infer_people) in the calling thread.
+    """
+
+    def __init__(self, engine_factory, workers=2, cv_threads=1, slots=None,
+                 max_frame_bytes=1920 * 1080 * 3, start_timeout=300, task_timeout=30, fallback=None,
+                 poll_interval=0.5):
+        if workers < 1:
+            raise ValueError("An inference worker pool needs at least 1 worker")
+        self.engine_factory = engine_factory
+        self.workers = workers
+        self.cv_threads = cv_threads
+        self.slots = slots or 2 * workers
+        self.max_frame_bytes = max_frame_bytes
+        self.start_timeout = start_timeout
+        self.task_timeout = task_timeout
+        self.fallback = fallback
+        self.poll_interval = poll_interval
+
+        # Spawned workers do not inherit the parent's threads or OpenCV state
+        self.context = multiprocessing.get_context('spawn')
+        self.ring = None
+        self.processes = []  # _Worker of each running worker
+        self.free_slots = queue.Queue()
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.next_task_id = 0
+        self.result_thread = None
+        self.running = False
+        self.stats = {'frames': 0, 'errors': 0, 'fallback': 0, 'restarts': 0}
+
+    def start(self):
+        """Start the workers and wait until each has loaded its model"""
+        if self.running:
+            return
+        self.ring = SharedFrameRing(self.slots, self.max_frame_bytes)
+        for slot in range(self.slots):
+            self.free_slots.put(slot)
+
+        for _ in range(self.workers):
+            self._start_worker()
+
+        deadline = time.monotonic() + self.start_timeout
+        for worker in self.processes:
+            try:
+                if not worker.conn.poll(max(deadline - time.monotonic(), 0.1)):
+                    raise EOFError
+                kind, _, message = worker.conn.recv()
+            except (EOFError, OSError):
+                self.stop()
+                raise RuntimeError("Inference workers did not start in time")
+            if kind == 'failed':
+                pid = worker.process.pid
+                self.stop()
+                raise RuntimeError(f"Inference worker {pid} failed to load the model: {message}")
+
+        self.running = True
+        self.result_thread = threading.Thread(target=self._collect_results, name='inference-results',
+                                              daemon=True)
+        self.result_thread.start()
+
+    def stop(self):
+        """Stop the workers; requests still waiting fail with RuntimeError"""
+        self.running = False
+        if self.result_thread is not None:
+            self.result_thread.join()
+            self.result_thread = None
+        processes, self.processes = self.processes, []
+        for worker in processes:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in processes:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+        with self.lock:
+            futures, self.futures = self.futures, {}
+        for future in futures.values():
+            future.set_exception(RuntimeError("Inference worker pool stopped"))
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        while True:  # Submitters still waiting for a slot see running is False
+            try:
+                self.free_slots.get_nowait()
+            except queue.Empty:
+                break
+
+    def submit(self, frame, model_tier=None, roi=None, stream_id=None):
+        """Queue a frame and return a Future of its (boxes, confidences).
+
+        Blocks while every ring slot is in use, and raises RuntimeError once
+        the pool stops. stream_id is accepted for compatibility with
+        InferenceBatcher and not used.
+        """
+        frame = np.ascontiguousarray(frame)
+        slot = None
+        while slot is None:
+            if not self.running:
+                raise RuntimeError("Inference worker pool is not running")
+            try:
+                slot = self.free_slots.get(timeout=self.poll_interval)
+            except queue.Empty:
+                pass
+        ring = self.ring
+        if not self.running or ring is None:
+            raise RuntimeError("Inference worker pool is not running")
+        try:
+            shape, dtype = ring.write(slot, frame)
+        except Exception:
+            self.free_slots.put(slot)
+            raise
+
+        future = Future()
+        with self.lock:
+            candidates = [candidate for candidate in self.processes if not candidate.retired]
+            if not candidates:
+                self.free_slots.put(slot)
+                raise RuntimeError("No inference worker is running")
+            worker = min(candidates, key=lambda candidate: len(candidate.tasks))
+            task_id = self.next_task_id
+            self.next_task_id += 1
+            self.futures[task_id] = future
+            worker.tasks[task_id] = slot
+        try:
+            with worker.send_lock:
+                worker.conn.send((task_id, slot, shape, dtype, model_tier, roi))
+        except OSError:
+            pass  # The worker died; its frames fail once the result thread notices
+        return future
+
+    def infer(self, frame, model_tier=None, roi=None, stream_id=None):
+        """Run a frame on the least busy worker and return its (boxes, confidences)"""
+        if self.fallback is not None and (frame.nbytes > self.max_frame_bytes or not self.processes):
+            with self.lock:
+                self.stats['fallback'] += 1
+            return self.fallback(frame, model_tier, roi)
+        future = self.submit(frame, model_tier, roi, stream_id)
+        try:
+            return future.result(timeout=self.task_timeout)
+        except FutureTimeoutError:
+            with self.lock:
+                hung = [worker for worker in self.processes if not worker.retired and
+                        any(future is self.futures.get(task_id) for task_id in worker.tasks)]
+                for worker in hung:
+                    worker.retired = True
+                    self.stats['restarts'] += 1
+            for worker in hung:
+                print(f"Warning: Inference worker {worker.process.pid} hung, restarting it")
+                self._start_worker()
+                worker.process.terminate()  # Its frames fail once the result thread notices
+            raise RuntimeError(f"Inference worker did not answer within {self.task_timeout}s")
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self.futures)
+        stats['workers'] = len(self.processes)
+        return stats
+
+    def _start_worker(self):
+        conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main, daemon=True,
+            args=(self.engine_factory, self.ring.name, self.slots, self.max_frame_bytes,
+                  self.cv_threads, child_conn))
+        process.start()
+        child_conn.close()
+        with self.lock:
+            self.processes.append(_Worker(process, conn))
+
+    def _collect_results(self):
+        while self.running:
+            with self.lock:
+                workers = list(self.processes)
+            ready = connection.wait([worker.conn for worker in workers] +
+                                    [worker.process.sentinel for worker in workers], self.poll_interval)
+            for worker in workers:
+                if worker.conn in ready:
+                    # Answers sent before a worker died are still read first
+                    try:
+                        kind, task_id, payload = worker.conn.recv()
+                    except (EOFError, OSError):
+                        self._worker_died(worker)
+                        continue
+                    self._answer(worker, kind, task_id, payload)
+                elif worker.process.sentinel in ready:
+                    self._worker_died(worker)
+
+    def _answer(self, worker, kind, task_id, payload):
+        if kind in ('ready', 'failed'):
+            if kind == 'failed':
+                print(f"Warning: Restarted inference worker {worker.process.pid} failed to load the model: {payload}")
+            return
+        with self.lock:
+            future = self.futures.pop(task_id, None)
+            slot = worker.tasks.pop(task_id, None)
+            self.stats['frames' if kind == 'result' else 'errors'] += 1
+        if slot is not None:
+            self.free_slots.put(slot)
+        if future is None:
+            return
+        if kind == 'result':
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(f"Inference worker error: {payload}"))
+
+    def _worker_died(self, worker):
+        """Fail the frames a dead worker held, free their slots and replace it"""
+        worker.process.join(timeout=1)
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(timeout=1)
+        with worker.send_lock:
+            worker.conn.close()
+        exitcode = worker.process.exitcode
+        if self.running and exitcode != 0 and not worker.retired:
+            # The replacement takes new frames (they wait in its pipe while it loads the model)
+            print(f"Warning: Inference worker {worker.process.pid} died (exit code {exitcode}), restarting it")
+            with self.lock:
+                self.stats['restarts'] += 1
+            self._start_worker()
+        with self.lock:
+            if worker in self.processes:
+                self.processes.remove(worker)
+            tasks, worker.tasks = worker.tasks, {}
+            futures = [self.futures.pop(task_id, None) for task_id in tasks]
+            self.stats['errors'] += len(tasks)
+        for slot in tasks.values():
+            self.free_slots.put(slot)
+        for future in futures:
+            if future is not None:
+                future.set_exception(RuntimeError(
+                    f"Inference worker {worker.process.pid} died (exit code {exitcode})"))
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Headless command line interface for the Crowd Management System
+
+Runs crowd detection on cameras, video files or stream URLs without Flask
+or PyQt. Detections and stampede incidents are written to the database;
+with --jsonl every result is also printed as one JSON line on stdout.
+Recordings can be analysed offline, faster than real time:
+
+    python crowdctl.py run --source 0 --source rtsp://edge-cam/stream --jsonl
+    python crowdctl.py analyze --input recording.mp4 --sample-every 5
+    python crowdctl.py analyze --input recording.mp4 --segments 4
+    python crowdctl.py run --source 0 --max-frames 500 --timings
+"""
+
+import sys
+import os
+import json
+import time
+import signal
+import argparse
+import threading
+import contextlib
+from datetime import datetime
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from core.timing import format_stage_stats
+
+def parse_source(source):
+    """Camera index for digits, otherwise a file path or stream URL for cv2.VideoCapture"""
+    return int(source) if source.isdigit() else source
+
+def is_live(source):
+    """Cameras and network streams are read on a capture thread that keeps only the newest frame"""
+    return isinstance(source, int) or "://" in source
+
+class JsonlWriter:
+    """Writes one JSON object per line, shared by the stream threads"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        if self.stream is None:
+            return
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+def create_detector(args):
+    """CrowdDetector configured like the web application"""
+    from core.detection import create_detector_from_config
+
+    return create_detector_from_config(Config, args.db, args.tier)
+
+def read_frames(source, stop):
+    """Yield (frame, captured_timestamp) from a source until it ends or stop is set"""
+    import cv2
+    from core.capture import LatestFrameCapture
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise RuntimeError(f"Could not open source {source}")
+    try:
+        if is_live(source):
+            reader = LatestFrameCapture(capture)
+            reader.start()
+            try:
+                while not stop.is_set():
+                    captured = reader.read(timeout=0.5)
+                    if captured is not None:
+                        yield captured.frame, captured.timestamp
+            finally:
+                reader.stop()
+        else:
+            while not stop.is_set():
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                yield frame, time.time()
+    finally:
+        capture.release()
+
+def run_stream(detector, stream_id, source, args, writer, stop, summary):
+    """Detection loop of one source; results go to the database and the JSONL writer"""
+    from core.roi import RegionOfInterest
+
+    polygons = Config.STREAM_ROIS.get(stream_id)
+    roi = RegionOfInterest(polygons) if polygons else None
+    detector.remove_stream(stream_id)
+    frames = 0
+    last_emit = 0.0
+    start_time = time.time()
+    try:
+        for frame, _ in read_frames(source, stop):
+            plan = detector.plan_frame(frame, stream_id=stream_id)
+            people = None
+            if plan['keyframe']:
+                with detector.timings.bind(stream_id):
+                    people = detector._infer_people(frame, args.tier, roi or detector.roi)
+            result, records = detector.finish_frame(frame, plan, people, roi, stream_id=stream_id)
+            detector.persist(records, stream_id)
+            frames += 1
+
+            _, people_count, _, risk = result
+            now = time.time()
+            if now - last_emit >= args.interval:
+                last_emit = now
+                writer.write({'type': 'result', 'time': datetime.now().isoformat(), 'stream': stream_id,
+                              'frame': frames, 'people_count': people_count, 'risk_level': risk.get('level'),
+                              'risk_score': round(float(risk.get('score', 0.0)), 3),
+                              'factors': risk.get('factors', {})})
+            for table, values in records:
+                if table == 'stampede_incidents':
+                    timestamp, risk_level, count, score, factors = values
+                    writer.write({'type': 'incident', 'time': timestamp.isoformat(), 'stream': stream_id,
+                                  'risk_level': risk_level, 'people_count': count, 'risk_score': score,
+                                  'factors': factors})
+            if args.max_frames and frames >= args.max_frames:
+                break
+    except Exception as e:
+        print(f"Error in stream {stream_id}: {e}")
+    finally:
+        elapsed = time.time() - start_time
+        summary[stream_id] = {'frames': frames, 'seconds': round(elapsed, 2),
+                              'fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+                              'inference': detector.get_inference_stats(stream_id)}
+        if detector.timings.enabled:
+            summary[stream_id]['timings'] = detector.timings.get_stats(stream_id).get(stream_id, {})
+
+def cmd_run(args, detector=None, stdout=None):
+    """Run detection on every source until they end or the process is interrupted"""
+    stdout = stdout or sys.stdout
+    writer = JsonlWriter(stdout if args.jsonl else None)
+    # Keep stdout for JSON lines; status messages go to stderr
+    redirect = contextlib.redirect_stdout(sys.stderr) if args.jsonl else contextlib.nullcontext()
+    with redirect:
+        stop = threading.Event()
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            # Ctrl+C or a container's SIGTERM ends the sources cleanly
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.signal(signum, lambda *_: stop.set())
+
+        own_detector = detector is None
+        if own_detector:
+            try:
+                detector = create_detector(args)
+            except Exception as e:
+                print(f"✗ Error initializing detector: {e}")
+                return False
+        if args.timings:
+            detector.timings.enabled = True
+
+        names = args.name or []
+        summary = {}
+        threads = []
+        for index, source in enumerate(args.source):
+            stream_id = names[index] if index < len(names) else f"source{index}"
+            thread = threading.Thread(target=run_stream, name=f"crowdctl-{stream_id}",
+                                      args=(detector, stream_id, parse_source(source), args, writer, stop, summary),
+                                      daemon=True)
+            thread.start()
+            threads.append(thread)
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.2)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=5)
+            if own_detector:
+                detector.close()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        for stream_id, stats in summary.items():
+            writer.write(dict({'type': 'summary', 'stream': stream_id}, **stats))
+            print(f"{stream_id}: {stats['frames']} frames in {stats['seconds']}s ({stats['fps']} FPS)")
+            if stats.get('timings'):
+                print(format_stage_stats(stats['timings']))
+    return True
+
+def cmd_analyze(args, detector=None, stdout=None):
+    """Analyse a recorded video as fast as possible into a per-frame JSONL results file"""
+    from core.offline import OfflineAnalyzer
+
+    stdout = stdout or sys.stdout
+    output = args.output or os.path.splitext(args.input)[0] + "_analysis.jsonl"
+    if args.no_db:
+        args.db = ":memory:"
+    with contextlib.redirect_stdout(sys.stderr):
+        own_detector = detector is None
+        if own_detector:
+            try:
+                detector = create_detector(args)
+            except Exception as e:
+                print(f"✗ Error initializing detector: {e}")
+                return False
+        if args.timings:
+            detector.timings.enabled = True
+
+        if args.segments > 1:
+            from functools import partial
+            from core.detection import create_detector_from_config
+            from core.segments import SegmentedAnalyzer
+
+            # Each segment process loads its own model; detections are persisted here
+            analyzer = SegmentedAnalyzer(partial(create_detector_from_config, Config, ":memory:", args.tier),
+                                         args.input, output, segments=args.segments, warmup_frames=args.warmup,
+                                         sample_every=args.sample_every, model_tier=args.tier,
+                                         cv_threads=Config.WORKER_CV_THREADS,
+                                         detector=None if args.no_db else detector)
+        else:
+            analyzer = OfflineAnalyzer(detector, args.input, output, sample_every=args.sample_every,
+                                       model_tier=args.tier, persist=not args.no_db,
+                                       infer_workers=Config.OFFLINE_INFER_WORKERS,
+                                       queue_size=Config.OFFLINE_QUEUE_SIZE)
+        try:
+            analyzer.start()
+            while analyzer.is_running():
+                analyzer.join(timeout=args.progress or None)
+                status = analyzer.get_status()
+                if status['state'] == 'running' and args.progress:
+                    eta = f"{status['eta_seconds']}s" if status['eta_seconds'] is not None else "?"
+                    percent = f"{status['percent']}%" if status['percent'] is not None else "?"
+                    print(f"{status['analyzed_frames']} frames ({percent}), {status['fps']} FPS, ETA {eta}")
+        except KeyboardInterrupt:
+            analyzer.cancel()
+            analyzer.join()
+        except Exception as e:
+            print(f"✗ Error analysing {args.input}: {e}")
+            return False
+        finally:
+            if own_detector:
+                detector.close()
+
+        status = analyzer.get_status()
+        if args.timings:
+            # Segment workers time their stages in their own processes; only the parent's are here
+            status['timings'] = detector.timings.get_stats('offline').get('offline', {})
+            if status['timings']:
+                print(format_stage_stats(status['timings']))
+    status.pop('pipeline', None)
+    stdout.write(json.dumps(status) + "\n")
+    stdout.flush()
+    return status['state'] == 'completed'
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="crowdctl", description="Headless Crowd Management System")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run detection on cameras, video files or stream URLs")
+    run.add_argument("--source", action="append", required=True,
+                     help="Camera index, video file or stream URL (repeat for several sources)")
+    run.add_argument("--name", action="append",
+                     help="Stream id of the source at the same position (default: source0, source1, ...)")
+    run.add_argument("--tier", default=None, help="Model tier (default: Config.DEFAULT_MODEL_TIER)")
+    run.add_argument("--db", default=Config.DATABASE_FILE, help="SQLite database for detections and incidents")
+    run.add_argument("--jsonl", action="store_true", help="Print results and incidents as JSON lines on stdout")
+    run.add_argument("--interval", type=float, default=0.0,
+                     help="Minimum seconds between result lines per stream (incidents are always printed)")
+    run.add_argument("--max-frames", type=int, default=0, help="Stop each source after this many frames")
+    run.add_argument("--timings", action="store_true",
+                     help="Time each detection stage and report p50/p95/p99 per source in the summary")
+    run.set_defaults(handler=cmd_run)
+
+    analyze = commands.add_parser("analyze", help="Analyse a recorded video faster than real time")
+    analyze.add_argument("--input", required=True, help="Video file")
+    analyze.add_argument("--output", help="JSONL results file (default: <input>_analysis.jsonl)")
+    analyze.add_argument("--sample-every", type=int, default=Config.OFFLINE_SAMPLE_EVERY,
+                         help="Analyse only every Nth frame")
+    analyze.add_argument("--segments", type=int, default=Config.SEGMENT_PROCESSES,
+                         help="Split the video into this many segments analysed in parallel processes")
+    analyze.add_argument("--warmup", type=int, default=Config.SEGMENT_WARMUP_FRAMES,
+                         help="Frames analysed before each segment to warm up tracking")
+    analyze.add_argument("--tier", default=None, help="Model tier (default: Config.DEFAULT_MODEL_TIER)")
+    analyze.add_argument("--db", default=Config.DATABASE_FILE, help="SQLite database for detections and incidents")
+    analyze.add_argument("--no-db", action="store_true", help="Only write the results file")
+    analyze.add_argument("--timings", action="store_true",
+                         help="Time each detection stage and report p50/p95/p99 in the final status")
+    analyze.add_argument("--progress", type=float, default=2.0, help="Seconds between progress lines on stderr")
+    analyze.set_defaults(handler=cmd_analyze)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return 0 if args.handler(args) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,36 @@
 #!/usr/bin/env python3
 """
-Utility script to download YOLOv3 weights
+Utility script to download YOLO weights for the model tiers
 """
 
 import urllib.request
 import os
 import sys
+import argparse
 from tqdm import tqdm
 
+# Weight files by model family: (filename, url, approximate size in MB)
+WEIGHT_FILES = {
+    "yolov3": ("yolov3.weights", "https://pjreddie.com/media/files/yolov3.weights", 237),
+    "yolov3-tiny": ("yolov3-tiny.weights", "https://pjreddie.com/media/files/yolov3-tiny.weights", 34),
+}
+
 class DownloadProgressBar(tqdm):
     def update_to(self, b=1, bsize=1, tsize=None):
         if tsize is not None:
             self.total = tsize
         self.update(b * bsize - self.n)
 
-def download_yolo_weights():
-    """Download YOLOv3 weights file"""
-    url = "https://pjreddie.com/media/files/yolov3.weights"
-    filename = "yolov3.weights"
+def download_weights(model="yolov3"):
+    """Download the weights file of one model family"""
+    filename, url, size_mb = WEIGHT_FILES[model]
     
     if os.path.exists(filename):
         print(f"{filename} already exists. Skipping download.")
         return True
     
     print(f"Downloading {filename} from {url}")
-    print("Note: This file is approximately 237MB. Download may take several minutes.")
+    print(f"Note: This file is approximately {size_mb}MB. Download may take several minutes.")
     
     try:
         with DownloadProgressBar(unit='B', unit_scale=True,
@@ -34,9 +40,19 @@ def download_yolo_weights():
         return True
     except Exception as e:
         print(f"Error downloading {filename}: {e}")
-        print("Please download manually from: https://pjreddie.com/media/files/yolov3.weights")
+        print(f"Please download manually from: {url}")
         return False
 
+def download_yolo_weights():
+    """Download YOLOv3 weights file"""
+    return download_weights("yolov3")
+
 if __name__ == "__main__":
-    success = download_yolo_weights()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Download YOLO weights")
+    parser.add_argument("models", nargs="*", default=["yolov3"], choices=list(WEIGHT_FILES) + ["all"],
+                        help="model families to download (default: yolov3)")
+    args = parser.parse_args()
+    
+    models = list(WEIGHT_FILES) if "all" in args.models else args.models
+    success = all([download_weights(model) for model in models])
+    sys.exit(0 if success else 1)
@@ -16,6 +16,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/crowd-management-system",
     packages=find_packages(),
+    py_modules=["app", "config", "crowdctl"],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -32,6 +33,7 @@ setup(
     entry_points={
         "console_scripts": [
             "crowd-management=app:main",
+            "crowdctl=crowdctl:main",
         ],
     },
     include_package_data=True,
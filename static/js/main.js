@@ -5,6 +5,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const startBtn = document.getElementById('start-btn');
     const stopBtn = document.getElementById('stop-btn');
     const videoFeed = document.getElementById('video-feed');
+    const overlayCanvas = document.getElementById('overlay-canvas');
     const noFeedMessage = document.getElementById('no-feed-message');
     const peopleCount = document.getElementById('people-count');
     const alertLevel = document.getElementById('alert-level');
@@ -32,6 +33,18 @@ document.addEventListener('DOMContentLoaded', function() {
     const directionValue = document.getElementById('direction-value');
     const accelerationValue = document.getElementById('acceleration-value');
 
+    // Stream variant for this screen: open the dashboard with e.g. ?w=640&q=60&fps=10
+    // on tablets or slow links; without parameters the full-quality feed is shown
+    function videoFeedUrl() {
+        const pageParams = new URLSearchParams(window.location.search);
+        const feedParams = new URLSearchParams();
+        ['w', 'q', 'fps'].forEach(name => {
+            if (pageParams.has(name)) feedParams.set(name, pageParams.get(name));
+        });
+        const query = feedParams.toString();
+        return query ? `/video_feed?${query}` : '/video_feed';
+    }
+
     // Event listeners
     startBtn.addEventListener('click', startCamera);
     stopBtn.addEventListener('click', stopCamera);
@@ -50,6 +63,149 @@ document.addEventListener('DOMContentLoaded', function() {
     // Variables
     let statsInterval = null;
     let incidentInterval = null;
+    let eventSource = null;
+    let overlaySource = null;
+    let currentOverlay = {};
+    let currentStats = {};
+    let currentIncidents = [];
+
+    // Live updates: the server pushes stats deltas and incidents recorded
+    // after the stream opened over /events; earlier incidents are loaded from
+    // /stampede_incidents on every (re)connect. Browsers without EventSource
+    // (or when the stream closes) fall back to polling both
+    function startUpdates() {
+        stopUpdates();
+        startOverlay();
+        
+        if (!window.EventSource) {
+            updateIncidents();
+            startPolling();
+            return;
+        }
+        
+        eventSource = new EventSource('/events');
+        eventSource.addEventListener('open', updateIncidents);
+        eventSource.addEventListener('stats', event => {
+            // Only the changed keys are sent
+            Object.assign(currentStats, JSON.parse(event.data));
+            renderStats(currentStats);
+        });
+        eventSource.addEventListener('incident', event => {
+            const incident = JSON.parse(event.data);
+            if (currentIncidents.some(known => known[0] === incident[0])) {
+                return;  // Already loaded from /stampede_incidents
+            }
+            currentIncidents.unshift(incident);
+            renderIncidents(currentIncidents.slice(0, 10));
+        });
+        eventSource.addEventListener('incidents_reset', () => {
+            currentIncidents = [];
+            renderIncidents(currentIncidents);
+        });
+        eventSource.onerror = () => {
+            // EventSource reconnects by itself unless the server refused the stream
+            if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+                eventSource = null;
+                startPolling();
+            }
+        };
+    }
+
+    // Overlay: boxes, faces and risk of each frame arrive as metadata on
+    // /overlay and are drawn on a canvas over the video, which is left untouched
+    function startOverlay() {
+        if (!window.EventSource) return;
+        
+        overlaySource = new EventSource('/overlay');
+        overlaySource.addEventListener('overlay', event => {
+            const update = JSON.parse(event.data);
+            // Only changed keys are sent; ignore updates older than the frame drawn
+            if (update.seq !== undefined && currentOverlay.seq !== undefined && update.seq < currentOverlay.seq) return;
+            Object.assign(currentOverlay, update);
+            drawOverlay(currentOverlay);
+        });
+    }
+
+    function drawOverlay(overlay) {
+        if (videoFeed.style.display === 'none' || !overlay.width || !videoFeed.clientWidth) {
+            overlayCanvas.style.display = 'none';
+            return;
+        }
+        
+        // Cover the displayed image and scale frame pixels to it
+        overlayCanvas.style.display = 'block';
+        overlayCanvas.style.left = `${videoFeed.offsetLeft}px`;
+        overlayCanvas.style.top = `${videoFeed.offsetTop}px`;
+        overlayCanvas.width = videoFeed.clientWidth;
+        overlayCanvas.height = videoFeed.clientHeight;
+        const scaleX = overlayCanvas.width / overlay.width;
+        const scaleY = overlayCanvas.height / overlay.height;
+        const ctx = overlayCanvas.getContext('2d');
+        ctx.clearRect(0, 0, overlayCanvas.width, overlayCanvas.height);
+        
+        const riskColors = {'LOW': '#2ecc71', 'MEDIUM': '#f39c12', 'HIGH': '#e74c3c'};
+        const riskColor = riskColors[overlay.risk ? overlay.risk.level : 'LOW'] || '#2ecc71';
+        
+        // Person boxes; tracked (non-keyframe) boxes are dashed
+        ctx.lineWidth = 2;
+        ctx.font = '12px sans-serif';
+        (overlay.boxes || []).forEach(([x, y, w, h, confidence, tracked]) => {
+            ctx.strokeStyle = riskColor;
+            ctx.setLineDash(tracked ? [6, 4] : []);
+            ctx.strokeRect(x * scaleX, y * scaleY, w * scaleX, h * scaleY);
+            ctx.fillStyle = riskColor;
+            ctx.fillText(`${Math.round(confidence * 100)}%`, x * scaleX + 2, y * scaleY - 4);
+        });
+        
+        ctx.setLineDash([]);
+        ctx.strokeStyle = '#3498db';
+        (overlay.faces || []).forEach(([x, y, w, h]) => {
+            ctx.strokeRect(x * scaleX, y * scaleY, w * scaleX, h * scaleY);
+        });
+        
+        // Risk banner
+        if (overlay.risk) {
+            ctx.font = 'bold 14px sans-serif';
+            ctx.fillStyle = 'rgba(0, 0, 0, 0.6)';
+            ctx.fillRect(8, 8, 210, 24);
+            ctx.fillStyle = riskColor;
+            ctx.fillText(`People: ${overlay.people_count}  Risk: ${overlay.risk.level} (${overlay.risk.score.toFixed(2)})`, 14, 25);
+        }
+    }
+
+    window.addEventListener('resize', () => drawOverlay(currentOverlay));
+
+    function startPolling() {
+        if (statsInterval) clearInterval(statsInterval);
+        statsInterval = setInterval(updateStats, 200); // Update every 200ms for real-time feel
+        
+        if (incidentInterval) clearInterval(incidentInterval);
+        incidentInterval = setInterval(updateIncidents, 3000); // Update every 3 seconds
+    }
+
+    function stopUpdates() {
+        if (eventSource) {
+            eventSource.close();
+            eventSource = null;
+        }
+        
+        if (overlaySource) {
+            overlaySource.close();
+            overlaySource = null;
+        }
+        currentOverlay = {};
+        overlayCanvas.style.display = 'none';
+        
+        if (statsInterval) {
+            clearInterval(statsInterval);
+            statsInterval = null;
+        }
+        
+        if (incidentInterval) {
+            clearInterval(incidentInterval);
+            incidentInterval = null;
+        }
+    }
 
     // Handle video upload
     function handleVideoUpload(event) {
@@ -97,15 +253,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Show video feed
                 videoFeed.style.display = 'block';
                 noFeedMessage.style.display = 'none';
-                videoFeed.src = '/video_feed';
-                
-                // Start stats updates
-                if (statsInterval) clearInterval(statsInterval);
-                statsInterval = setInterval(updateStats, 200); // Update every 200ms for real-time feel
+                videoFeed.src = videoFeedUrl();
                 
-                // Start incident updates
-                if (incidentInterval) clearInterval(incidentInterval);
-                incidentInterval = setInterval(updateIncidents, 3000); // Update every 3 seconds
+                // Start live stats and incident updates
+                startUpdates();
                 
                 alertMessage.textContent = 'Processing video...';
                 alertMessage.className = 'alert-message';
@@ -136,15 +287,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Show video feed
                 videoFeed.style.display = 'block';
                 noFeedMessage.style.display = 'none';
-                videoFeed.src = '/video_feed';
-                
-                // Start stats updates - more frequent for real-time feel
-                if (statsInterval) clearInterval(statsInterval);
-                statsInterval = setInterval(updateStats, 200); // Update every 200ms for real-time feel
+                videoFeed.src = videoFeedUrl();
                 
-                // Start incident updates
-                if (incidentInterval) clearInterval(incidentInterval);
-                incidentInterval = setInterval(updateIncidents, 3000); // Update every 3 seconds
+                // Start live stats and incident updates
+                startUpdates();
                 
                 // Update alert message
                 alertMessage.textContent = 'Camera started. Detecting crowd and monitoring for stampede risk...';
@@ -177,17 +323,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 noFeedMessage.style.display = 'block';
                 videoFeed.src = '';
                 
-                // Stop stats updates
-                if (statsInterval) {
-                    clearInterval(statsInterval);
-                    statsInterval = null;
-                }
-                
-                // Stop incident updates
-                if (incidentInterval) {
-                    clearInterval(incidentInterval);
-                    incidentInterval = null;
-                }
+                // Stop stats and incident updates
+                stopUpdates();
                 
                 // Reset stats display
                 peopleCount.textContent = '0';
@@ -228,50 +365,54 @@ document.addEventListener('DOMContentLoaded', function() {
     async function updateStats() {
         try {
             const response = await fetch('/stats');
-            const stats = await response.json();
-            
-            // Update people count
-            peopleCount.textContent = stats.people_count;
-            
-            // Update alert level
-            updateAlertLevel(stats.alert_level);
+            currentStats = await response.json();
+            renderStats(currentStats);
+        } catch (error) {
+            console.error('Error updating stats:', error);
+        }
+    }
+
+    // Show a stats object from /stats or /events
+    function renderStats(stats) {
+        // Update people count
+        peopleCount.textContent = stats.people_count;
+        
+        // Update alert level
+        updateAlertLevel(stats.alert_level);
+        
+        // Update stampede risk
+        updateStampedeRisk(stats.stampede_risk);
+        
+        // Update FPS
+        if (stats.fps && !isNaN(stats.fps)) {
+            fps.textContent = stats.fps.toFixed(2);
+        } else {
+            fps.textContent = '0.00';
+        }
+        
+        // Update risk factors if available
+        if (stats.stampede_risk && stats.stampede_risk.factors) {
+            const factors = stats.stampede_risk.factors;
+            // Ensure we have valid values, default to 0 if undefined
+            const density = factors.density !== undefined ? factors.density : 0;
+            const velocity = factors.velocity !== undefined ? factors.velocity : 0;
+            const direction = factors.direction !== undefined ? factors.direction : 0;
+            const acceleration = factors.acceleration !== undefined ? factors.acceleration : 0;
             
-            // Update stampede risk
-            updateStampedeRisk(stats.stampede_risk);
+            const densityPercent = Math.round(density * 100);
+            const velocityPercent = Math.round(velocity * 100);
+            const directionPercent = Math.round(direction * 100);
+            const accelerationPercent = Math.round(acceleration * 100);
             
-            // Update FPS
-            if (stats.fps && !isNaN(stats.fps)) {
-                fps.textContent = stats.fps.toFixed(2);
-            } else {
-                fps.textContent = '0.00';
-            }
+            densityProgress.style.width = `${densityPercent}%`;
+            velocityProgress.style.width = `${velocityPercent}%`;
+            directionProgress.style.width = `${directionPercent}%`;
+            accelerationProgress.style.width = `${accelerationPercent}%`;
             
-            // Update risk factors if available
-            if (stats.stampede_risk && stats.stampede_risk.factors) {
-                const factors = stats.stampede_risk.factors;
-                // Ensure we have valid values, default to 0 if undefined
-                const density = factors.density !== undefined ? factors.density : 0;
-                const velocity = factors.velocity !== undefined ? factors.velocity : 0;
-                const direction = factors.direction !== undefined ? factors.direction : 0;
-                const acceleration = factors.acceleration !== undefined ? factors.acceleration : 0;
-                
-                const densityPercent = Math.round(density * 100);
-                const velocityPercent = Math.round(velocity * 100);
-                const directionPercent = Math.round(direction * 100);
-                const accelerationPercent = Math.round(acceleration * 100);
-                
-                densityProgress.style.width = `${densityPercent}%`;
-                velocityProgress.style.width = `${velocityPercent}%`;
-                directionProgress.style.width = `${directionPercent}%`;
-                accelerationProgress.style.width = `${accelerationPercent}%`;
-                
-                densityValue.textContent = `${densityPercent}%`;
-                velocityValue.textContent = `${velocityPercent}%`;
-                directionValue.textContent = `${directionPercent}%`;
-                accelerationValue.textContent = `${accelerationPercent}%`;
-            }
-        } catch (error) {
-            console.error('Error updating stats:', error);
+            densityValue.textContent = `${densityPercent}%`;
+            velocityValue.textContent = `${velocityPercent}%`;
+            directionValue.textContent = `${directionPercent}%`;
+            accelerationValue.textContent = `${accelerationPercent}%`;
         }
     }
 
@@ -344,48 +485,53 @@ document.addEventListener('DOMContentLoaded', function() {
             const response = await fetch('/stampede_incidents');
             const data = await response.json();
             
-            if (data.status === 'success' && data.data.length > 0) {
-                // Clear existing content
-                incidentList.innerHTML = '';
-                
-                // Add incidents (limit to 10 most recent)
-                const incidents = data.data.slice(0, 10);
-                
-                incidents.forEach(incident => {
-                    // Assuming incident format: [timestamp, risk_level, people_count, risk_score, factors]
-                    const incidentElement = document.createElement('div');
-                    incidentElement.className = 'incident-item';
-                    
-                    const timestamp = incident[0];
-                    const riskLevel = incident[1];
-                    const peopleCount = incident[2];
-                    const riskScore = incident[3];
-                    
-                    // Format timestamp
-                    const date = new Date(timestamp);
-                    const timeString = date.toLocaleTimeString();
-                    
-                    // Add risk level class
-                    let riskClass = 'incident-risk-low';
-                    if (riskLevel === 'HIGH') riskClass = 'incident-risk-high';
-                    else if (riskLevel === 'MEDIUM') riskClass = 'incident-risk-medium';
-                    
-                    incidentElement.innerHTML = `
-                        <span class="incident-time">${timeString}</span>
-                        <span class="incident-risk ${riskClass}">${riskLevel} RISK</span>
-                        <span>People: ${peopleCount}, Score: ${parseFloat(riskScore).toFixed(2)}</span>
-                    `;
-                    
-                    incidentList.appendChild(incidentElement);
-                });
-            } else {
-                incidentList.innerHTML = '<p>No incidents recorded yet.</p>';
+            if (data.status === 'success') {
+                currentIncidents = data.data;
+                renderIncidents(currentIncidents.slice(0, 10));
             }
         } catch (error) {
             console.error('Error updating incidents:', error);
         }
     }
 
+    // Show the most recent incidents, newest first
+    function renderIncidents(incidents) {
+        if (incidents.length > 0) {
+            // Clear existing content
+            incidentList.innerHTML = '';
+            
+            incidents.forEach(incident => {
+                // Assuming incident format: [timestamp, risk_level, people_count, risk_score, factors]
+                const incidentElement = document.createElement('div');
+                incidentElement.className = 'incident-item';
+                
+                const timestamp = incident[0];
+                const riskLevel = incident[1];
+                const peopleCount = incident[2];
+                const riskScore = incident[3];
+                
+                // Format timestamp
+                const date = new Date(timestamp);
+                const timeString = date.toLocaleTimeString();
+                
+                // Add risk level class
+                let riskClass = 'incident-risk-low';
+                if (riskLevel === 'HIGH') riskClass = 'incident-risk-high';
+                else if (riskLevel === 'MEDIUM') riskClass = 'incident-risk-medium';
+                
+                incidentElement.innerHTML = `
+                    <span class="incident-time">${timeString}</span>
+                    <span class="incident-risk ${riskClass}">${riskLevel} RISK</span>
+                    <span>People: ${peopleCount}, Score: ${parseFloat(riskScore).toFixed(2)}</span>
+                `;
+                
+                incidentList.appendChild(incidentElement);
+            });
+        } else {
+            incidentList.innerHTML = '<p>No incidents recorded yet.</p>';
+        }
+    }
+
     // Reset database function
     async function resetDatabase() {
         try {
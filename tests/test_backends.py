@@ -0,0 +1,129 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from config import Config
+from core.backends import InferenceBackend, ModelTiers, OpenCVDNNBackend, create_backend, create_backend_from_config
+from core.detection import CrowdDetector
+
+
+class StaticBackend(InferenceBackend):
+    """Backend returning fixed YOLO rows, for running detect_crowd without weights"""
+
+    name = 'static'
+
+    def __init__(self, rows):
+        self.rows = np.asarray(rows, dtype=np.float32)
+        self.blobs = []
+
+    def forward(self, blob):
+        self.blobs.append(blob.shape)
+        if blob.shape[0] > 1:
+            return [np.stack([self.rows] * blob.shape[0])]
+        return [self.rows]
+
+
+def person_row(cx, cy, w, h, score=0.9):
+    """A YOLO output row for a person at normalised coordinates"""
+    row = np.zeros(85, dtype=np.float32)
+    row[:5] = [cx, cy, w, h, score]
+    row[5] = score
+    return row
+
+
+class TestInferenceBackends(unittest.TestCase):
+    """Test cases for the pluggable inference backends"""
+
+    def test_unknown_backend_rejected(self):
+        """Unknown backend names raise ValueError"""
+        with self.assertRaises(ValueError):
+            create_backend('tensorrt', parent_dir)
+
+    def test_unknown_opencv_target_rejected(self):
+        """Unknown OpenCV DNN targets raise ValueError before loading"""
+        with self.assertRaises(ValueError):
+            OpenCVDNNBackend('yolov3.cfg', 'yolov3.weights', target='tpu')
+
+    def test_tier_without_backend_model_file_rejected(self):
+        """A tier spec lacking the selected backend's model file raises ValueError instead of loading the default"""
+        spec = {'cfg': 'yolov3-tiny.cfg', 'weights': 'yolov3-tiny.weights', 'input_size': 416}
+        for name in ('onnxruntime', 'openvino'):
+            with self.assertRaises(ValueError):
+                create_backend_from_config(Config, name=name, tier_spec=spec)
+        for spec in Config.MODEL_TIERS.values():
+            for keys in (('onnx',), ('openvino',), ('cfg', 'weights')):
+                self.assertTrue(all(key in spec for key in keys))
+
+    def test_detector_uses_given_backend(self):
+        """detect_crowd runs inference through the injected backend"""
+        backend = StaticBackend([person_row(0.25, 0.5, 0.1, 0.3), person_row(0.75, 0.5, 0.1, 0.3)])
+        detector = CrowdDetector(':memory:', backend=backend)
+        try:
+            frame = np.zeros((480, 640, 3), dtype=np.uint8)
+            _, people_count, detections, risk_data = detector.detect_crowd(frame)
+        finally:
+            detector.close()
+
+        self.assertEqual(backend.blobs, [(1, 3, 416, 416)])
+        self.assertEqual(people_count, 2)
+        self.assertEqual(sorted(d['x'] for d in detections), [128, 448])
+        self.assertIn(risk_data['level'], ['LOW', 'MEDIUM', 'HIGH'])
+
+class TestModelTiers(unittest.TestCase):
+    """Test cases for side by side model tiers"""
+
+    def setUp(self):
+        self.specs = {
+            "full-416": {"cfg": "yolov3.cfg", "weights": "yolov3.weights", "input_size": 416},
+            "full-320": {"cfg": "yolov3.cfg", "weights": "yolov3.weights", "input_size": 320},
+            "tiny": {"cfg": "yolov3-tiny.cfg", "weights": "yolov3-tiny.weights", "input_size": 416},
+        }
+        self.created = []
+
+    def factory(self, spec):
+        backend = StaticBackend([person_row(0.5, 0.5, 0.1, 0.3)])
+        self.created.append((spec["weights"], backend))
+        return backend
+
+    def test_tiers_share_backends_by_model_files(self):
+        """Tiers using the same files share one backend"""
+        tiers = ModelTiers(self.specs, self.factory, "full-416")
+        full_416 = tiers.load()
+        full_320 = tiers.load("full-320")
+        tiny = tiers.load("tiny")
+
+        self.assertIs(full_416.backend, full_320.backend)
+        self.assertIsNot(full_416.backend, tiny.backend)
+        self.assertEqual([weights for weights, _ in self.created], ["yolov3.weights", "yolov3-tiny.weights"])
+        self.assertEqual(full_320.input_size, 320)
+
+    def test_unknown_tier_rejected(self):
+        """Unknown tier names raise ValueError"""
+        with self.assertRaises(ValueError):
+            ModelTiers(self.specs, self.factory, "huge")
+        tiers = ModelTiers(self.specs, self.factory, "full-416")
+        with self.assertRaises(ValueError):
+            tiers.load("huge")
+
+    def test_detect_crowd_per_tier(self):
+        """detect_crowd runs the requested tier at its input size"""
+        detector = CrowdDetector(':memory:', model_tiers=ModelTiers(self.specs, self.factory, "full-416"))
+        try:
+            frame = np.zeros((480, 640, 3), dtype=np.uint8)
+            detector.detect_crowd(frame, model_tier="full-320")
+            detector.set_model_tier("tiny")
+            detector.detect_crowd(frame)
+        finally:
+            detector.close()
+
+        full_backend, tiny_backend = self.created[0][1], self.created[1][1]
+        self.assertEqual(full_backend.blobs, [(1, 3, 320, 320)])
+        self.assertEqual(tiny_backend.blobs, [(1, 3, 416, 416)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import threading
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.batching import InferenceBatcher
+from core.detection import CrowdDetector
+from tests.test_backends import StaticBackend, person_row
+
+
+class TestInferenceBatcher(unittest.TestCase):
+    """Test cases for sharing batched forward passes between streams"""
+
+    def setUp(self):
+        self.backend = StaticBackend([person_row(0.5, 0.5, 0.1, 0.3)])
+        self.detector = CrowdDetector(':memory:', backend=self.backend)
+        self.addCleanup(self.detector.close)
+
+    def test_infer_people_batch_matches_single_frames(self):
+        """One blob of several frames gives the same people as one frame at a time"""
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8), np.zeros((720, 1280, 3), dtype=np.uint8)]
+        results = self.detector.infer_people_batch(frames)
+        self.assertEqual(self.backend.blobs[-1][0], 2)
+        for frame, (boxes, confidences) in zip(frames, results):
+            single_boxes, single_confidences = self.detector._infer_people(frame)
+            np.testing.assert_array_equal(boxes, single_boxes)
+            np.testing.assert_allclose(confidences, single_confidences)
+
+    def test_streams_share_one_forward_pass(self):
+        """Frames submitted by several streams run as one batch"""
+        batcher = InferenceBatcher(self.detector.infer_people_batch, max_batch_size=3, max_wait=5.0)
+        batcher.start()
+        self.addCleanup(batcher.stop)
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        results = {}
+
+        def run_stream(stream):
+            _, num_people, _, _ = self.detector.detect_crowd(
+                frame, infer=lambda f, tier, roi: batcher.infer(f, tier, roi, stream_id=stream),
+                stream_id=stream)
+            results[stream] = num_people
+
+        threads = [threading.Thread(target=run_stream, args=(stream,)) for stream in ('a', 'b', 'c')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        self.assertEqual(results, {'a': 1, 'b': 1, 'c': 1})
+        self.assertEqual([shape[0] for shape in self.backend.blobs], [3])
+        stats = batcher.get_stats()
+        self.assertEqual((stats['batches'], stats['frames'], stats['largest_batch']), (1, 3, 3))
+
+    def test_deadline_flushes_partial_batch(self):
+        """A lone stream is not held back longer than max_wait"""
+        batcher = InferenceBatcher(self.detector.infer_people_batch, max_batch_size=8, max_wait=0.01)
+        batcher.start()
+        self.addCleanup(batcher.stop)
+
+        boxes, _ = batcher.infer(np.zeros((480, 640, 3), dtype=np.uint8))
+        self.assertEqual(len(boxes), 1)
+        self.assertEqual(batcher.get_stats()['mean_batch'], 1.0)
+
+    def test_newer_frame_supersedes_waiting_frame(self):
+        """Only the latest frame of a stream is kept while it waits"""
+        batcher = InferenceBatcher(self.detector.infer_people_batch, max_batch_size=2, max_wait=5.0)
+        batcher.start()
+        self.addCleanup(batcher.stop)
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        old = batcher.submit(frame, stream_id='camera')
+        new = batcher.submit(frame, stream_id='camera')
+        other = batcher.submit(frame, stream_id='video')
+        self.assertTrue(old.cancelled())
+        self.assertEqual(len(new.result(timeout=10)[0]), 1)
+        self.assertEqual(len(other.result(timeout=10)[0]), 1)
+        self.assertEqual(batcher.get_stats()['superseded'], 1)
+
+    def test_submit_requires_running_batcher(self):
+        batcher = InferenceBatcher(self.detector.infer_people_batch)
+        with self.assertRaises(RuntimeError):
+            batcher.submit(np.zeros((480, 640, 3), dtype=np.uint8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import threading
+import time
+import cv2
+import numpy as np
+import sys
+import os
+from unittest import mock
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core import broadcast
+from core.broadcast import FrameBroadcaster
+
+
+def make_frame(value):
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+
+class TestFrameBroadcaster(unittest.TestCase):
+    """Test cases for the encode-once frame broadcaster"""
+
+    def test_each_frame_encoded_once_for_all_clients(self):
+        broadcaster = FrameBroadcaster()
+        clients = [broadcaster.frames(idle_timeout=0.1) for _ in range(5)]
+        with mock.patch.object(broadcast, 'encode_jpeg', wraps=broadcast.encode_jpeg) as encode:
+            broadcaster.publish(make_frame(10))
+            received = [next(client) for client in clients]
+        self.assertEqual(encode.call_count, 1)
+        self.assertTrue(all(frame.jpeg is received[0].jpeg for frame in received))
+        self.assertEqual(broadcaster.get_stats()['clients'], 5)
+
+    def test_waiting_client_wakes_on_publish(self):
+        broadcaster = FrameBroadcaster()
+        broadcaster.publish(make_frame(1))
+        received = []
+        waiter = threading.Thread(target=lambda: received.append(broadcaster.wait_for_frame(1, timeout=2)))
+        waiter.start()
+        broadcaster.publish(make_frame(2))
+        waiter.join(timeout=2)
+        self.assertEqual(received[0].seq, 2)
+
+    def test_slow_client_skips_to_latest(self):
+        broadcaster = FrameBroadcaster()
+        client = broadcaster.frames(idle_timeout=0.1)
+        broadcaster.publish(make_frame(1))
+        self.assertEqual(next(client).seq, 1)
+        for value in range(2, 5):
+            broadcaster.publish(make_frame(value))
+        self.assertEqual(next(client).seq, 4)
+
+    def test_idle_stream_repeats_latest_frame(self):
+        broadcaster = FrameBroadcaster()
+        self.assertIsNone(broadcaster.wait_for_frame(0, timeout=0.01))
+        broadcaster.publish(make_frame(1))
+        client = broadcaster.frames(idle_timeout=0.01)
+        self.assertEqual(next(client).seq, 1)
+        self.assertEqual(next(client).seq, 1)
+
+    def test_client_count_drops_when_generator_closes(self):
+        broadcaster = FrameBroadcaster()
+        broadcaster.publish(make_frame(1))
+        client = broadcaster.frames()
+        next(client)
+        client.close()
+        self.assertEqual(broadcaster.get_stats()['clients'], 0)
+
+
+class TestStreamVariants(unittest.TestCase):
+    """Test cases for per-client resolution, quality and frame-rate variants"""
+
+    def setUp(self):
+        self.broadcaster = FrameBroadcaster(quality=85)
+        self.frame = self.broadcaster.publish(np.random.RandomState(0).randint(0, 255, (480, 640, 3), dtype=np.uint8))
+
+    def test_original_variant_is_shared_jpeg(self):
+        self.assertIs(self.broadcaster.variant(self.frame), self.frame.jpeg)
+        self.assertIs(self.broadcaster.variant(self.frame, width=1920, quality=85), self.frame.jpeg)
+
+    def test_variant_encoded_once_per_frame(self):
+        jpegs = [self.broadcaster.variant(self.frame, width=320, quality=50) for _ in range(10)]
+        stats = self.broadcaster.get_stats()
+        self.assertEqual(stats['variants_encoded'], 1)
+        self.assertEqual(stats['variant_hits'], 9)
+        self.assertTrue(all(jpeg is jpegs[0] for jpeg in jpegs))
+
+        image = cv2.imdecode(np.frombuffer(jpegs[0], dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(image.shape[:2], (240, 320))
+        self.assertLess(len(jpegs[0]), len(self.frame.jpeg))
+
+    def test_requests_snap_to_shared_variants(self):
+        self.broadcaster.variant(self.frame, width=330, quality=52)
+        self.broadcaster.variant(self.frame, width=325, quality=54)
+        self.assertEqual(self.broadcaster.get_stats()['variants_encoded'], 1)
+
+    def test_variants_of_old_frames_are_dropped(self):
+        self.broadcaster.variant(self.frame, width=320)
+        for _ in range(2):
+            self.broadcaster.publish(self.frame.frame)
+        self.assertEqual(self.broadcaster.variants, {})
+
+    def test_frame_rate_cap(self):
+        client = self.broadcaster.frames(max_fps=20)
+        next(client)
+        start = time.perf_counter()
+        self.broadcaster.publish(self.frame.frame)
+        next(client)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from config import Config
+from core.cache import CachingAnalyzer, ResultCache, config_fingerprint, file_digest
+from core.detection import CrowdDetector
+from core.offline import OfflineAnalyzer
+from tests.test_backends import StaticBackend, person_row
+from tests.test_crowdctl import write_video
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for the analysis result cache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = os.path.join(self.tmp.name, 'cache')
+
+    def results_file(self, name, lines=50):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            for i in range(lines):
+                f.write(f'{{"frame": {i}, "people_count": {i % 7}, "boxes": []}}\n')
+        return path
+
+    def test_put_get_restore(self):
+        cache = ResultCache(self.directory)
+        results = self.results_file('results.jsonl')
+        self.assertIsNone(cache.get('a'))
+
+        cache.put('a', results, {'analyzed_frames': 50})
+        self.assertEqual(cache.get('a'), {'analyzed_frames': 50})
+        restored = os.path.join(self.tmp.name, 'restored.jsonl')
+        self.assertTrue(cache.restore('a', restored))
+        with open(results) as original, open(restored) as copy:
+            self.assertEqual(original.read(), copy.read())
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertLess(stats['bytes'], os.path.getsize(results))  # Stored compressed
+
+    def test_lru_eviction_and_reload(self):
+        results = self.results_file('results.jsonl', lines=2000)
+        cache = ResultCache(self.directory)
+        cache.put('a', results, {})
+        entry_size = cache.get_stats()['bytes']
+        cache.max_bytes = int(entry_size * 2.5)
+        cache.put('b', results, {})
+        cache.get('a')  # a is now more recent than b
+        cache.put('c', results, {})
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+        reloaded = ResultCache(self.directory)
+        self.assertEqual(reloaded.get_stats()['entries'], 2)
+        self.assertEqual(reloaded.get('c'), {})
+
+    def test_key_depends_on_content_and_settings(self):
+        first = self.results_file('first.jsonl', lines=3)
+        second = self.results_file('second.jsonl', lines=4)
+        self.assertEqual(file_digest(first), file_digest(first))
+        self.assertNotEqual(file_digest(first), file_digest(second))
+
+        fingerprint = config_fingerprint(Config, 'tiny', sample_every=1)
+        self.assertEqual(fingerprint, config_fingerprint(Config, 'tiny', sample_every=1))
+        self.assertNotEqual(fingerprint, config_fingerprint(Config, 'tiny', sample_every=2))
+        self.assertNotEqual(fingerprint, config_fingerprint(Config, 'full-416', sample_every=1))
+
+        class Stricter(Config):
+            CONFIDENCE_THRESHOLD = 0.8
+
+        self.assertNotEqual(fingerprint, config_fingerprint(Stricter, 'tiny', sample_every=1))
+
+    def test_truncated_run_not_cached(self):
+        video = os.path.join(self.tmp.name, 'clip.avi')
+        write_video(video)
+        detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(detector.close)
+        cache = ResultCache(self.directory)
+
+        def analyze(fail_at=None):
+            analyzer = OfflineAnalyzer(detector, video, os.path.join(self.tmp.name, 'clip.jsonl'))
+            deliver = analyzer._deliver
+
+            def reading_deliver(index, frame):
+                if index == fail_at:
+                    raise OSError("read failed")
+                return deliver(index, frame)
+
+            analyzer._deliver = reading_deliver
+            return CachingAnalyzer(analyzer, cache, 'clip').run()
+
+        self.assertEqual(analyze(fail_at=3)['state'], 'failed')
+        self.assertIsNone(cache.get('clip'))
+        self.assertEqual(analyze()['state'], 'completed')
+        self.assertEqual(cache.get('clip')['analyzed_frames'], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import time
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.capture import LatestFrameCapture
+
+
+class FakeCamera:
+    """cv2.VideoCapture stand-in delivering numbered frames at a fixed rate"""
+
+    def __init__(self, interval=0.002, fail_every=0):
+        self.interval = interval
+        self.fail_every = fail_every
+        self.reads = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        time.sleep(self.interval)
+        self.reads += 1
+        if self.fail_every and self.reads % self.fail_every == 0:
+            return False, None
+        return True, np.full((4, 4, 3), self.reads % 256, dtype=np.uint8)
+
+
+class TestLatestFrameCapture(unittest.TestCase):
+    """Test cases for the latest-frame capture thread"""
+
+    def start_reader(self, camera):
+        reader = LatestFrameCapture(camera)
+        reader.start()
+        self.addCleanup(reader.stop)
+        return reader
+
+    def test_slow_consumer_gets_newest_frame(self):
+        """Frames captured while the consumer is busy are dropped, not queued"""
+        reader = self.start_reader(FakeCamera())
+        first = reader.read(timeout=1)
+        time.sleep(0.05)  # Slow inference
+        second = reader.read(timeout=1)
+
+        self.assertGreater(second.seq, first.seq + 1)
+        self.assertGreaterEqual(second.timestamp - first.timestamp, 0.04)  # Captured after the busy period
+        stats = reader.get_stats()
+        self.assertEqual(stats['consumed'], 2)
+        self.assertEqual(stats['dropped'], second.seq - 2)
+
+    def test_frames_are_never_returned_twice(self):
+        reader = self.start_reader(FakeCamera())
+        seqs = [reader.read(timeout=1).seq for _ in range(5)]
+        self.assertEqual(seqs, sorted(set(seqs)))
+
+    def test_read_failures_are_skipped(self):
+        reader = self.start_reader(FakeCamera(fail_every=2))
+        for _ in range(3):
+            self.assertIsNotNone(reader.read(timeout=1))
+        self.assertGreater(reader.get_stats()['read_failures'], 0)
+
+    def test_read_returns_none_after_stop(self):
+        reader = self.start_reader(FakeCamera(interval=0.2))
+        reader.stop()
+        self.assertIsNone(reader.read(timeout=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
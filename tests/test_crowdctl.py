@@ -0,0 +1,79 @@
+import unittest
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import cv2
+import numpy as np
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+import crowdctl
+from core.detection import CrowdDetector
+from tests.test_backends import StaticBackend, person_row
+
+
+def write_video(path, frames=6):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (320, 240))
+    base = np.random.RandomState(0).randint(0, 255, (240, 320, 3), dtype=np.uint8)
+    for i in range(frames):
+        writer.write(np.roll(base, i * 4, axis=1))
+    writer.release()
+
+
+class TestCrowdctl(unittest.TestCase):
+    """Test cases for the headless command line interface"""
+
+    def test_does_not_import_flask_or_qt(self):
+        code = "import sys, crowdctl; print(any(m.split('.')[0] in ('flask', 'PyQt5') for m in sys.modules))"
+        output = subprocess.run([sys.executable, '-c', code], cwd=parent_dir, capture_output=True, text=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+    def test_run_writes_jsonl_per_frame(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            video = os.path.join(tmp, 'clip.avi')
+            write_video(video)
+            detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+            self.addCleanup(detector.close)
+
+            args = crowdctl.build_parser().parse_args(['run', '--source', video, '--name', 'gate', '--jsonl'])
+            stdout = io.StringIO()
+            self.assertTrue(crowdctl.cmd_run(args, detector=detector, stdout=stdout))
+
+        records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        results = [record for record in records if record['type'] == 'result']
+        self.assertEqual([record['frame'] for record in results], list(range(1, 7)))
+        self.assertTrue(all(record['stream'] == 'gate' and record['people_count'] == 1 for record in results))
+        self.assertEqual(records[-1]['type'], 'summary')
+        self.assertEqual(records[-1]['frames'], 6)
+        self.assertEqual(len(detector.get_detection_history()), 6)
+
+    def test_analyze_writes_results_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            video = os.path.join(tmp, 'clip.avi')
+            write_video(video)
+            detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+            self.addCleanup(detector.close)
+
+            args = crowdctl.build_parser().parse_args(['analyze', '--input', video, '--sample-every', '2',
+                                                       '--progress', '0'])
+            stdout = io.StringIO()
+            self.assertTrue(crowdctl.cmd_analyze(args, detector=detector, stdout=stdout))
+            status = json.loads(stdout.getvalue())
+            self.assertEqual(status['analyzed_frames'], 3)
+            with open(os.path.join(tmp, 'clip_analysis.jsonl')) as f:
+                self.assertEqual(len(f.readlines()), 3)
+
+    def test_parse_source(self):
+        self.assertEqual(crowdctl.parse_source('0'), 0)
+        self.assertEqual(crowdctl.parse_source('clip.mp4'), 'clip.mp4')
+        self.assertTrue(crowdctl.is_live(crowdctl.parse_source('rtsp://cam/stream')))
+        self.assertFalse(crowdctl.is_live('clip.mp4'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import threading
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.backends import ModelTiers
+from core.detection import CrowdDetector
+from core.engine import InferenceEngine
+from core.stream import StreamState
+from tests.test_backends import StaticBackend, person_row
+
+
+class TestSharedEngine(unittest.TestCase):
+    """Test cases for sharing one inference engine between streams"""
+
+    def setUp(self):
+        self.loads = 0
+
+        def factory(spec):
+            self.loads += 1
+            return StaticBackend([person_row(0.3, 0.5, 0.1, 0.3), person_row(0.7, 0.5, 0.1, 0.3)])
+
+        self.model_tiers = ModelTiers({"full-416": {"input_size": 416}}, factory, "full-416")
+        self.detector = CrowdDetector(':memory:', model_tiers=self.model_tiers)
+        self.addCleanup(self.detector.close)
+        self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    def test_streams_keep_separate_movement_state(self):
+        """Frames of one stream never touch the histories of another"""
+        for _ in range(3):
+            self.detector.detect_crowd(self.frame, stream_id='camera')
+
+        camera = self.detector.stream('camera')
+        video = self.detector.stream('video')
+        self.assertEqual(len(camera.position_history), 2)
+        self.assertEqual(video.position_history, {})
+        self.assertEqual(self.detector.get_inference_stats('camera')['frames'], 3)
+        self.assertEqual(self.detector.get_inference_stats('video')['frames'], 0)
+        self.assertEqual(self.detector.inference_counts['frames'], 0)  # Default stream
+
+    def test_default_stream_attributes(self):
+        """Calls without a stream_id keep the single stream attributes working"""
+        self.detector.detect_crowd(self.frame)
+        self.assertIs(self.detector.position_history, self.detector.default_stream.position_history)
+        self.assertEqual(len(self.detector.position_history), 2)
+        self.detector.frame_history.append(self.frame)
+        self.assertEqual(len(self.detector.stream().frame_history), 1)
+
+    def test_remove_stream_resets_state(self):
+        self.detector.detect_crowd(self.frame, stream_id='video')
+        self.detector.remove_stream('video')
+        self.assertIsInstance(self.detector.stream('video'), StreamState)
+        self.assertEqual(self.detector.get_inference_stats('video')['frames'], 0)
+
+    def test_detectors_share_one_engine(self):
+        """A second detector on the same engine loads no second network"""
+        other = CrowdDetector(':memory:', engine=self.detector.engine)
+        self.addCleanup(other.close)
+        self.assertIsInstance(other.engine, InferenceEngine)
+        self.assertIs(other.backend, self.detector.backend)
+        _, people_count, _, _ = other.detect_crowd(self.frame)
+        self.assertEqual(people_count, 2)
+        self.assertEqual(self.loads, 1)
+
+    def test_concurrent_streams(self):
+        """Streams running on several threads all get their own results"""
+        results = {}
+
+        def run_stream(stream):
+            counts = [self.detector.detect_crowd(self.frame, stream_id=stream)[1] for _ in range(5)]
+            results[stream] = counts
+
+        threads = [threading.Thread(target=run_stream, args=(f"camera-{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        self.assertEqual(results, {f"camera-{i}": [2] * 5 for i in range(4)})
+        for i in range(4):
+            self.assertEqual(self.detector.get_inference_stats(f"camera-{i}")['inferences'], 5)
+        self.assertEqual(self.loads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import json
+import time
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.events import EventHub, format_sse
+
+
+class TestEventHub(unittest.TestCase):
+    """Test cases for the dashboard push channel"""
+
+    def test_unchanged_state_is_not_published(self):
+        hub = EventHub()
+        self.assertEqual(hub.publish_state('stats', {'people_count': 3, 'fps': 10}), ['people_count', 'fps'])
+        self.assertEqual(hub.publish_state('stats', {'people_count': 3, 'fps': 10}), [])
+        self.assertEqual(hub.get_stats()['version'], 1)
+
+    def test_first_message_is_complete_then_deltas(self):
+        hub = EventHub(max_rate=None)
+        hub.publish_state('stats', {'people_count': 3, 'fps': 10})
+        subscriber = hub.subscribe(heartbeat=0.01)
+        self.assertEqual(next(subscriber), [('stats', {'people_count': 3, 'fps': 10})])
+        hub.publish_state('stats', {'people_count': 4, 'fps': 10})
+        self.assertEqual(next(subscriber), [('stats', {'people_count': 4})])
+
+    def test_fast_updates_are_coalesced(self):
+        hub = EventHub(max_rate=20)
+        hub.publish_state('stats', {'people_count': 0, 'fps': 10})
+        subscriber = hub.subscribe(heartbeat=1)
+        next(subscriber)
+        for count in range(1, 6):
+            hub.publish_state('stats', {'people_count': count, 'fps': 10})
+        start = time.perf_counter()
+        self.assertEqual(next(subscriber), [('stats', {'people_count': 5})])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.03)  # Waited for the rate limit
+        self.assertEqual(hub.get_stats()['messages'], 2)
+
+    def test_every_event_is_delivered(self):
+        hub = EventHub(max_rate=None)
+        subscriber = hub.subscribe(heartbeat=0.01)
+        hub.publish_event('incident', ['2026-01-01 00:00:00', 'HIGH', 40, 0.9, '{}'])
+        hub.publish_event('incident', ['2026-01-01 00:00:01', 'HIGH', 42, 0.95, '{}'])
+        self.assertEqual([data[2] for name, data in next(subscriber)], [40, 42])
+
+    def test_earlier_events_are_not_replayed(self):
+        hub = EventHub(max_rate=None)
+        hub.publish_state('stats', {'people_count': 3})
+        hub.publish_event('incident', ['2026-01-01 00:00:00', 'HIGH', 40, 0.9, '{}'])
+        subscriber = hub.subscribe(heartbeat=0.01)
+        hub.publish_event('incident', ['2026-01-01 00:00:01', 'HIGH', 42, 0.95, '{}'])
+        self.assertEqual(next(subscriber), [('stats', {'people_count': 3}),
+                                            ('incident', ['2026-01-01 00:00:01', 'HIGH', 42, 0.95, '{}'])])
+
+        reconnected = hub.subscribe(heartbeat=0.01)
+        self.assertEqual(next(reconnected), [('stats', {'people_count': 3})])
+
+    def test_heartbeat_when_idle(self):
+        hub = EventHub()
+        subscriber = hub.subscribe(heartbeat=0.01)
+        self.assertEqual(next(subscriber), [])
+        self.assertEqual(hub.get_stats()['subscribers'], 1)
+        subscriber.close()
+        self.assertEqual(hub.get_stats()['subscribers'], 0)
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse([]), ": keep-alive\n\n")
+        text = format_sse([('stats', {'fps': 12.5})])
+        self.assertTrue(text.startswith("event: stats\ndata: "))
+        self.assertEqual(json.loads(text.split("data: ")[1]), {'fps': 12.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
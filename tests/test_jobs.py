@@ -0,0 +1,247 @@
+import unittest
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.cache import ResultCache
+from core.jobs import JobManager
+from tests.test_crowdctl import write_video
+
+
+class FakeAnalyzer:
+    """Analyzer that finishes when released (or cancelled)"""
+
+    def __init__(self, job, log, release):
+        self.job = job
+        self.log = log
+        self.release = release
+        self.state = 'pending'
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.log.append(self.job.name)
+        self.state = 'running'
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.release.is_set() and not self.cancelled.is_set():
+            time.sleep(0.005)
+        if self.cancelled.is_set():
+            self.state = 'cancelled'
+            return
+        with open(self.job.output_path, 'w') as f:
+            f.write('{"frame": 0}\n')
+        self.state = 'completed'
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def get_status(self):
+        return {'state': self.state, 'error': None}
+
+
+class TestJobManager(unittest.TestCase):
+    """Test cases for the video analysis job queue"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log = []
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def manager(self, **kwargs):
+        manager = JobManager(lambda job: FakeAnalyzer(job, self.log, self.release), self.tmp.name, **kwargs)
+        self.addCleanup(manager.shutdown)
+        return manager
+
+    def wait_for(self, condition, timeout=2.0):
+        deadline = time.time() + timeout
+        while not condition():
+            self.assertLess(time.time(), deadline, "timed out")
+            time.sleep(0.005)
+
+    def test_priority_order(self):
+        manager = self.manager(workers=1)
+        first = manager.submit('first.mp4')
+        self.wait_for(lambda: manager.get(first.id).state == 'running')
+        manager.submit('low.mp4', priority=0)
+        high = manager.submit('high.mp4', priority=5)
+        manager.submit('later.mp4', priority=0)
+        self.assertEqual(manager.get_status(high.id)['position'], 1)
+
+        self.release.set()
+        self.wait_for(lambda: manager.get_stats()['completed'] == 4)
+        self.assertEqual(self.log, ['first.mp4', 'high.mp4', 'low.mp4', 'later.mp4'])
+        self.assertTrue(os.path.exists(first.output_path))
+        self.assertTrue(manager.get_status(first.id)['results_available'])
+
+    def test_workers_bound_concurrency(self):
+        manager = self.manager(workers=2)
+        jobs = [manager.submit(f"{i}.mp4") for i in range(4)]
+        self.wait_for(lambda: manager.get_stats()['running'] == 2)
+        time.sleep(0.05)
+        self.assertEqual(manager.get_stats()['running'], 2)
+        self.assertEqual(manager.get_stats()['queued'], 2)
+        self.release.set()
+        self.wait_for(lambda: all(manager.get(job.id).state == 'completed' for job in jobs))
+
+    def test_cancel_queued_and_running(self):
+        manager = self.manager(workers=1)
+        running = manager.submit('running.mp4')
+        queued = manager.submit('queued.mp4')
+        self.wait_for(lambda: manager.get(running.id).state == 'running')
+
+        manager.cancel(queued.id)
+        self.assertEqual(manager.get(queued.id).state, 'cancelled')
+        manager.cancel(running.id)
+        self.wait_for(lambda: manager.get(running.id).state == 'cancelled')
+        self.assertEqual(self.log, ['running.mp4'])
+        self.assertIsNone(manager.cancel('unknown'))
+
+    def test_queue_limit(self):
+        manager = self.manager(workers=1, max_queued=1)
+        first = manager.submit('first.mp4')
+        self.wait_for(lambda: manager.get(first.id).state == 'running')
+        manager.submit('second.mp4')
+        with self.assertRaises(RuntimeError):
+            manager.submit('third.mp4')
+
+    def test_history_deletes_old_results(self):
+        manager = self.manager(workers=1, history_size=1)
+        self.release.set()
+        video = manager.upload_path('clip.mp4')
+        open(video, 'w').close()
+        old = manager.submit(video, owns_video=True)
+        self.wait_for(lambda: manager.get(old.id).state == 'completed')
+        new = manager.submit('new.mp4')
+        self.wait_for(lambda: manager.get(new.id) is not None and manager.get(new.id).state == 'completed')
+
+        self.assertIsNone(manager.get(old.id))
+        self.assertFalse(os.path.exists(old.directory))
+        self.assertFalse(os.path.exists(video))
+
+    def test_factory_error_fails_job(self):
+        def broken(job):
+            raise RuntimeError("no detector")
+
+        manager = JobManager(broken, self.tmp.name)
+        self.addCleanup(manager.shutdown)
+        job = manager.submit('clip.mp4')
+        self.wait_for(lambda: manager.get(job.id).state == 'failed')
+        self.assertEqual(manager.get(job.id).error, "no detector")
+
+
+class TestJobRoutes(unittest.TestCase):
+    """Test cases for the /jobs endpoints"""
+
+    def test_submit_poll_and_download(self):
+        import app
+        from core.detection import CrowdDetector
+        from tests.test_backends import StaticBackend, person_row
+
+        previous = app.detector
+        app.detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(setattr, app, 'detector', previous)
+        self.addCleanup(app.detector.close)
+        client = app.app.test_client()
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        previous_cache = app.analysis_cache
+        app.analysis_cache = ResultCache(cache_dir.name)
+        self.addCleanup(setattr, app, 'analysis_cache', previous_cache)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            video = os.path.join(tmp, 'clip.avi')
+            write_video(video)
+            with open(video, 'rb') as f:
+                content = f.read()
+
+        def submit():
+            data = {'video': (io.BytesIO(content), 'clip.avi'), 'sample_every': '2'}
+            response = client.post('/jobs', data=data, content_type='multipart/form-data').get_json()
+            self.assertEqual(response['status'], 'success', response.get('message'))
+            job = app.analysis_jobs.get(response['data']['id'])
+            self.addCleanup(os.remove, job.video_path)
+            self.addCleanup(shutil.rmtree, job.directory, True)
+            deadline = time.time() + 10
+            while True:
+                status = client.get(f'/jobs/{job.id}').get_json()['data']
+                if status['state'] not in ('queued', 'running') or time.time() > deadline:
+                    return status
+                time.sleep(0.02)
+
+        status = submit()
+        self.assertEqual(status['state'], 'completed', status['error'])
+        self.assertEqual(status['progress']['analyzed_frames'], 3)
+        self.assertFalse(status['progress']['cached'])
+
+        results = client.get(f"/jobs/{status['id']}/results")
+        self.assertEqual(len(results.data.splitlines()), 3)
+        listing = client.get('/jobs').get_json()['data']
+        self.assertIn(status['id'], [job['id'] for job in listing['jobs']])
+        self.assertEqual(listing['cache']['entries'], 1)
+        self.assertEqual(client.get('/jobs/unknown').get_json()['status'], 'error')
+
+        # The same recording again is replayed from the cache
+        replay = submit()
+        self.assertEqual(replay['state'], 'completed', replay['error'])
+        self.assertTrue(replay['progress']['cached'])
+        self.assertEqual(replay['progress']['analyzed_frames'], 3)
+        self.assertEqual(client.get(f"/jobs/{replay['id']}/results").data, results.data)
+
+    def test_upload_video_keeps_file_in_its_directory(self):
+        import app
+
+        previous = app.video_filename
+        self.addCleanup(setattr, app, 'video_filename', previous)
+        client = app.app.test_client()
+        data = {'video': (io.BytesIO(b'video'), '../../escaped.avi')}
+        response = client.post('/upload_video', data=data, content_type='multipart/form-data').get_json()
+        self.assertEqual(response['status'], 'success', response.get('message'))
+        self.addCleanup(shutil.rmtree, os.path.dirname(app.video_filename), True)
+        self.assertEqual(os.path.basename(os.path.dirname(app.video_filename))[:13], 'crowd_upload_')
+        self.assertEqual(os.path.basename(app.video_filename), 'escaped.avi')
+
+    def test_replaced_uploads_deleted_once_no_job_reads_them(self):
+        import app
+
+        previous = app.video_filename
+        self.addCleanup(setattr, app, 'video_filename', previous)
+        app.video_filename = None
+        client = app.app.test_client()
+
+        def upload():
+            data = {'video': (io.BytesIO(b'video'), 'clip.avi')}
+            client.post('/upload_video', data=data, content_type='multipart/form-data')
+            return app.video_filename
+
+        first = upload()
+        with mock.patch.object(app.analysis_jobs, 'uses_video', return_value=True):
+            second = upload()
+        self.assertTrue(os.path.exists(first))  # A queued job still reads it
+        third = upload()
+        self.addCleanup(shutil.rmtree, os.path.dirname(third), True)
+        self.assertFalse(os.path.exists(os.path.dirname(first)))
+        self.assertFalse(os.path.exists(os.path.dirname(second)))
+        self.assertTrue(os.path.exists(third))
+        self.assertEqual(app.replaced_videos, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.detection import CrowdDetector
+from core.offline import OfflineAnalyzer
+from tests.test_backends import StaticBackend, person_row
+from tests.test_crowdctl import write_video
+
+
+class TestOfflineAnalyzer(unittest.TestCase):
+    """Test cases for offline video analysis"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.video = os.path.join(self.tmp.name, 'clip.avi')
+        self.output = os.path.join(self.tmp.name, 'clip.jsonl')
+        write_video(self.video, frames=9)
+        self.detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(self.detector.close)
+
+    def read_results(self):
+        with open(self.output) as f:
+            return [json.loads(line) for line in f]
+
+    def test_every_frame_analyzed_in_order(self):
+        status = OfflineAnalyzer(self.detector, self.video, self.output, infer_workers=2).run()
+
+        self.assertEqual(status['state'], 'completed')
+        self.assertEqual(status['analyzed_frames'], 9)
+        self.assertEqual(status['percent'], 100.0)
+        results = self.read_results()
+        self.assertEqual([record['frame'] for record in results], list(range(9)))
+        self.assertEqual(results[1]['time'], 0.1)  # 10 FPS clip
+        self.assertEqual(len(results[0]['boxes']), 1)
+
+    def test_sample_every_nth_frame(self):
+        status = OfflineAnalyzer(self.detector, self.video, self.output, sample_every=4).run()
+
+        self.assertEqual(status['expected_frames'], 3)
+        self.assertEqual([record['frame'] for record in self.read_results()], [0, 4, 8])
+
+    def test_cancel(self):
+        def slow_infer(frame, model_tier=None, roi=None):
+            time.sleep(0.05)
+            return []
+
+        analyzer = OfflineAnalyzer(self.detector, self.video, self.output, infer=slow_infer)
+        analyzer.start()
+        time.sleep(0.08)
+        analyzer.cancel()
+        analyzer.join(timeout=2)
+        status = analyzer.get_status()
+        self.assertEqual(status['state'], 'cancelled')
+        self.assertLess(status['analyzed_frames'], 9)
+
+    def test_growing_file(self):
+        with open(self.video, 'rb') as f:
+            data = f.read()
+        growing = os.path.join(self.tmp.name, 'growing.avi')
+        complete = threading.Event()
+
+        step = len(data) // 5
+
+        def upload():
+            with open(growing, 'ab') as f:
+                for offset in range(step, len(data), step):
+                    f.write(data[offset:offset + step])
+                    f.flush()
+                    time.sleep(0.05)
+            complete.set()
+
+        with open(growing, 'wb') as f:
+            f.write(data[:step])
+        writer = threading.Thread(target=upload)
+        writer.start()
+        analyzer = OfflineAnalyzer(self.detector, growing, self.output, source_complete=complete.is_set,
+                                   poll_interval=0.01)
+        status = analyzer.run()
+        writer.join()
+
+        self.assertEqual(status['state'], 'completed')
+        self.assertEqual([record['frame'] for record in self.read_results()], list(range(9)))
+
+    def test_abandoned_upload_times_out(self):
+        with open(self.video, 'rb') as f:
+            data = f.read()
+        growing = os.path.join(self.tmp.name, 'growing.avi')
+        with open(growing, 'wb') as f:
+            f.write(data[:len(data) // 2])
+
+        analyzer = OfflineAnalyzer(self.detector, growing, self.output, source_complete=lambda: False,
+                                   poll_interval=0.01, idle_timeout=0.1)
+        analyzer.start()
+        analyzer.join(timeout=5)
+        status = analyzer.get_status()
+
+        self.assertEqual(status['state'], 'failed')
+        self.assertIn('abandoned', status['error'])
+        self.assertGreater(status['analyzed_frames'], 0)
+
+    def test_read_error_fails_analysis(self):
+        analyzer = OfflineAnalyzer(self.detector, self.video, self.output)
+        deliver = analyzer._deliver
+
+        def failing_deliver(index, frame):
+            if index == 4:
+                raise OSError("read failed")
+            return deliver(index, frame)
+
+        analyzer._deliver = failing_deliver
+        status = analyzer.run()
+
+        self.assertEqual(status['state'], 'failed')
+        self.assertIn('read failed', status['error'])
+        self.assertEqual(len(self.read_results()), 4)
+
+    def test_missing_video(self):
+        analyzer = OfflineAnalyzer(self.detector, os.path.join(self.tmp.name, 'missing.avi'), self.output)
+        with self.assertRaises(RuntimeError):
+            analyzer.start()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import json
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.overlay import overlay_metadata
+
+
+class TestOverlayMetadata(unittest.TestCase):
+    """Test cases for the per-frame overlay metadata"""
+
+    def test_detections_become_compact_json(self):
+        detections = [
+            {'x': 10, 'y': 20, 'w': 30, 'h': 60, 'label': 'person', 'confidence': np.float32(0.876),
+             'faces': [{'x': np.int32(15), 'y': np.int32(22), 'w': np.int32(8), 'h': np.int32(8)}]},
+            {'x': 100, 'y': 20, 'w': 30, 'h': 60, 'label': 'person', 'confidence': 0.5, 'tracked': True},
+        ]
+        risk = {'level': 'MEDIUM', 'score': 0.61234, 'factors': {'density': 0.4}}
+        metadata = overlay_metadata(7, (480, 640, 3), (None, 2, detections, risk), 'camera')
+
+        self.assertEqual(metadata['seq'], 7)
+        self.assertEqual((metadata['width'], metadata['height']), (640, 480))
+        self.assertEqual(metadata['boxes'], [[10, 20, 30, 60, 0.88, 0], [100, 20, 30, 60, 0.5, 1]])
+        self.assertEqual(metadata['faces'], [[15, 22, 8, 8]])
+        self.assertEqual(metadata['risk'], {'level': 'MEDIUM', 'score': 0.612})
+        json.dumps(metadata)  # No NumPy scalars left
+
+    def test_frame_without_result(self):
+        metadata = overlay_metadata(3, (240, 320, 3))
+        self.assertEqual(metadata['boxes'], [])
+        self.assertEqual(metadata['people_count'], 0)
+        self.assertEqual(metadata['risk']['level'], 'LOW')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+import unittest
+import random
+import threading
+import time
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.detection import CrowdDetector
+from core.pipeline import BoundedQueue, Pipeline, Stage
+from tests.test_backends import StaticBackend, person_row
+
+
+def run_to_end(pipeline, timeout=10):
+    pipeline.start()
+    pipeline.join(timeout)
+    return pipeline.get_stats()
+
+
+class TestBoundedQueue(unittest.TestCase):
+    """Test cases for the backpressure policies"""
+
+    def test_drop_oldest(self):
+        q = BoundedQueue(2, 'drop_oldest')
+        for item in range(5):
+            q.put(item)
+        self.assertEqual(q.dropped, 3)
+        self.assertEqual([q.get(), q.get()], [3, 4])
+
+    def test_block_waits_for_space(self):
+        q = BoundedQueue(1, 'block')
+        q.put(1)
+        putter = threading.Thread(target=q.put, args=(2,))
+        putter.start()
+        time.sleep(0.05)
+        self.assertTrue(putter.is_alive())
+        self.assertEqual(q.get(), 1)
+        putter.join(timeout=1)
+        self.assertEqual(q.get(), 2)
+        self.assertEqual(q.dropped, 0)
+
+    def test_unknown_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            BoundedQueue(2, 'drop_newest')
+
+
+class TestPipeline(unittest.TestCase):
+    """Test cases for the staged pipeline"""
+
+    def test_ordered_reassembly_after_parallel_stage(self):
+        """A stateful stage after a multi-worker stage sees items in order"""
+        seen = []
+
+        def slow_square(x):
+            time.sleep(random.uniform(0, 0.01))
+            return x * x
+
+        pipeline = Pipeline(range(30), [
+            Stage('square', slow_square, workers=4),
+            Stage('collect', seen.append),
+        ])
+        stats = run_to_end(pipeline)
+        self.assertEqual(seen, [x * x for x in range(30)])
+        self.assertEqual(stats['produced'], 30)
+        self.assertEqual(stats['stages']['square']['processed'], 30)
+        self.assertEqual(stats['stages']['square']['depth'], 0)
+
+    def test_dropped_and_failed_items(self):
+        """None drops an item and an exception is counted; the rest keep their order"""
+        seen = []
+
+        def odd_only(x):
+            if x == 5:
+                raise ValueError("bad frame")
+            return x if x % 2 else None
+
+        pipeline = Pipeline(range(10), [
+            Stage('filter', odd_only, workers=2),
+            Stage('collect', seen.append),
+        ])
+        stats = run_to_end(pipeline)
+        self.assertEqual(seen, [1, 3, 7, 9])
+        self.assertEqual(stats['stages']['filter']['errors'], 1)
+        self.assertIsNone(stats['source_error'])
+
+    def test_source_error_kept(self):
+        """A failing source ends the pipeline after the frames it produced, keeping the error"""
+        def frames():
+            yield from range(3)
+            raise OSError("read failed")
+
+        seen = []
+        pipeline = Pipeline(frames(), [Stage('collect', seen.append)])
+        stats = run_to_end(pipeline)
+        self.assertEqual(seen, [0, 1, 2])
+        self.assertIsInstance(pipeline.source_error, OSError)
+        self.assertEqual(stats['source_error'], 'read failed')
+
+    def test_drop_oldest_keeps_recent_items(self):
+        """A slow stage behind a drop_oldest queue skips frames instead of lagging"""
+        seen = []
+
+        def slow(x):
+            time.sleep(0.01)
+            seen.append(x)
+
+        pipeline = Pipeline(range(200), [Stage('slow', slow, queue_size=1, policy='drop_oldest')])
+        stats = run_to_end(pipeline)
+        self.assertGreater(stats['stages']['slow']['dropped'], 0)
+        self.assertEqual(seen[-1], 199)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_stop_endless_source(self):
+        def endless():
+            while True:
+                yield 1
+
+        pipeline = Pipeline(endless(), [Stage('sleep', lambda x: time.sleep(0.001))])
+        pipeline.start()
+        time.sleep(0.05)
+        pipeline.stop()
+        pipeline.join(timeout=2)
+        self.assertFalse(pipeline.is_running())
+
+    def test_detection_steps_match_detect_crowd(self):
+        """plan/infer/finish/persist stages give the same results as detect_crowd"""
+        rows = [person_row(0.3, 0.5, 0.1, 0.3), person_row(0.7, 0.5, 0.1, 0.3)]
+        serial = CrowdDetector(':memory:', backend=StaticBackend(rows), keyframe_interval=3)
+        staged = CrowdDetector(':memory:', backend=StaticBackend(rows), keyframe_interval=3)
+        self.addCleanup(serial.close)
+        self.addCleanup(staged.close)
+
+        frames = [np.roll(np.random.RandomState(0).randint(0, 255, (240, 320, 3), dtype=np.uint8), i * 4, axis=1)
+                  for i in range(7)]
+        expected = [serial.detect_crowd(frame)[1:3] for frame in frames]
+
+        results = []
+
+        def infer(item):
+            if item['plan']['keyframe']:
+                item['people'] = staged._infer_people(item['frame'])
+            return item
+
+        def finish(item):
+            item['result'], item['records'] = staged.finish_frame(item['frame'], item['plan'], item.get('people'))
+            return item
+
+        def persist(item):
+            staged.persist(item['records'])
+            results.append(item['result'][1:3])
+
+        pipeline = Pipeline(({'frame': frame} for frame in frames), [
+            Stage('preprocess', lambda item: dict(item, plan=staged.plan_frame(item['frame']))),
+            Stage('infer', infer, workers=2),
+            Stage('postprocess', finish),
+            Stage('persist', persist),
+        ])
+        run_to_end(pipeline)
+
+        self.assertEqual(results, expected)
+        self.assertEqual(staged.get_inference_stats(), serial.get_inference_stats())
+        self.assertEqual(len(staged.get_detection_history()), len(serial.get_detection_history()))
+
+    def test_incidents_survive_saturated_camera_pipeline(self):
+        """Only the preprocess queue drops frames; every planned frame is persisted"""
+        import app
+
+        detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(detector.close)
+        detector.stampede_assessor.assess_risk = lambda *args: {'score': 0.9, 'level': 'HIGH', 'factors': {}}
+        persist = detector.persist
+
+        def slow_persist(records, stream_id=None):
+            time.sleep(0.03)  # Persistence is the bottleneck, so the queues before it fill up
+            persist(records, stream_id)
+
+        def camera():
+            for _ in range(40):
+                yield {'frame': np.zeros((240, 320, 3), dtype=np.uint8)}
+                time.sleep(0.005)
+
+        detector.persist = slow_persist
+        previous = app.detector
+        app.detector = detector
+        self.addCleanup(setattr, app, 'detector', previous)
+
+        stats = run_to_end(app.build_stream_pipeline('saturated', camera(), 'drop_oldest'))
+
+        self.assertGreater(stats['stages']['preprocess']['dropped'], 0)
+        for name in ('infer', 'postprocess', 'persist', 'encode'):
+            self.assertEqual(stats['stages'][name]['dropped'], 0)
+        planned = detector.get_inference_stats('saturated')['frames']
+        self.assertEqual(len(detector.get_stampede_incidents(limit=100)), planned)
+
+    def test_every_planned_frame_inferred_with_batching(self):
+        """Several infer workers sharing the batcher never supersede a planned frame"""
+        import app
+        from unittest import mock
+        from config import Config
+        from core.batching import InferenceBatcher
+
+        detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(detector.close)
+        batcher = InferenceBatcher(detector.infer_people_batch, max_batch_size=4, max_wait=0.05)
+        batcher.start()
+        self.addCleanup(batcher.stop)
+        for name, value in (('detector', detector), ('batcher', batcher)):
+            self.addCleanup(setattr, app, name, getattr(app, name))
+            setattr(app, name, value)
+
+        frames = ({'frame': np.zeros((240, 320, 3), dtype=np.uint8)} for _ in range(12))
+        with mock.patch.object(Config, 'PIPELINE_INFER_WORKERS', 2):
+            stats = run_to_end(app.build_stream_pipeline('batched', frames, 'block'))
+
+        self.assertEqual(batcher.get_stats()['superseded'], 0)
+        self.assertEqual(stats['stages']['persist']['processed'], 12)
+        self.assertEqual(len(detector.get_detection_history(limit=100)), 12)  # One person per frame
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.postprocess import decode_yolo_outputs, nms_indices, select_people
+
+
+def reference_decode(outs, process_size, original_size, conf_threshold=0.6):
+    """Row-by-row decoding as previously done in CrowdDetector.detect_crowd"""
+    process_width, process_height = process_size
+    original_width, original_height = original_size
+    width_scale = original_width / process_width
+    height_scale = original_height / process_height
+    boxes, confidences, class_ids = [], [], []
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > conf_threshold:
+                center_x = int(detection[0] * process_width)
+                center_y = int(detection[1] * process_height)
+                w = int(detection[2] * process_width)
+                h = int(detection[3] * process_height)
+                x = int(center_x - w / 2)
+                y = int(center_y - h / 2)
+                x = int(round(x * width_scale))
+                y = int(round(y * height_scale))
+                w = int(round(w * width_scale))
+                h = int(round(h * height_scale))
+                x = max(0, min(x, original_width - 1))
+                y = max(0, min(y, original_height - 1))
+                w = max(1, min(w, original_width - x))
+                h = max(1, min(h, original_height - y))
+                boxes.append([x, y, w, h])
+                confidences.append(float(confidence))
+                class_ids.append(int(class_id))
+    return boxes, confidences, class_ids
+
+
+def make_outputs(rng, rows=(507, 2028, 8112), positive_fraction=0.02):
+    """Build YOLOv3-shaped outputs with class scores scaled by objectness"""
+    outs = []
+    for n in rows:
+        out = np.zeros((n, 85), dtype=np.float32)
+        out[:, :4] = rng.random((n, 4), dtype=np.float32)
+        out[:, 4] = rng.random(n, dtype=np.float32) * 0.3
+        positives = rng.random(n) < positive_fraction
+        out[positives, 4] = 0.5 + rng.random(positives.sum(), dtype=np.float32) * 0.5
+        class_probs = rng.random((n, 80), dtype=np.float32) * 0.2
+        class_probs[positives, rng.integers(0, 80, positives.sum())] = 0.9
+        out[:, 5:] = class_probs * out[:, 4:5]
+        outs.append(out)
+    return outs
+
+
+class TestDecodeYoloOutputs(unittest.TestCase):
+    """Test cases for vectorized YOLO output decoding"""
+
+    def test_matches_reference_decoding(self):
+        """Vectorized decoding matches the row-by-row loop"""
+        rng = np.random.default_rng(42)
+        for original_size in [(640, 480), (1280, 720), (700, 500)]:
+            outs = make_outputs(rng)
+            boxes, scores, class_ids = decode_yolo_outputs(outs, (640, 480), original_size)
+            ref_boxes, ref_scores, ref_class_ids = reference_decode(outs, (640, 480), original_size)
+
+            self.assertGreater(len(ref_boxes), 0)
+            self.assertEqual(boxes.tolist(), ref_boxes)
+            self.assertEqual(scores.tolist(), ref_scores)
+            self.assertEqual(class_ids.tolist(), ref_class_ids)
+
+    def test_boxes_clamped_to_frame(self):
+        """Boxes extending past the frame are clamped"""
+        out = np.zeros((2, 85), dtype=np.float32)
+        out[0, :5] = [0.0, 0.0, 0.5, 0.5, 0.9]
+        out[1, :5] = [1.0, 1.0, 0.5, 0.5, 0.9]
+        out[:, 5] = 0.9
+        boxes, _, _ = decode_yolo_outputs([out], (640, 480), (1280, 960))
+
+        self.assertEqual(boxes.shape, (2, 4))
+        self.assertTrue(np.all(boxes[:, :2] >= 0))
+        self.assertTrue(np.all(boxes[:, 0] + boxes[:, 2] <= 1280))
+        self.assertTrue(np.all(boxes[:, 1] + boxes[:, 3] <= 960))
+
+    def test_empty_outputs(self):
+        """No candidate above threshold gives empty arrays"""
+        out = np.zeros((10, 85), dtype=np.float32)
+        boxes, scores, class_ids = decode_yolo_outputs([out], (640, 480), (640, 480))
+        self.assertEqual(boxes.shape, (0, 4))
+        self.assertEqual(len(scores), 0)
+        self.assertEqual(len(class_ids), 0)
+
+        boxes, scores, class_ids = decode_yolo_outputs([], (640, 480), (640, 480))
+        self.assertEqual(boxes.shape, (0, 4))
+
+class TestSelectPeople(unittest.TestCase):
+    """Test cases for person-only non-maximum suppression"""
+
+    def make_crowd(self, rng, people=150, duplicates=3, others=40):
+        """Scattered people, each detected several times, plus other classes"""
+        boxes, scores, class_ids = [], [], []
+        for _ in range(people):
+            x, y = rng.integers(0, 1800), rng.integers(0, 1000)
+            for _ in range(duplicates):
+                boxes.append([x + rng.integers(-3, 4), y + rng.integers(-3, 4), 40, 90])
+                scores.append(0.61 + rng.random() * 0.38)
+                class_ids.append(0)
+        for _ in range(others):
+            boxes.append([rng.integers(0, 1800), rng.integers(0, 1000), 30, 30])
+            scores.append(0.61 + rng.random() * 0.38)
+            class_ids.append(int(rng.integers(1, 80)))
+        return np.array(boxes), np.array(scores, dtype=np.float32), np.array(class_ids)
+
+    def test_nms_indices_flat(self):
+        """The shim always returns a flat integer array"""
+        indices = nms_indices([[0, 0, 10, 10], [1, 1, 10, 10]], [0.9, 0.8], 0.6, 0.3)
+        self.assertEqual(indices.tolist(), [0])
+        self.assertEqual(nms_indices([], [], 0.6, 0.3).tolist(), [])
+
+    def test_person_only_matches_two_pass_path(self):
+        """Single-pass person NMS matches the previous double NMS result"""
+        rng = np.random.default_rng(7)
+        boxes, scores, class_ids = self.make_crowd(rng, others=0)
+        fast_boxes, fast_scores = select_people(boxes, scores, class_ids, person_only=True)
+        slow_boxes, slow_scores = select_people(boxes, scores, class_ids, person_only=False)
+
+        self.assertGreater(len(fast_boxes), 0)
+        self.assertEqual(fast_boxes.tolist(), slow_boxes.tolist())
+        self.assertEqual(fast_scores.tolist(), slow_scores.tolist())
+
+    def test_non_person_classes_dropped(self):
+        """Only person detections are returned"""
+        boxes = np.array([[0, 0, 50, 100], [200, 200, 30, 30]])
+        scores = np.array([0.9, 0.95], dtype=np.float32)
+        class_ids = np.array([0, 2])
+        for person_only in (True, False):
+            kept_boxes, kept_scores = select_people(boxes, scores, class_ids, person_only=person_only)
+            self.assertEqual(kept_boxes.tolist(), [[0, 0, 50, 100]])
+
+    def test_overlapping_non_person_does_not_suppress_person(self):
+        """A higher scoring non-person box no longer hides an overlapping person"""
+        boxes = np.array([[0, 0, 50, 100], [2, 2, 50, 100]])
+        scores = np.array([0.7, 0.9], dtype=np.float32)
+        class_ids = np.array([0, 24])
+        kept_boxes, _ = select_people(boxes, scores, class_ids, person_only=True)
+        self.assertEqual(len(kept_boxes), 1)
+        kept_boxes, _ = select_people(boxes, scores, class_ids, person_only=False)
+        self.assertEqual(len(kept_boxes), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.detection import CrowdDetector, StampedeRiskAssessment
+from core.roi import RegionOfInterest
+from tests.test_backends import StaticBackend, person_row
+
+# Lower half of the frame
+LOWER_HALF = [[(0, 0.5), (1, 0.5), (1, 1), (0, 1)]]
+
+
+class TestRegionOfInterest(unittest.TestCase):
+    """Test cases for region of interest polygons"""
+
+    def test_geometry_scales_with_frame(self):
+        """Mask, rectangles and area follow the frame size"""
+        roi = RegionOfInterest(LOWER_HALF)
+        self.assertEqual(roi.bounding_rects((480, 640)), [[0, 240, 640, 240]])
+        self.assertAlmostEqual(roi.area_pixels((480, 640)), 640 * 240, delta=640)
+        self.assertEqual(roi.bounding_rects((1080, 1920)), [[0, 540, 1920, 540]])
+
+    def test_contains_boxes_uses_feet(self):
+        """Boxes count as inside when their bottom centre is in the region"""
+        roi = RegionOfInterest(LOWER_HALF)
+        boxes = [[100, 10, 40, 100], [100, 200, 40, 100], [300, 300, 40, 100]]
+        self.assertEqual(roi.contains_boxes(boxes, (480, 640)).tolist(), [False, True, True])
+
+    def test_invalid_polygon_rejected(self):
+        with self.assertRaises(ValueError):
+            RegionOfInterest([[(0, 0), (1, 1)]])
+
+    def test_density_uses_walkable_area(self):
+        """The same people are denser in a smaller walkable area"""
+        assessor = StampedeRiskAssessment()
+        roi = RegionOfInterest([[(0, 0), (0.25, 0), (0.25, 0.25), (0, 0.25)]])
+        full = assessor.calculate_density_risk(5, 640 * 480)
+        cropped = assessor.calculate_density_risk(5, roi.area_pixels((480, 640)))
+        self.assertGreater(cropped, full)
+
+
+class TestRoiInference(unittest.TestCase):
+    """Test cases for cropping inference to the region of interest"""
+
+    def test_inference_cropped_and_filtered(self):
+        """Only the region's rectangle is inferred and outside people are dropped"""
+        # One person in the middle of whatever crop is inferred
+        backend = StaticBackend([person_row(0.5, 0.5, 0.1, 0.2), person_row(0.5, 0.1, 0.1, 0.1)])
+        roi = RegionOfInterest(LOWER_HALF)
+        detector = CrowdDetector(':memory:', backend=backend, roi=roi)
+        self.addCleanup(detector.close)
+
+        _, people_count, detections, risk_data = detector.detect_crowd(np.zeros((480, 640, 3), dtype=np.uint8))
+
+        self.assertEqual(backend.blobs, [(1, 3, 416, 416)])
+        self.assertEqual(people_count, 2)
+        for d in detections:
+            self.assertGreaterEqual(d['y'] + d['h'], 240)
+        expected_density = StampedeRiskAssessment().calculate_density_risk(2, roi.area_pixels((480, 640)))
+        self.assertAlmostEqual(risk_data['factors']['density'], expected_density)
+
+    def test_people_outside_region_dropped(self):
+        """A person whose feet are outside the polygon is not counted"""
+        backend = StaticBackend([person_row(0.5, 0.5, 0.1, 0.2)])
+        # Triangle whose bounding box contains the person but not their feet
+        roi = RegionOfInterest([[(0, 0.5), (1, 0.5), (0, 1)]])
+        detector = CrowdDetector(':memory:', backend=backend, roi=roi)
+        self.addCleanup(detector.close)
+
+        _, people_count, _, _ = detector.detect_crowd(np.zeros((480, 640, 3), dtype=np.uint8))
+        self.assertEqual(people_count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.detection import CrowdDetector
+from core.offline import OfflineAnalyzer
+from core.segments import SegmentedAnalyzer, plan_segments
+from tests.test_backends import StaticBackend, person_row
+from tests.test_crowdctl import write_video
+
+
+def static_detector():
+    """Detector factory for the spawned segment workers"""
+    return CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+
+
+class TestSegments(unittest.TestCase):
+    """Test cases for segmented offline analysis"""
+
+    def test_plan_covers_every_frame_once(self):
+        segments = plan_segments(100, 3, warmup_frames=10)
+        self.assertEqual(segments, [(0, 33, 0), (33, 67, 23), (67, 100, 57)])
+        self.assertEqual(plan_segments(2, 4), [(0, 1, 0), (1, 2, 1)])
+
+    def test_stitched_timeline_matches_single_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            video = os.path.join(tmp, 'clip.avi')
+            write_video(video, frames=12)
+            single = os.path.join(tmp, 'single.jsonl')
+            stitched = os.path.join(tmp, 'stitched.jsonl')
+
+            detector = static_detector()
+            self.addCleanup(detector.close)
+            OfflineAnalyzer(detector, video, single, sample_every=2).run()
+            analyzer = SegmentedAnalyzer(static_detector, video, stitched, segments=3, processes=2,
+                                         warmup_frames=2, sample_every=2, detector=detector)
+            status = analyzer.run()
+
+            self.assertEqual(status['state'], 'completed', status['error'])
+            self.assertEqual(status['analyzed_frames'], 6)
+            self.assertEqual(status['percent'], 100.0)
+            self.assertEqual(len(status['segments']), 3)
+            with open(single) as f:
+                expected = [json.loads(line) for line in f]
+            with open(stitched) as f:
+                results = [json.loads(line) for line in f]
+            self.assertEqual([record['frame'] for record in results], [0, 2, 4, 6, 8, 10])
+            self.assertEqual([record['people_count'] for record in results],
+                             [record['people_count'] for record in expected])
+            self.assertEqual(sorted(os.listdir(tmp)), ['clip.avi', 'single.jsonl', 'stitched.jsonl'])
+
+    def test_missing_video(self):
+        analyzer = SegmentedAnalyzer(static_detector, 'missing.avi', 'missing.jsonl')
+        with self.assertRaises(RuntimeError):
+            analyzer.start()
+
+
+if __name__ == '__main__':
+    unittest.main()
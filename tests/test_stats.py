@@ -0,0 +1,83 @@
+import unittest
+import json
+import threading
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.stats import StatsPublisher
+
+
+class TestStatsPublisher(unittest.TestCase):
+    """Test cases for the immutable stats snapshots"""
+
+    def test_update_publishes_new_version(self):
+        publisher = StatsPublisher({'people_count': 0, 'fps': 0})
+        first = publisher.current()
+        second = publisher.update({'people_count': 4})
+
+        self.assertEqual(second.version, first.version + 1)
+        self.assertNotEqual(second.etag, first.etag)
+        self.assertEqual(json.loads(second.json), {'people_count': 4, 'fps': 0})
+        self.assertEqual(first.data['people_count'], 0)  # Old snapshots never change
+
+    def test_unchanged_update_keeps_snapshot(self):
+        publisher = StatsPublisher({'people_count': 4})
+        snapshot = publisher.update({'people_count': 4})
+        self.assertIs(snapshot, publisher.current())
+        self.assertEqual(snapshot.version, 0)
+
+    def test_snapshot_is_isolated_from_writers(self):
+        publisher = StatsPublisher()
+        risk = {'level': 'LOW', 'score': 0.1}
+        snapshot = publisher.update({'stampede_risk': risk})
+        risk['level'] = 'HIGH'
+        self.assertEqual(snapshot.data['stampede_risk']['level'], 'LOW')
+        with self.assertRaises(TypeError):
+            snapshot.data['people_count'] = 1
+
+    def test_concurrent_writers_never_tear(self):
+        """Fields written together are always seen together"""
+        publisher = StatsPublisher({'a': 0, 'b': 0})
+        torn = []
+
+        def write(start):
+            for value in range(start, start + 500):
+                publisher.update({'a': value, 'b': value})
+
+        def read():
+            for _ in range(2000):
+                data = json.loads(publisher.current().json)
+                if data['a'] != data['b']:
+                    torn.append(data)
+
+        threads = [threading.Thread(target=write, args=(n * 1000 + 1,)) for n in range(3)] + [threading.Thread(target=read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(torn, [])
+        self.assertEqual(publisher.current().version, 1500)
+
+
+class TestStatsRoute(unittest.TestCase):
+    """Test cases for conditional /stats requests"""
+
+    def test_if_none_match_returns_304(self):
+        import app
+        client = app.app.test_client()
+        response = client.get('/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('people_count', response.get_json())
+        etag = response.headers['ETag']
+
+        self.assertEqual(client.get('/stats', headers={'If-None-Match': etag}).status_code, 304)
+        app.stats_publisher.update({'people_count': app.stats_publisher.current().data['people_count'] + 1})
+        self.assertEqual(client.get('/stats', headers={'If-None-Match': etag}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.backends import ModelTiers
+from core.detection import CrowdDetector
+from core.postprocess import split_batch_outputs
+from core.tiling import make_tiles
+from tests.test_backends import StaticBackend, person_row
+
+
+class TestMakeTiles(unittest.TestCase):
+    """Test cases for splitting frames into overlapping tiles"""
+
+    def test_tiles_cover_frame(self):
+        """Every pixel is covered and tiles stay inside the frame"""
+        tiles = make_tiles(1920, 1080, 640, 128)
+        coverage = np.zeros((1080, 1920), dtype=bool)
+        for x, y, w, h in tiles:
+            self.assertLessEqual(x + w, 1920)
+            self.assertLessEqual(y + h, 1080)
+            coverage[y:y + h, x:x + w] = True
+        self.assertTrue(coverage.all())
+        self.assertEqual(len(tiles), 8)  # 4 columns x 2 rows
+
+    def test_small_frame_single_tile(self):
+        """Frames smaller than a tile give one tile of the frame size"""
+        self.assertEqual(make_tiles(320, 240, 640, 64), [[0, 0, 320, 240]])
+
+    def test_overlap_must_be_smaller_than_tile(self):
+        with self.assertRaises(ValueError):
+            make_tiles(1920, 1080, 256, 256)
+
+
+class TestTiledInference(unittest.TestCase):
+    """Test cases for tiled high resolution inference"""
+
+    def make_detector(self, **kwargs):
+        specs = {"full-416": {"input_size": 416}}
+        self.backends = []
+
+        def factory(spec):
+            backend = StaticBackend([person_row(0.5, 0.5, 0.1, 0.3)])
+            self.backends.append(backend)
+            return backend
+
+        detector = CrowdDetector(':memory:', model_tiers=ModelTiers(specs, factory, "full-416"), **kwargs)
+        self.addCleanup(detector.close)
+        return detector
+
+    def test_split_batch_outputs(self):
+        """Batched and single image outputs split into per-image lists"""
+        batched = [np.zeros((3, 10, 85)), np.ones((3, 4, 85))]
+        per_image = split_batch_outputs(batched, 3)
+        self.assertEqual(len(per_image), 3)
+        self.assertEqual([out.shape for out in per_image[1]], [(10, 85), (4, 85)])
+        self.assertEqual(split_batch_outputs([np.zeros((10, 85))], 1)[0][0].shape, (10, 85))
+
+    def test_tiles_run_as_one_batch(self):
+        """All tiles plus the full frame go through one forward pass"""
+        detector = self.make_detector(tile_size=640, tile_overlap=64)
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        _, people_count, detections, _ = detector.detect_crowd(frame)
+
+        tiles = len(make_tiles(1920, 1080, 640, 64))
+        self.assertEqual(self.backends[0].blobs, [(tiles + 1, 3, 416, 416)])
+        self.assertGreater(people_count, 1)
+        for d in detections:
+            self.assertLessEqual(d['x'] + d['w'], 1920)
+            self.assertLessEqual(d['y'] + d['h'], 1080)
+
+    def test_thread_execution_matches_batch(self):
+        """Running tiles on a thread pool gives the same people as one batch"""
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        batch_detector = self.make_detector(tile_size=640, tile_overlap=64)
+        _, _, batch_detections, _ = batch_detector.detect_crowd(frame)
+        thread_detector = self.make_detector(tile_size=640, tile_overlap=64,
+                                             tile_execution='threads', tile_workers=2)
+        _, _, thread_detections, _ = thread_detector.detect_crowd(frame)
+
+        self.assertEqual(batch_detections, thread_detections)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import io
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+import crowdctl
+from core.detection import CrowdDetector
+from core.timing import StageTimings, format_stage_stats
+from tests.test_backends import StaticBackend, person_row
+from tests.test_crowdctl import write_video
+
+
+class TestStageTimings(unittest.TestCase):
+    """Test cases for per-stage latency instrumentation"""
+
+    def test_disabled_records_nothing(self):
+        timings = StageTimings()
+        self.assertIs(timings.stage('forward'), timings.stage('nms'))  # Shared no-op context
+        with timings.bind('gate'), timings.stage('forward'):
+            pass
+        timings.record('gate', 'forward', 0.1)
+        self.assertEqual(timings.get_stats(), {})
+
+    def test_percentiles_per_stream(self):
+        timings = StageTimings(enabled=True, window=100)
+        for i in range(1, 201):
+            timings.record('gate', 'forward', i / 1000.0)
+        timings.record('hall', 'nms', 0.002)
+
+        stats = timings.get_stats()
+        forward = stats['gate']['forward']
+        self.assertEqual(forward['count'], 200)
+        self.assertEqual(forward['max_ms'], 200.0)
+        self.assertAlmostEqual(forward['p50_ms'], 150.5)  # Only the last 100 samples are kept
+        self.assertLessEqual(forward['p95_ms'], forward['p99_ms'])
+        self.assertEqual(list(timings.get_stats('hall')), ['hall'])
+        self.assertIn('forward', format_stage_stats(stats['gate']))
+
+        timings.reset()
+        self.assertEqual(timings.get_stats(), {})
+
+    def test_bound_stream_labels_engine_stages(self):
+        timings = StageTimings(enabled=True)
+        with timings.bind('gate'):
+            with timings.stage('forward'):
+                pass
+        with timings.stage('forward'):
+            pass
+        self.assertEqual(sorted(timings.get_stats()), ['default', 'gate'])
+
+    def test_detect_crowd_stages(self):
+        detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(detector.close)
+        detector.timings.enabled = True
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        for _ in range(3):
+            detector.detect_crowd(frame, stream_id='gate')
+
+        stages = detector.timings.get_stats('gate')['gate']
+        for name in ('plan', 'resize', 'blob', 'forward', 'decode', 'nms', 'risk', 'sqlite'):
+            self.assertIn(name, stages)
+        self.assertEqual(list(stages)[0], 'plan')  # Pipeline order
+
+    def test_run_reports_timings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            video = os.path.join(tmp, 'clip.avi')
+            write_video(video)
+            detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+            self.addCleanup(detector.close)
+
+            args = crowdctl.build_parser().parse_args(['run', '--source', video, '--name', 'gate', '--jsonl',
+                                                       '--timings'])
+            stdout = io.StringIO()
+            self.assertTrue(crowdctl.cmd_run(args, detector=detector, stdout=stdout))
+
+        summary = json.loads(stdout.getvalue().splitlines()[-1])
+        self.assertEqual(summary['timings']['forward']['count'], 6)
+        self.assertEqual(summary['timings']['sqlite']['count'], 6)
+
+
+class TestTimingRoutes(unittest.TestCase):
+    """Test cases for the /timings endpoints"""
+
+    def test_toggle_and_read(self):
+        import app
+
+        previous = app.detector
+        app.detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(setattr, app, 'detector', previous)
+        self.addCleanup(app.detector.close)
+        client = app.app.test_client()
+
+        response = client.post('/timings', json={'enabled': True}).get_json()
+        self.assertEqual(response['status'], 'success', response.get('message'))
+        app.detector.detect_crowd(np.zeros((240, 320, 3), dtype=np.uint8), stream_id='gate')
+
+        data = client.get('/timings?stream=gate').get_json()['data']
+        self.assertTrue(data['enabled'])
+        self.assertIn('forward', data['streams']['gate'])
+
+        client.post('/timings', json={'enabled': False, 'reset': True})
+        data = client.get('/timings').get_json()['data']
+        self.assertFalse(data['enabled'])
+        self.assertEqual(data['streams'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
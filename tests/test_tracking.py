@@ -0,0 +1,134 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.detection import CrowdDetector
+from core.tracking import MedianFlowTracker, motion_score, small_gray
+from tests.test_backends import StaticBackend, person_row
+
+
+def textured_frame(offset_x=0, offset_y=0):
+    """Gray frame with a textured block, shifted by the given offset"""
+    rng = np.random.default_rng(3)
+    frame = np.full((480, 640, 3), 90, dtype=np.uint8)
+    block = rng.integers(0, 255, (120, 60, 3), dtype=np.uint8)
+    y, x = 200 + offset_y, 300 + offset_x
+    frame[y:y + 120, x:x + 60] = block
+    return frame
+
+
+class TestMedianFlowTracker(unittest.TestCase):
+    """Test cases for optical flow box tracking"""
+
+    def test_box_follows_motion(self):
+        """A tracked box moves with the content inside it"""
+        tracker = MedianFlowTracker()
+        tracker.init(small_gray(textured_frame(), 0.5), [[300, 200, 60, 120]], scale=0.5)
+        boxes = tracker.update(small_gray(textured_frame(8, 4), 0.5))
+
+        self.assertAlmostEqual(boxes[0, 0], 308, delta=2)
+        self.assertAlmostEqual(boxes[0, 1], 204, delta=2)
+        self.assertEqual(boxes[0, 2:].tolist(), [60, 120])
+
+    def test_box_clipped_at_frame_edge(self):
+        """A box moving past the right and bottom edges is cut to the frame"""
+        tracker = MedianFlowTracker()
+        tracker.init(small_gray(textured_frame(), 0.5), [[300, 200, 60, 120]], scale=0.5)
+        tracker.boxes[0] = [600, 420, 60, 120]  # Extends past the 640x480 frame
+        boxes = tracker.update(small_gray(textured_frame(), 0.5))
+
+        self.assertLessEqual(boxes[0, 0] + boxes[0, 2], 640)
+        self.assertLessEqual(boxes[0, 1] + boxes[0, 3], 480)
+
+    def test_motion_score(self):
+        """Identical frames have no motion, different sizes force a keyframe"""
+        gray = small_gray(textured_frame(), 0.5)
+        self.assertEqual(motion_score(gray, gray), 0.0)
+        self.assertGreater(motion_score(gray, small_gray(textured_frame(20), 0.5)), 0.0)
+        self.assertEqual(motion_score(None, gray), float('inf'))
+
+
+class TestKeyframeMode(unittest.TestCase):
+    """Test cases for running the DNN every N frames"""
+
+    def make_detector(self, **kwargs):
+        self.backend = StaticBackend([person_row(0.515, 0.54, 0.094, 0.25)])
+        detector = CrowdDetector(':memory:', backend=self.backend, **kwargs)
+        self.addCleanup(detector.close)
+        return detector
+
+    def test_dnn_runs_every_n_frames(self):
+        """Only keyframes reach the backend; people are reported on every frame"""
+        detector = self.make_detector(keyframe_interval=3)
+        counts = []
+        for i in range(7):
+            _, people_count, detections, _ = detector.detect_crowd(textured_frame(i))
+            counts.append(people_count)
+
+        self.assertEqual(len(self.backend.blobs), 3)  # frames 0, 3 and 6
+        self.assertEqual(counts, [1] * 7)
+        self.assertEqual(detector.inference_counts, {'frames': 7, 'inferences': 3, 'tracked': 4, 'gated': 0})
+
+    def test_tracked_boxes_move(self):
+        """Boxes between keyframes follow the tracked content"""
+        detector = self.make_detector(keyframe_interval=5)
+        _, _, first, _ = detector.detect_crowd(textured_frame())
+        _, _, tracked, _ = detector.detect_crowd(textured_frame(6))
+
+        self.assertTrue(tracked[0]['tracked'])
+        self.assertAlmostEqual(tracked[0]['x'] - first[0]['x'], 6, delta=2)
+
+    def test_motion_forces_keyframe(self):
+        """Large changes since the last keyframe trigger an early DNN run"""
+        detector = self.make_detector(keyframe_interval=10, keyframe_motion_threshold=1.0)
+        detector.detect_crowd(textured_frame())
+        detector.detect_crowd(textured_frame())
+        self.assertEqual(len(self.backend.blobs), 1)
+
+        detector.detect_crowd(np.full((480, 640, 3), 200, dtype=np.uint8))
+        self.assertEqual(len(self.backend.blobs), 2)
+
+class TestMotionGate(unittest.TestCase):
+    """Test cases for skipping the DNN on static frames"""
+
+    def make_detector(self, **kwargs):
+        self.backend = StaticBackend([person_row(0.515, 0.54, 0.094, 0.25)])
+        detector = CrowdDetector(':memory:', backend=self.backend, **kwargs)
+        self.addCleanup(detector.close)
+        return detector
+
+    def test_static_frames_reuse_last_result(self):
+        """Unchanged frames skip inference and return the previous result"""
+        detector = self.make_detector(motion_gate_threshold=1.0)
+        _, _, first, first_risk = detector.detect_crowd(textured_frame())
+        for _ in range(4):
+            _, people_count, detections, risk_data = detector.detect_crowd(textured_frame())
+            self.assertEqual(people_count, 1)
+            self.assertEqual(detections, first)
+            self.assertEqual(risk_data, first_risk)
+
+        self.assertEqual(len(self.backend.blobs), 1)
+        stats = detector.get_inference_stats()
+        self.assertEqual((stats['gated'], stats['saved']), (4, 4))
+
+    def test_motion_opens_gate(self):
+        """A changed scene runs the DNN again"""
+        detector = self.make_detector(motion_gate_threshold=1.0)
+        detector.detect_crowd(textured_frame())
+        detector.detect_crowd(np.full((480, 640, 3), 200, dtype=np.uint8))
+        self.assertEqual(len(self.backend.blobs), 2)
+
+    def test_gate_refreshes_after_max_skip(self):
+        """Static scenes are still re-inferred every max_skip frames"""
+        detector = self.make_detector(motion_gate_threshold=1.0, motion_gate_max_skip=2)
+        for _ in range(7):
+            detector.detect_crowd(textured_frame())
+        self.assertEqual(len(self.backend.blobs), 3)  # frames 0, 3 and 6
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest import mock
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from config import Config
+from core.uploads import UploadManager, is_streamable
+from tests.test_crowdctl import write_video
+
+
+class TestUploadManager(unittest.TestCase):
+    """Test cases for chunked, resumable uploads"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.uploads = UploadManager(self.tmp.name, max_bytes=100, chunk_size=8)
+
+    def test_chunks_and_resume(self):
+        upload = self.uploads.create('clip.avi', total_size=30)
+        self.uploads.append(upload.id, 0, io.BytesIO(b'a' * 20))
+        with self.assertRaises(ValueError):
+            self.uploads.append(upload.id, 10, io.BytesIO(b'b' * 10))  # Offset behind the received bytes
+        self.uploads.append(upload.id, upload.received, io.BytesIO(b'b' * 10))
+        self.uploads.complete(upload.id)
+
+        with open(upload.path, 'rb') as f:
+            self.assertEqual(f.read(), b'a' * 20 + b'b' * 10)
+        self.assertEqual(upload.sha256(), hashlib.sha256(b'a' * 20 + b'b' * 10).hexdigest())
+        with self.assertRaises(ValueError):
+            self.uploads.append(upload.id, 30, io.BytesIO(b'c'))
+
+    def test_size_limits(self):
+        with self.assertRaises(ValueError):
+            self.uploads.create('clip.avi', total_size=101)
+        upload = self.uploads.create('clip.avi')
+        with self.assertRaises(ValueError):
+            self.uploads.append(upload.id, 0, io.BytesIO(b'x' * 120))
+        self.assertLessEqual(upload.received, 100)
+        self.assertEqual(os.path.getsize(upload.path), upload.received)
+
+        announced = self.uploads.create('clip.avi', total_size=10)
+        self.uploads.append(announced.id, 0, io.BytesIO(b'x' * 5))
+        with self.assertRaises(ValueError):
+            self.uploads.complete(announced.id)
+
+    def test_expiry_deletes_unfinished_files(self):
+        self.uploads.expiry = 0
+        stale = self.uploads.create('stale.avi')
+        time.sleep(0.01)
+        self.uploads.create('new.avi')
+        self.assertIsNone(self.uploads.get(stale.id))
+        self.assertFalse(os.path.exists(stale.path))
+
+    def test_expiry_deletes_completed_uploads_without_job(self):
+        self.uploads.expiry = 0
+        finished = self.uploads.create('finished.avi', total_size=4)
+        self.uploads.append(finished.id, 0, io.BytesIO(b'data'))
+        self.uploads.complete(finished.id)
+        time.sleep(0.01)
+        self.uploads.create('new.avi')
+        self.assertIsNone(self.uploads.get(finished.id))
+        self.assertFalse(os.path.exists(finished.path))
+
+    def test_expiry_keeps_files_of_analysed_uploads(self):
+        self.uploads.expiry = 0
+        analysed = self.uploads.create('analysed.avi')
+        analysed.job_id = 'job'  # The job deletes the file with its history
+        time.sleep(0.01)
+        self.uploads.create('new.avi')
+        self.assertIsNone(self.uploads.get(analysed.id))
+        self.assertTrue(os.path.exists(analysed.path))
+
+    def test_streamable(self):
+        self.assertTrue(is_streamable('clip.MKV'))
+        self.assertFalse(is_streamable('clip.mp4'))
+
+
+class TestUploadRoutes(unittest.TestCase):
+    """Test cases for the /uploads endpoints"""
+
+    def test_analysis_starts_before_upload_completes(self):
+        import app
+        from core.detection import CrowdDetector
+        from tests.test_backends import StaticBackend, person_row
+
+        previous = app.detector
+        app.detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(setattr, app, 'detector', previous)
+        self.addCleanup(app.detector.close)
+        client = app.app.test_client()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            video = os.path.join(tmp, 'clip.avi')
+            write_video(video, frames=8)
+            with open(video, 'rb') as f:
+                content = f.read()
+        half = len(content) // 2
+
+        with mock.patch.object(Config, 'UPLOAD_ANALYZE_AFTER_BYTES', half):
+            created = client.post('/uploads', json={'filename': 'clip.avi', 'size': len(content),
+                                                    'analyze': True}).get_json()
+            self.assertEqual(created['status'], 'success', created.get('message'))
+            upload_id = created['data']['id']
+            response = client.put(f'/uploads/{upload_id}?offset=0', data=content[:half]).get_json()
+        job_id = response['data']['job_id']
+        self.assertIsNotNone(job_id)  # Started on the prefix
+        job = app.analysis_jobs.get(job_id)
+        self.addCleanup(shutil.rmtree, job.directory, True)
+        self.addCleanup(os.remove, job.video_path)
+
+        # A retried chunk at a stale offset is refused; resume from 'received'
+        stale = client.put(f'/uploads/{upload_id}?offset=0', data=content[half:]).get_json()
+        self.assertEqual(stale['status'], 'error')
+        received = client.get(f'/uploads/{upload_id}').get_json()['data']['received']
+        client.put(f'/uploads/{upload_id}?offset={received}', data=content[received:])
+        completed = client.post(f'/uploads/{upload_id}/complete').get_json()
+        self.assertEqual(completed['status'], 'success', completed.get('message'))
+
+        deadline = time.time() + 10
+        while app.analysis_jobs.get(job_id).state in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(app.analysis_jobs.get(job_id).state, 'completed')
+        lines = client.get(f'/jobs/{job_id}/results').data.splitlines()
+        self.assertEqual([json.loads(line)['frame'] for line in lines], list(range(8)))
+
+    def test_analyze_completed_upload(self):
+        import app
+        from core.detection import CrowdDetector
+        from tests.test_backends import StaticBackend, person_row
+
+        previous = app.detector
+        app.detector = CrowdDetector(':memory:', backend=StaticBackend([person_row(0.3, 0.5, 0.1, 0.3)]))
+        self.addCleanup(setattr, app, 'detector', previous)
+        self.addCleanup(app.detector.close)
+        client = app.app.test_client()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            video = os.path.join(tmp, 'clip.avi')
+            write_video(video, frames=4)
+            with open(video, 'rb') as f:
+                content = f.read()
+
+        upload_id = client.post('/uploads', json={'filename': 'clip.avi'}).get_json()['data']['id']
+        client.put(f'/uploads/{upload_id}?offset=0', data=content)
+        completed = client.post(f'/uploads/{upload_id}/complete').get_json()
+        self.assertIsNone(completed['data']['job_id'])
+
+        response = client.post(f'/uploads/{upload_id}/analyze', json={'sample_every': 2}).get_json()
+        self.assertEqual(response['status'], 'success', response.get('message'))
+        job = app.analysis_jobs.get(response['data']['job_id'])
+        self.addCleanup(shutil.rmtree, job.directory, True)
+        self.addCleanup(os.remove, job.video_path)
+        again = client.post(f'/uploads/{upload_id}/analyze').get_json()
+        self.assertEqual(again['status'], 'error')
+
+        deadline = time.time() + 10
+        while app.analysis_jobs.get(job.id).state in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(app.analysis_jobs.get(job.id).state, 'completed')
+        self.assertEqual(len(client.get(f'/jobs/{job.id}/results').data.splitlines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
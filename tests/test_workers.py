@@ -0,0 +1,181 @@
+import unittest
+import numpy as np
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path so we can import core modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from core.backends import ModelTiers
+from core.detection import CrowdDetector
+from core.engine import InferenceEngine
+from core.workers import InferenceWorkerPool, SharedFrameRing
+from tests.test_backends import StaticBackend, person_row
+
+
+def static_engine():
+    """Engine on a StaticBackend; top level so spawned workers can unpickle it"""
+    backend = StaticBackend([person_row(0.3, 0.5, 0.1, 0.3), person_row(0.7, 0.5, 0.1, 0.3)])
+    return InferenceEngine(ModelTiers.single(backend))
+
+
+def broken_engine():
+    raise IOError("weights missing")
+
+
+class FaultyEngine:
+    """Static engine whose worker hangs on frames starting with 1 and dies on frames starting with 2"""
+
+    def __init__(self):
+        self.engine = static_engine()
+
+    def load_model_tier(self, name=None):
+        return self.engine.load_model_tier(name)
+
+    def infer_people(self, frame, model_tier=None, roi=None):
+        if frame[0, 0, 0] == 1:
+            time.sleep(2)
+        elif frame[0, 0, 0] == 2:
+            os._exit(3)
+        return self.engine.infer_people(frame, model_tier, roi)
+
+    def close(self):
+        self.engine.close()
+
+
+def faulty_engine():
+    return FaultyEngine()
+
+
+class TestSharedFrameRing(unittest.TestCase):
+    """Test cases for passing frames through shared memory slots"""
+
+    def test_write_and_view(self):
+        ring = SharedFrameRing(2, 64 * 48 * 3)
+        self.addCleanup(ring.close)
+        frame = np.random.randint(0, 255, (48, 64, 3), dtype=np.uint8)
+        shape, dtype = ring.write(1, frame)
+        np.testing.assert_array_equal(ring.view(1, shape, dtype), frame)
+
+        reader = SharedFrameRing(2, 64 * 48 * 3, name=ring.name)
+        self.addCleanup(reader.close)
+        np.testing.assert_array_equal(reader.view(1, shape, dtype), frame)
+
+    def test_oversized_frame_rejected(self):
+        ring = SharedFrameRing(1, 100)
+        self.addCleanup(ring.close)
+        with self.assertRaises(ValueError):
+            ring.write(0, np.zeros((10, 10, 3), dtype=np.uint8))
+
+
+class TestInferenceWorkerPool(unittest.TestCase):
+    """Test cases for running inference in worker processes"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = InferenceWorkerPool(static_engine, workers=2, max_frame_bytes=1280 * 720 * 3)
+        cls.pool.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.stop()
+
+    def test_results_match_in_process_engine(self):
+        """Workers return the same people as the engine in this process"""
+        engine = static_engine()
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8), np.zeros((720, 1280, 3), dtype=np.uint8)] * 3
+        futures = [self.pool.submit(frame) for frame in frames]
+        for frame, future in zip(frames, futures):
+            boxes, confidences = future.result(timeout=30)
+            expected_boxes, expected_confidences = engine.infer_people(frame)
+            np.testing.assert_array_equal(boxes, expected_boxes)
+            np.testing.assert_allclose(confidences, expected_confidences)
+        self.assertGreaterEqual(self.pool.get_stats()['frames'], len(frames))
+
+    def test_detect_crowd_through_pool(self):
+        detector = CrowdDetector(':memory:', backend=StaticBackend([]))
+        self.addCleanup(detector.close)
+        _, people_count, _, _ = detector.detect_crowd(
+            np.zeros((480, 640, 3), dtype=np.uint8), infer=self.pool.infer, stream_id='camera')
+        self.assertEqual(people_count, 2)
+
+    def test_oversized_frame_frees_slot(self):
+        with self.assertRaises(ValueError):
+            self.pool.submit(np.zeros((1080, 1920, 3), dtype=np.uint8))
+        self.assertEqual(self.pool.free_slots.qsize(), self.pool.slots)
+
+    def test_oversized_frame_runs_on_fallback(self):
+        self.pool.fallback = lambda frame, model_tier=None, roi=None: 'in-process'
+        self.addCleanup(setattr, self.pool, 'fallback', None)
+        self.assertEqual(self.pool.infer(np.zeros((1080, 1920, 3), dtype=np.uint8)), 'in-process')
+        self.assertEqual(self.pool.get_stats()['fallback'], 1)
+
+
+class TestWorkerFailures(unittest.TestCase):
+    """Test cases for hung and crashed inference workers"""
+
+    def setUp(self):
+        self.pool = InferenceWorkerPool(faulty_engine, workers=1, max_frame_bytes=64 * 48 * 3,
+                                        task_timeout=0.5, poll_interval=0.1)
+        self.pool.start()
+        self.addCleanup(self.pool.stop)
+
+    def frame(self, marker=0):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[0, 0, 0] = marker
+        return frame
+
+    def test_timeout_replaces_hung_worker(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.infer(self.frame(1))
+        boxes, _ = self.pool.submit(self.frame()).result(timeout=60)
+        self.assertEqual(len(boxes), 2)
+        self.assertEqual(self.pool.get_stats()['restarts'], 1)
+        self.assertEqual(self.pool.free_slots.qsize(), self.pool.slots)
+
+    def test_dead_worker_fails_frame_and_is_replaced(self):
+        with self.assertRaises(RuntimeError) as raised:
+            self.pool.submit(self.frame(2)).result(timeout=10)
+        self.assertIn('died', str(raised.exception))
+        self.assertEqual(self.pool.free_slots.qsize(), self.pool.slots)
+
+        boxes, _ = self.pool.submit(self.frame()).result(timeout=60)  # Served by the new worker
+        self.assertEqual(len(boxes), 2)
+        self.assertEqual(self.pool.get_stats()['restarts'], 1)
+
+    def test_stop_wakes_blocked_submit(self):
+        for _ in range(self.pool.slots):
+            self.pool.submit(self.frame(1))  # Hangs the worker and holds every slot
+        errors = []
+
+        def submit():
+            try:
+                self.pool.submit(self.frame())
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=submit, daemon=True)
+        thread.start()
+        time.sleep(0.3)
+        self.assertTrue(thread.is_alive())  # Waiting for a free slot
+        self.pool.stop()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+        with self.assertRaises(RuntimeError):
+            self.pool.submit(self.frame())
+
+
+class TestWorkerStartup(unittest.TestCase):
+
+    def test_failed_model_load_raises(self):
+        pool = InferenceWorkerPool(broken_engine, workers=1)
+        with self.assertRaises(RuntimeError):
+            pool.start()
+
+
+if __name__ == '__main__':
+    unittest.main()